@@ -1,221 +1,558 @@
 import streamlit as st
 import requests
 import pandas as pd
-from collections import defaultdict
 import time
-import matplotlib.pyplot as plt
-import io
+from contextlib import closing
+from collections import defaultdict
+from hal_analysis import contributors_from_pairs
+from hal_bursts import DEFAULT_BURST_MIN_DEPOSITS, DEFAULT_BURST_WINDOW, detect_bursts, flagged_bursts
+from hal_cache import DerivedCache
+from hal_discovery import DEFAULT_DISCOVERY_DAYS, DEFAULT_DISCOVERY_TOP, discover_suspect_journals, suspect_journal_titles
+from hal_duplicates import cluster_summary
+from hal_journals import journal_index_frame, use_journal_index
+from hal_charts import ALL_JOURNALS, monthly_chart_spec, monthly_png
+from hal_client import (
+    DEFAULT_MAX_WORKERS, DEFAULT_PAGE_SIZE, DEFAULT_REQUESTS_PER_SECOND, JOURNAL_LIST, TokenBucket,
+    get_contributor_counts, get_journal_counts, get_monthly_counts, plan_journal_queries,
+    stream_journal_chunks
+)
+from hal_corpus import Corpus
+from hal_metrics import Metrics, timed, use_metrics
+from hal_pipeline import ContributorCounter, MonthlyCounter
+from hal_snapshot import DEFAULT_SNAPSHOT_DIR, snapshot_contributor_pairs, snapshot_monthly_counts, write_snapshot
+from hal_store import (
+    connect, count_docs, count_publications, get_harvests, load_docs, mark_harvested, plan_refresh,
+    query_publications, save_docs, utc_now
+)
 
 # =========================================================
 # 📝 ÉTAPE 1 : CONFIGURATION DES REVUES CIBLÉES
 # =========================================================
 
-# Liste des revues souvent associées à des dépôts "sauvages" (extraite de vos scripts initiaux)
-JOURNAL_LIST = [
-    "Advances in Research on Teaching", "Archives of Current Research International", "Asian Basic and Applied Research Journal",
-    "Asian Food Science Journal", "Asian Journal of Advanced Research and Reports", "Asian Journal of Advances in Agricultural Research",
-    "Asian Journal of Advances in Research", "Asian Journal of Agricultural and Horticultural Research",
-    "Asian Journal of Agricultural Extension, Economics and Sociology", "Asian Journal of Arts, Humanities and Social Studies",
-    "Asian Journal of Biochemistry, Genetics and Molecular Biology", "Asian Journal of Biology", "Asian Journal of Cardiology Research",
-    "Asian Journal of Case Reports in Medicine and Health", "Asian journal of case reports in surgery", "Asian Journal of Chemical Sciences",
-    "Asian Journal of Current Research", "Asian Journal of Dental Sciences", "Asian Journal of Economics, Business and Accounting",
-    "Asian Journal of Economics, Finance and Management", "Asian Journal of Education and Social Studies", 
-    "Asian Journal of Fisheries and Aquatic Research", "Asian Journal of Food Research and Nutrition",
-    "Asian Journal of Language, Literature and Culture Studies", "Asian Journal of Medicine and Health",
-    "Asian Journal of Microbiology, Biotechnology and Environmental Sciences", "Asian Journal of Orthopaedic Research", 
-    "Asian Journal of Pediatric Research", "Asian Journal of Plant and Soil Sciences", "Asian Journal of Research and Reports in Endocrinology",
-    "Asian Journal of Research and Reviews in Physics", "Asian Journal of Research in Agriculture and Forestry", 
-    "Asian Journal of Research in Biochemistry", "Asian Journal of Research in Botany", "Asian Journal of Research in Computer Science",
-    "Asian Journal of Research in Crop Science", "Asian Journal of Research in Dermatological Science",
-    "Asian Journal of Research in Infectious Diseases", "Asian Journal of Research in Medicine and Medical Science", 
-    "Asian Journal of Research in Nephrology", "Asian Journal of Research in Nursing and Health", "Asian Journal of Research in Surgery",
-    "Asian Journal of Research in Zoology", "Asian Journal of Sociological Research", "Asian Journal of Soil Science and Plant Nutrition",
-    "Asian Research Journal of Agriculture", "Asian Research Journal of Arts & Social Sciences", "Asian Research Journal of Mathematics",
-    "Cardiology and Angiology: An International Journal", "Chemical Science International Journal", "Current Journal of Applied Science and Technology",
-    "European Journal of Nutrition and Food Safety", "International Journal of Advances in Nephrology Research",
-    "International Journal of Biochemistry Research & Review", "International Journal of Biochemistry Research & Review",
-    "International Journal of Environment and Climate Change", "International Journal of Hematology-Oncology and Stem Cell Research",
-    "International Journal of Medical and Pharmaceutical Case Reports", "International Journal of Pathogen Research",
-    "International Journal of Plant & Soil Science", "international journal of research and reports in dentistry",
-    "International Journal of Research and Reports in Hematology", "International Neuropsychiatric Disease Journal",
-    "International Research Journal of Gastroenterology and Hepatology", "International Research Journal of Oncology",
-    "International Research Journal of Pure and Applied Chemistry", "Journal of Advances in Biology & Biotechnology",
-    "Journal of Advances in Food Science & Technology", "Journal of Advances in Mathematics and Computer Science ",
-    "Journal of Advances in Medicine and Medical Research", "Journal of Advances in Microbiology",
-    "Journal of Agriculture and Ecology Research International", "Journal of Applied Chemical Science International",
-    "Journal of Applied Life Sciences International", "Journal of Biochemistry International", "Journal of Biology and Nature",
-    "Journal of Case Reports in Medical Science", "Journal of Complementary and Alternative Medical Research",
-    "Journal of Economics and Trade", "Journal of Economics, Management and Trade", "Journal of Education, Society and Behavioural Science",
-    "Journal of Engineering Research and Reports", "Journal of Experimental Agriculture International",
-    "Journal of Geography, Environment and Earth Science International", "Journal of Global Ecology and Environment",
-    "Journal of Materials Science Research and Reviews", "Journal of Pharmaceutical Research International",
-    "Journal of Scientific Research and Reports", "Ophthalmology Research: An International Journal",
-    "Physical Science International Journal", "Plant Cell Biotechnology and Molecular Biology",
-    "South Asian Journal of Research in Microbiology", "South Asian Journal of Social Studies and Economics",
-    "UTTAR PRADESH JOURNAL OF ZOOLOGY"
-]
+# La liste des revues ciblées (JOURNAL_LIST) est partagée avec les scripts via hal_client
+
+# Durée de validité (en secondes) des résultats d'une revue avant une nouvelle interrogation de HAL
+JOURNAL_CACHE_TTL = 3600
+
+# Champs HAL récupérés pour chaque publication
+PUBLICATION_FIELDS = 'halId_s,title_s,contributorFullName_s,submittedDate_s,contributorId_i,journalTitle_s'
+
+# Bornes du cache des analyses dérivées d'un corpus, partagé par toutes les sessions du serveur
+DERIVED_CACHE_MAX_ENTRIES = 64
+DERIVED_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Affichage progressif : taille du classement provisoire et intervalle minimal (secondes) entre deux rafraîchissements
+LIVE_TOP_CONTRIBUTORS = 20
+LIVE_REFRESH_INTERVAL = 0.5
+
+# Nombre de publications affichées par page (liste paginée par la base locale)
+PUBLICATION_PAGE_SIZES = [25, 50, 100, 500]
+
+# Dossier de l'instantané Parquet du corpus récolté (partitionné par revue et par mois de dépôt)
+SNAPSHOT_DIR = DEFAULT_SNAPSHOT_DIR
 
 # =========================================================
 # ⚙️ ÉTAPE 2 : FONCTIONS D'ANALYSE
 # =========================================================
 
-@st.cache_data(ttl=3600)
-def get_hal_publications_global(journals):
+@st.cache_data(ttl=JOURNAL_CACHE_TTL, max_entries=500)
+def load_journal_docs(journal, fetched_at):
+    """
+    Relit les documents d'une revue depuis la base locale, mis en cache en mémoire revue par revue.
+    L'horodatage de la récolte fait partie de la clé : une revue récoltée de nouveau est relue.
+    """
+    with closing(connect()) as conn:
+        return load_docs(conn, [journal])
+
+
+@timed()
+def get_hal_publications_global(journals, page_size=DEFAULT_PAGE_SIZE, max_workers=DEFAULT_MAX_WORKERS,
+                                requests_per_second=DEFAULT_REQUESTS_PER_SECOND, use_store=True, incremental=True,
+                                on_docs=None):
     """
     Interroge l'API HAL pour les publications de TOUT HAL dans une liste de revues (filtrée).
+    Les revues sont regroupées en requêtes OR, parcourues page par page (cursorMark) pour ne tronquer aucune revue.
+    Les groupes sont récupérés en parallèle sous un débit maximal de `requests_per_second`.
+    Avec use_store, le cache est tenu revue par revue : seules les revues absentes ou récoltées depuis
+    plus de JOURNAL_CACHE_TTL secondes sont de nouveau interrogées, puis enregistrées dans la base locale.
+    Avec incremental, une revue expirée n'est interrogée que pour les dépôts soumis ou modifiés depuis
+    son point de reprise, puis le delta est fusionné avec les documents déjà connus.
+    Si on_docs est fourni, il est appelé avec chaque lot de nouveaux documents dès son arrivée
+    (page d'une récolte complète, revues relues), pour un affichage progressif des résultats.
+    Retourne la liste des documents et, pour chaque revue, le couple (récupérés, numFound).
     """
     if not journals:
-        return []
+        return [], {}
 
-    base_url = "https://api.archives-ouvertes.fr/search"
     all_docs = []
+    fetched_by_journal = defaultdict(int)
+    limiter = TokenBucket(rate=requests_per_second)
     
     status_text = st.empty()
-    total_found = 0
     MAX_LENGTH = 50 # Définition de la longueur maximale en dehors de la boucle
 
-    for i, journal_title in enumerate(journals):
-        
-        # --- LOGIQUE DE TRONCATURE DU TITRE CORRECTEMENT INDENTÉE ---
-        display_title = journal_title
-        if len(journal_title) > MAX_LENGTH:
-            display_title = journal_title[:MAX_LENGTH-3] + "..." 
-        # -----------------------------------------------------------
-            
-        # Utilisation de display_title pour le message de statut
-        status_text.text(f"Recherche dans TOUT HAL... (Revue {i+1}/{len(journals)}: {display_title})") 
-
-        query = f'journalTitle_s:("{journal_title}")'
-        params = {
-            'q': query,
-            'rows': 1000, 
-            'fl': 'halId_s,title_s,contributorFullName_s,submittedDate_s,contributorId_i'
-        }
-
-        try:
-            response = requests.get(base_url, params=params, timeout=20) 
-            response.raise_for_status()
-            data = response.json()
-            docs = data.get('response', {}).get('docs', [])
-            num_found = data.get('response', {}).get('numFound', 0)
-            
-            if docs:
+    # Revues récoltées récemment : relues depuis la base locale, aucune requête réseau.
+    # Les autres sont interrogées en entier, ou seulement depuis leur point de reprise (incremental).
+    conn = connect() if use_store else None
+    try:
+        if use_store:
+            stored, jobs = plan_refresh(conn, journals, PUBLICATION_FIELDS, max_age=JOURNAL_CACHE_TTL, incremental=incremental)
+        else:
+            stored, jobs = {}, [(chunk, None) for chunk in plan_journal_queries(journals)]
+        if stored:
+            for journal, harvest in stored.items():
+                docs = load_journal_docs(journal, harvest['fetched_at'])
+                fetched_by_journal[journal] += len(docs)
+                all_docs.extend(docs)
+            status_text.text(f"{len(all_docs)} dépôt(s) relu(s) depuis la base locale pour {len(stored)} revue(s).")
+            if on_docs is not None and all_docs:
+                on_docs(all_docs)
+
+        chunks = [chunk for chunk, since in jobs]
+        nb_journals = sum(len(chunk) for chunk in chunks)
+        nb_incremental = sum(1 for chunk, since in jobs if since)
+        since_by_chunk = {tuple(chunk): since for chunk, since in jobs}
+
+        expected = {journal: harvest['num_found'] for journal, harvest in stored.items()}
+        if chunks:
+            try:
+                expected.update(get_journal_counts([j for chunk in chunks for j in chunk], limiter=limiter))
+            except requests.exceptions.RequestException as e:
+                st.error(f"Erreur lors du comptage des dépôts par revue : {e}")
+        total_found = sum(expected.values())
+
+        status_text.text(f"Recherche dans TOUT HAL... (0/{nb_journals} revues, {len(chunks)} groupe(s) en cours)")
+
+        journals_done = 0
+        watermark = utc_now()
+        pending_deltas = defaultdict(list)
+        for chunk, docs, num_found, error, done in stream_journal_chunks(jobs, PUBLICATION_FIELDS, page_size=page_size,
+                                                                         max_workers=max_workers, limiter=limiter):
+            if error is not None:
+                journals_done += len(chunk)
+                pending_deltas.pop(tuple(chunk), None)
+                st.error(f"Erreur lors de la requête pour le groupe de revues ({', '.join(chunk)}) : {error}")
+                continue
+
+            if since_by_chunk[tuple(chunk)]:
+                # Synchronisation incrémentale : le delta est fusionné dans la base une fois le groupe terminé,
+                # puis les revues sont relues en entier
+                pending_deltas[tuple(chunk)].extend(docs)
+                if not done:
+                    continue
+                save_docs(conn, pending_deltas.pop(tuple(chunk)))
+                for journal in chunk:
+                    mark_harvested(conn, journal, PUBLICATION_FIELDS, count_docs(conn, journal), watermark=watermark)
+                new_docs = []
+                for journal, harvest in get_harvests(conn, chunk, PUBLICATION_FIELDS, max_age=None).items():
+                    journal_docs = load_journal_docs(journal, harvest['fetched_at'])
+                    fetched_by_journal[journal] += len(journal_docs)
+                    new_docs.extend(journal_docs)
+                all_docs.extend(new_docs)
+            else:
+                new_docs = docs
                 for doc in docs:
-                    doc['journal'] = journal_title
+                    fetched_by_journal[doc['journal']] += 1
                 all_docs.extend(docs)
-                total_found += len(docs)
-                
-            status_text.caption(f"  -> {num_found} résultat(s) total pour '{journal_title}'.")
-                
-        except requests.exceptions.RequestException as e:
-            st.error(f"Erreur lors de la requête pour '{journal_title}': {e}")
-            
-        time.sleep(1)
-    
-    status_text.success(f"Recherche globale terminée. {len(all_docs)} dépôt(s) récupéré(s) (parmi {total_found} trouvés) pour les {len(journals)} revues sélectionnées dans tout HAL.")
-    return all_docs
 
-def get_contributors_analysis(docs):
-    """Analyse les contributeurs à partir des documents HAL."""
-    all_contributors = defaultdict(lambda: {'count': 0, 'journals': set(), 'name': 'N/A'})
+                if use_store:
+                    save_docs(conn, docs)
+                    if done:
+                        for journal in chunk:
+                            mark_harvested(conn, journal, PUBLICATION_FIELDS, expected.get(journal, fetched_by_journal[journal]),
+                                           watermark=watermark)
+
+            if on_docs is not None and new_docs:
+                on_docs(new_docs)
+
+            # Les groupes se terminent dans le désordre : on affiche la dernière revue terminée
+            display_title = chunk[-1]
+            if len(display_title) > MAX_LENGTH:
+                display_title = display_title[:MAX_LENGTH-3] + "..."
+            if done:
+                journals_done += len(chunk)
+                status_text.text(f"Recherche dans TOUT HAL... ({journals_done}/{nb_journals} revues, dernière terminée : {display_title}, {len(all_docs)}/{total_found} dépôts reçus)")
+            else:
+                status_text.text(f"Recherche dans TOUT HAL... ({journals_done}/{nb_journals} revues terminées, {len(all_docs)}/{total_found} dépôts reçus)")
+    finally:
+        # Aussi en cas d'erreur ou d'arrêt de la récolte (relance du script par le bouton d'arrêt)
+        if conn is not None:
+            conn.close()
+
+    completeness = {
+        journal: (fetched_by_journal.get(journal, 0), expected.get(journal, 0))
+        for journal in list(stored) + [j for chunk in chunks for j in chunk]
+    }
     
-    for doc in docs:
-        names = doc.get('contributorFullName_s')
-        ids = doc.get('contributorId_i')
-        journal = doc.get('journal', 'N/A')
+    status_text.success(f"Recherche globale terminée. {len(all_docs)} dépôt(s) récupéré(s) (parmi {total_found} trouvés) pour les {len(journals)} revues sélectionnées dans tout HAL ({len(chunks)} requête(s) groupée(s) dont {nb_incremental} incrémentale(s), {len(stored)} revue(s) relue(s) depuis la base locale).")
+    return all_docs, completeness
+
+def resolve_journals(journals):
+    """
+    Résout les titres de revues en identifiants HAL (voir hal_journals) : les résolutions sont conservées
+    dans la base locale et les requêtes suivantes filtrent sur journalId_i. Renvoie le tableau de résolution.
+    """
+    conn = connect()
+    try:
+        use_journal_index(conn, journals, limiter=TokenBucket(DEFAULT_REQUESTS_PER_SECOND))
+        return journal_index_frame(conn, journals)
+    finally:
+        conn.close()
+
+@st.cache_data(ttl=3600)
+def get_suspect_journals(days, top):
+    """
+    Revues de tout HAL classées par vitesse de dépôt et concentration des contributeurs
+    (voir hal_discovery), calculées par facettes en deux requêtes rows=0.
+    """
+    try:
+        return discover_suspect_journals(days=days, top=top)
+    except requests.exceptions.RequestException as e:
+        st.error(f"Erreur lors de la découverte des revues : {e}")
+        return None
+
+@st.cache_resource
+def get_derived_cache():
+    """Cache LRU des analyses dérivées, commun à toutes les sessions (voir hal_cache.DerivedCache)."""
+    return DerivedCache(max_entries=DERIVED_CACHE_MAX_ENTRIES, max_bytes=DERIVED_CACHE_MAX_BYTES)
+
+
+def get_contributors_analysis(corpus):
+    """
+    Analyse les contributeurs à partir du corpus en colonnes (voir hal_corpus.Corpus) :
+    le décompte ne relit pas les documents un par un et ne bloque pas l'interface sur les grosses récoltes.
+    Le classement (trié par nombre de dépôts) est mis en cache sous l'empreinte du corpus.
+    """
+    return get_derived_cache().get_or_compute(
+        ('contributors', corpus.fingerprint()),
+        lambda: corpus.contributors().sort_values(by='Nb Contributions', ascending=False),
+    )
+
+
+def get_burst_analysis(corpus, window=DEFAULT_BURST_WINDOW, min_deposits=DEFAULT_BURST_MIN_DEPOSITS, max_median_gap=None):
+    """
+    Détecte les rafales de dépôts par contributeur (voir hal_bursts.detect_bursts) à partir des dates
+    de soumission à la seconde du corpus. Le nom de chaque contributeur est repris du classement.
+    Mis en cache sous l'empreinte du corpus et les seuils.
+    """
+    def compute():
+        contributor_ids, times = corpus.deposit_times()
+        bursts = detect_bursts(contributor_ids, times, window=window, min_deposits=min_deposits,
+                               max_median_gap=max_median_gap)
+        names = get_contributors_analysis(corpus).set_index('ID HAL Contributeur')['Nom Complet']
+        bursts.insert(1, 'Nom Complet', bursts['ID HAL Contributeur'].map(names))
+        return bursts
+
+    return get_derived_cache().get_or_compute(
+        ('bursts', corpus.fingerprint(), window, min_deposits, max_median_gap), compute
+    )
 
-        if not isinstance(names, (list, tuple)):
-            names = [names] if names is not None else []
-        if not isinstance(ids, (list, tuple)):
-            ids = [ids] if ids is not None else []
 
-        min_len = min(len(names), len(ids))
+def get_title_clusters(corpus):
+    """
+    Groupes de titres quasi identiques du corpus (MinHash + LSH, voir hal_duplicates),
+    mis en cache sous l'empreinte du corpus.
+    """
+    return get_derived_cache().get_or_compute(('title_clusters', corpus.fingerprint()), corpus.near_duplicate_titles)
+
 
-        for j in range(min_len):
-            name = names[j]
-            contributor_id = ids[j]
+def get_contributors_analysis_from_snapshot(journals, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Variante de get_contributors_analysis relue depuis l'instantané Parquet : seules les colonnes
+    des contributeurs et de la revue sont lues, fichiers projetés en mémoire.
+    """
+    return contributors_from_pairs(snapshot_contributor_pairs(snapshot_dir, journals=journals))
 
-            if isinstance(contributor_id, int) and contributor_id > 0:
-                all_contributors[contributor_id]['count'] += 1
-                all_contributors[contributor_id]['journals'].add(journal)
-                all_contributors[contributor_id]['name'] = name
+
+@st.cache_data(ttl=3600)
+def get_contributors_analysis_from_facets(journals):
+    """
+    Variante de get_contributors_analysis calculée par HAL (facettes pivot sur contributorId_i,
+    rows=0) : seuls les comptes agrégés sont transférés, pas les documents.
+    """
+    try:
+        contributors = get_contributor_counts(journals, with_journals=True)
+    except requests.exceptions.RequestException as e:
+        st.error(f"Erreur lors du comptage des contributeurs : {e}")
+        contributors = {}
 
     data_list = []
-    for contributor_id, details in all_contributors.items():
+    for contributor_id, details in contributors.items():
         data_list.append({
             'ID HAL Contributeur': contributor_id,
-            'Nom Complet': details.get('name', 'Unknown Contributor'),
+            'Nom Complet': details['name'],
             'Nb Contributions': details['count'],
             'Revues Contribuées': ', '.join(sorted(details['journals']))
         })
 
-    return pd.DataFrame(data_list)
+    return pd.DataFrame(data_list, columns=['ID HAL Contributeur', 'Nom Complet', 'Nb Contributions', 'Revues Contribuées'])
 
 
-def get_monthly_analysis(docs, start_date_str="2025-01-01"):
+def get_monthly_analysis(corpus, start_date_str="2025-01-01"):
     """
-    Analyse les dépôts par mois à partir d'une date de début spécifiée et génère le graphique.
+    Analyse les dépôts par mois à partir d'une date de début spécifiée.
+    Renvoie le tableau mois × revue du nombre de dépôts (None si aucun dépôt), lu dans la colonne
+    datetime64 du corpus, déjà convertie, et mis en cache sous l'empreinte du corpus et la date de début.
     """
-    all_dates = [doc.get('submittedDate_s') for doc in docs if doc.get('submittedDate_s')]
-    
-    if not all_dates:
-        return None, None
+    monthly_by_journal = get_derived_cache().get_or_compute(
+        ('monthly_by_journal', corpus.fingerprint(), start_date_str),
+        lambda: corpus.monthly_counts_by_journal(start_date_str),
+    )
 
-    df = pd.DataFrame(all_dates, columns=['submittedDate'])
-    df.dropna(subset=['submittedDate'], inplace=True)
-    
-    # 1. Conversion en datetime
-    df['submittedDate'] = pd.to_datetime(df['submittedDate'])
-    
-    # 2. Définir la date de début du filtre
-    start_date = pd.to_datetime(start_date_str)
-    
-    # 3. FILTRAGE : Conserver uniquement les dates égales ou postérieures à la date de début
-    df_filtered = df[df['submittedDate'] >= start_date].copy()
-    
-    if df_filtered.empty:
+    if monthly_by_journal.empty:
         st.warning(f"Aucun dépôt trouvé à partir du {start_date_str}.")
-        return None, None
+        return None
 
-    # 4. Extraction du mois et de l'année pour le groupement
-    df_filtered['year_month'] = df_filtered['submittedDate'].dt.to_period('M')
-    
-    # 5. Comptage des dépôts par mois
-    monthly_counts = df_filtered['year_month'].value_counts().sort_index()
-    
-    if monthly_counts.empty:
-        return None, None
-        
-    # Création du graphique
-    fig, ax = plt.subplots(figsize=(15, 8))
-    monthly_counts.plot(kind='bar', color='skyblue', ax=ax)
-    ax.set_title(f'Nombre de dépôts par mois (Revues Sélectionnées, Depuis {start_date_str})', fontsize=18, pad=20)
-    ax.set_xlabel('Mois et Année', fontsize=14, labelpad=15)
-    ax.set_ylabel('Nombre de dépôts', fontsize=14, labelpad=15)
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    
-    buf = io.BytesIO()
-    fig.savefig(buf, format="png")
-    plt.close(fig) 
-    
-    return buf, monthly_counts.to_frame(name='Nb Dépôts')
+    return monthly_by_journal
+
+
+@st.cache_data(ttl=3600)
+def get_monthly_analysis_from_facets(journals, start_date_str="2025-01-01", per_journal=False):
+    """
+    Variante de get_monthly_analysis qui ne télécharge aucun document : HAL renvoie directement
+    le nombre de dépôts par mois (facet.range, rows=0), pour l'ensemble des revues ou,
+    avec per_journal, revue par revue (une petite requête par revue).
+    """
+    try:
+        counts = get_monthly_counts(journals, start_date=start_date_str, per_journal=per_journal)
+    except requests.exceptions.RequestException as e:
+        st.error(f"Erreur lors du comptage mensuel des dépôts : {e}")
+        return None
+
+    if per_journal:
+        counts = {journal: journal_counts for journal, journal_counts in counts.items() if journal_counts}
+    if not counts:
+        st.warning(f"Aucun dépôt trouvé à partir du {start_date_str}.")
+        return None
+
+    if per_journal:
+        monthly_by_journal = pd.DataFrame(counts).fillna(0).astype(int).sort_index()
+    else:
+        monthly_by_journal = pd.Series(counts).to_frame(name=ALL_JOURNALS)
+    monthly_by_journal.index = pd.PeriodIndex(monthly_by_journal.index, freq='M')
+    return monthly_by_journal
+
+
+def get_monthly_analysis_from_snapshot(journals, start_date_str="2025-01-01", snapshot_dir=SNAPSHOT_DIR):
+    """
+    Variante de get_monthly_analysis relue depuis l'instantané Parquet : seules les partitions
+    des revues et des mois postérieurs à la date de début sont lues.
+    """
+    monthly_by_journal = snapshot_monthly_counts(snapshot_dir, journals=journals, start_month=start_date_str[:7],
+                                                 per_journal=True)
+
+    if monthly_by_journal.empty:
+        st.warning(f"Aucun dépôt trouvé à partir du {start_date_str}.")
+        return None
+
+    return monthly_by_journal
+
+
+@st.cache_data(ttl=3600, max_entries=50)
+def get_monthly_chart(monthly, start_date_str):
+    """
+    Spécification Vega-Lite du graphique mensuel, mise en cache sur le contenu de la série :
+    le navigateur dessine le graphique (zoom, détail par revue) à partir des seuls comptes agrégés.
+    """
+    return monthly_chart_spec(
+        monthly,
+        title=f'Nombre de dépôts par mois (Revues Sélectionnées, Depuis {start_date_str})',
+    )
+
+
+def publications_frame(rows):
+    """Met en forme des publications lues dans la base (voir hal_store.query_publications) pour l'affichage."""
+    return pd.DataFrame([
+        {
+            'Titre': title if title is not None else '(Titre non disponible)',
+            'HAL ID': hal_id or 'N/A',
+            'Revues': journal or 'N/A',
+            'Contributeurs': contributors if contributors is not None else 'Auteurs non disponibles',
+            'Date Soumission': submitted or 'N/A',
+            'Lien HAL': f"https://hal.science/{hal_id}" if hal_id else 'N/A'
+        }
+        for hal_id, title, journal, submitted, contributors in rows
+    ], columns=['Titre', 'HAL ID', 'Revues', 'Contributeurs', 'Date Soumission', 'Lien HAL'])
+
+
+@st.fragment
+def show_publications(journals):
+    """
+    Liste paginée des publications, filtrée et triée par la base locale : seule la page affichée
+    est lue et mise en forme. Fragment Streamlit : changer de page ou de filtre ne relance pas l'analyse.
+    """
+    sort_labels = {
+        'Date Soumission': 'submittedDate_s',
+        'Titre': 'title_s',
+        'Revues': 'journal',
+        'HAL ID': 'halId_s',
+    }
+
+    col_journals, col_contributor, col_dates = st.columns(3)
+    journal_filter = col_journals.multiselect("Revues", options=sorted(journals), placeholder="Toutes les revues")
+    contributor_filter = col_contributor.text_input("Contributeur (nom ou ID HAL)").strip()
+    date_range = col_dates.date_input("Période de soumission", value=(), format="YYYY-MM-DD")
+
+    col_sort, col_order, col_size, col_page = st.columns(4)
+    sort_label = col_sort.selectbox("Trier par", options=list(sort_labels))
+    descending = col_order.radio("Ordre", options=["Décroissant", "Croissant"], horizontal=True) == "Décroissant"
+    page_size = col_size.selectbox("Publications par page", options=PUBLICATION_PAGE_SIZES, index=1)
+
+    filters = {
+        'journals': journal_filter or list(journals),
+        'contributor': contributor_filter or None,
+        'start_date': date_range[0] if len(date_range) > 0 else None,
+        'end_date': date_range[1] if len(date_range) > 1 else None,
+    }
+
+    with closing(connect()) as conn:
+        total = count_publications(conn, **filters)
+        nb_pages = max(1, -(-total // page_size))
+        page = col_page.number_input(f"Page (sur {nb_pages})", min_value=1, max_value=nb_pages, value=1, step=1)
+        rows = query_publications(conn, **filters, sort=sort_labels[sort_label], descending=descending,
+                                  limit=page_size, offset=(page - 1) * page_size)
+
+    st.caption(f"{total} publication(s) correspondent aux filtres.")
+    st.dataframe(publications_frame(rows), use_container_width=True,
+                 column_config={"Lien HAL": st.column_config.LinkColumn("Lien HAL")})
+
+    def build_csv():
+        # Exécuté dans un autre fil au moment du téléchargement : connexion propre à ce fil
+        with closing(connect()) as csv_conn:
+            all_rows = query_publications(csv_conn, **filters, sort=sort_labels[sort_label], descending=descending,
+                                          limit=None)
+        return publications_frame(all_rows).to_csv(index=False).encode('utf-8')
+
+    # Le CSV complet n'est construit que lorsque l'utilisateur le télécharge
+    st.download_button(
+        label="Télécharger la Liste des Publications (CSV)",
+        data=build_csv,
+        file_name=f'publications_douteuses_HAL_FILTRE.csv',
+        mime='text/csv',
+        on_click='ignore',
+    )
+
+def live_results_view(start_date_str):
+    """
+    Prépare l'affichage progressif pendant la récolte : compteurs, classement provisoire des contributeurs
+    et graphique mensuel, mis à jour sur place par agrégation incrémentale (hal_pipeline) à chaque lot
+    de documents reçu. Renvoie (on_docs, render) : on_docs est à passer à get_hal_publications_global,
+    render force un dernier rafraîchissement. Les résultats partiels sont gardés dans la session
+    pour rester visibles si l'utilisateur interrompt la récolte.
+    """
+    contributors = ContributorCounter()
+    months = MonthlyCounter()
+    received = {'docs': 0, 'refreshed_at': 0.0}
+
+    st.button("⏹️ Arrêter la récolte", on_click=stop_harvest,
+              help="Interrompt la récolte en cours et conserve les résultats partiels.")
+    counters = st.empty()
+    leaderboard = st.empty()
+    chart = st.empty()
+
+    def render():
+        top = pd.DataFrame([
+            {
+                'ID HAL Contributeur': contributor_id,
+                'Nom Complet': details['name'],
+                'Nb Contributions': details['count'],
+                'Revues Contribuées': ', '.join(sorted(details['journals']))
+            }
+            for contributor_id, details in contributors.top(LIVE_TOP_CONTRIBUTORS)
+        ], columns=['ID HAL Contributeur', 'Nom Complet', 'Nb Contributions', 'Revues Contribuées'])
+        monthly = months.to_series()
+        monthly = monthly[monthly.index >= pd.Period(start_date_str, freq='M')]
+
+        counters.markdown(f"**{received['docs']}** dépôt(s) reçu(s), **{len(contributors)}** contributeur(s) distinct(s).")
+        leaderboard.dataframe(top, use_container_width=True)
+        if not monthly.empty:
+            chart.vega_lite_chart(
+                monthly_chart_spec(monthly, title=f'Dépôts par mois depuis {start_date_str} (récolte en cours)'),
+                use_container_width=True,
+            )
+        st.session_state.partial_results = {'docs': received['docs'], 'contributors': top, 'monthly': monthly}
+
+    def on_docs(docs):
+        contributors.update(docs)
+        months.update(docs)
+        received['docs'] += len(docs)
+        # Rafraîchissement limité : les pages arrivent plus vite que le navigateur ne redessine
+        if time.monotonic() - received['refreshed_at'] >= LIVE_REFRESH_INTERVAL:
+            received['refreshed_at'] = time.monotonic()
+            render()
+
+    return on_docs, render
+
+
+def show_partial_results(partial, start_date_str):
+    """Affiche les résultats partiels d'une récolte interrompue."""
+    st.warning(f"Récolte interrompue : résultats partiels calculés sur {partial['docs']} dépôt(s) reçu(s).")
+    st.subheader("Top provisoire des contributeurs")
+    st.dataframe(partial['contributors'], use_container_width=True)
+    if not partial['monthly'].empty:
+        st.vega_lite_chart(
+            monthly_chart_spec(partial['monthly'], title=f'Dépôts par mois depuis {start_date_str} (résultats partiels)'),
+            use_container_width=True,
+        )
 
 # =========================================================
 # ⚙️ FONCTION DE RAPPEL (CALLBACK)
 # =========================================================
 
+def show_diagnostics(metrics):
+    """
+    Panneau repliable des mesures de l'exécution : totaux des requêtes HAL (durées cumulées sur
+    tous les threads), durée de chaque étape d'analyse et détail des requêtes, téléchargeable en JSON.
+    """
+    summary = metrics.summary()
+    with st.expander(f"🩺 Diagnostics de l'exécution ({summary['requests']} requête(s) HAL, "
+                     f"{summary['elapsed_seconds']:.1f} s)"):
+        cols = st.columns(4)
+        cols[0].metric("Requêtes HAL", summary['requests'], delta=f"{summary['errors']} en erreur" if summary['errors'] else None,
+                       delta_color='inverse')
+        cols[1].metric("Temps réseau cumulé", f"{summary['http_seconds']:.1f} s")
+        cols[2].metric("Attente du limiteur", f"{summary['wait_seconds']:.1f} s")
+        cols[3].metric("Décodage JSON", f"{summary['json_seconds']:.2f} s")
+        cols = st.columns(4)
+        cols[0].metric("QTime Solr cumulé", f"{summary['qtime_seconds']:.2f} s")
+        cols[1].metric("Données reçues", f"{summary['bytes'] / 1e6:.1f} Mo")
+        cols[2].metric("Nouvelles tentatives", summary['retries'])
+        cols[3].metric("Durée écoulée", f"{summary['elapsed_seconds']:.1f} s")
+        st.caption(
+            "Temps réseau et attente du limiteur sont cumulés sur les threads de récolte ; "
+            "les étapes imbriquées comptent aussi dans leur étape parente."
+        )
+        st.subheader("Étapes")
+        st.dataframe(metrics.stage_frame(), use_container_width=True)
+        st.subheader("Requêtes HAL")
+        st.dataframe(metrics.request_frame(), use_container_width=True)
+        st.download_button(
+            label="Télécharger les mesures (JSON lines)",
+            data=metrics.to_json_lines().encode('utf-8'),
+            file_name='diagnostics_HAL.jsonl',
+            mime='application/x-ndjson',
+        )
+
 def select_all_journals():
     """Fonction de rappel pour sélectionner toutes les revues dans le multiselect."""
     st.session_state.multiselect_key = JOURNAL_LIST
 
+def add_discovered_journals(titles):
+    """Fonction de rappel : ajoute les revues découvertes à la sélection du multiselect."""
+    st.session_state.multiselect_key = list(dict.fromkeys(st.session_state.multiselect_key + titles))
+
+def stop_harvest():
+    """Fonction de rappel du bouton d'arrêt : la relance du script interrompt la récolte en cours."""
+    st.session_state.harvest_stopped = True
+
 # =========================================================
 # 💻 ÉTAPE 3 : INTERFACE STREAMLIT
 # =========================================================
 
 def app():
     st.set_page_config(layout="wide", page_title="Détection de dépôts HAL douteux")
+    # Chaque exécution du script a son enregistreur, libéré avec elle (l'enregistreur par défaut ne garde rien)
+    use_metrics(Metrics())
     st.title("🤖 Détection de dépôts HAL douteux")
     st.markdown("---")
 
@@ -227,8 +564,38 @@ def app():
     if 'multiselect_key' not in st.session_state:
         st.session_state.multiselect_key = JOURNAL_LIST[:10] 
 
-    # 1a. Sélection dans la liste prédéfinie
-    st.subheader("1. Choisir dans la liste prédéfinie")
+    # 1a. Découverte automatique des revues suspectes
+    st.subheader("1. Découvrir les revues suspectes (facettes HAL)")
+    discovery_days = st.number_input(
+        "Période observée (jours, 0 = tout HAL sans limite de date)", min_value=0, value=DEFAULT_DISCOVERY_DAYS
+    )
+    discovery_top = st.number_input(
+        "Nombre de revues les plus déposées à examiner", min_value=10, max_value=2000, value=DEFAULT_DISCOVERY_TOP
+    )
+    if st.button("Découvrir les revues suspectes"):
+        st.session_state.discovered_journals = get_suspect_journals(int(discovery_days) or None, int(discovery_top))
+
+    discovered = st.session_state.get('discovered_journals')
+    discovered_titles = suspect_journal_titles(discovered) if discovered is not None else []
+    if discovered is not None:
+        st.caption(
+            "Score = dépôts par jour × part du premier contributeur : les revues alimentées rapidement "
+            "par un petit nombre de comptes arrivent en tête."
+        )
+        st.dataframe(discovered, use_container_width=True)
+        nb_candidates = st.number_input(
+            "Nombre de revues candidates à ajouter", min_value=1, max_value=max(len(discovered_titles), 1),
+            value=min(20, max(len(discovered_titles), 1))
+        )
+        st.button(
+            "Ajouter les revues les mieux classées à la sélection",
+            on_click=add_discovered_journals,
+            args=(discovered_titles[:int(nb_candidates)],),
+            disabled=not discovered_titles,
+        )
+
+    # 1b. Sélection dans la liste prédéfinie
+    st.subheader("2. Choisir dans la liste prédéfinie")
 
     # Bouton 'Tout sélectionner' avec la fonction de rappel
     st.button(
@@ -237,13 +604,13 @@ def app():
     )
         
     selected_journals = st.multiselect(
-        "Revues de la liste ciblée :",
-        options=JOURNAL_LIST,
+        "Revues de la liste ciblée (et revues découvertes) :",
+        options=list(dict.fromkeys(JOURNAL_LIST + discovered_titles + st.session_state.multiselect_key)),
         key='multiselect_key'
     )
 
-    # 1b. Ajout de revues personnalisées
-    st.subheader("2. Ajouter d'autres titres de revues")
+    # 1c. Ajout de revues personnalisées
+    st.subheader("3. Ajouter d'autres titres de revues")
     custom_journals_text = st.text_area(
         "Entrez les titres exacts des revues additionnelles (un titre par ligne ou séparés par une virgule) :",
         height=100
@@ -271,24 +638,114 @@ def app():
     L'opération peut prendre du temps.
     """)
     
+    use_contributor_facets = st.checkbox(
+        "Classer les contributeurs côté serveur (facettes HAL sur contributorId_i)",
+        value=False
+    )
+    use_monthly_facets = st.checkbox(
+        "Compter les dépôts mensuels côté serveur (facettes HAL, sans téléchargement des documents)",
+        value=False
+    )
+    monthly_per_journal = st.checkbox(
+        "Détailler le graphique mensuel par revue (avec les facettes : une requête par revue)",
+        value=False
+    )
+    use_snapshot = st.checkbox(
+        f"Enregistrer un instantané Parquet du corpus (dossier '{SNAPSHOT_DIR}') et y relire les analyses locales",
+        value=False
+    )
+    progressive = st.checkbox(
+        "Afficher les résultats au fil de la récolte (classement et graphique provisoires, arrêt possible)",
+        value=True
+    )
+
+    with st.expander("Réglages de la détection des rafales de dépôts"):
+        burst_window_minutes = st.number_input(
+            "Largeur de la fenêtre glissante (minutes)", min_value=1, value=DEFAULT_BURST_WINDOW // 60
+        )
+        burst_min_deposits = st.number_input(
+            "Nombre de dépôts dans la fenêtre pour signaler un contributeur", min_value=2, value=DEFAULT_BURST_MIN_DEPOSITS
+        )
+        burst_max_median_gap = st.number_input(
+            "Écart médian maximal entre deux dépôts (secondes, 0 = sans condition)", min_value=0, value=0
+        )
+
+    # Définition de la date de début pour le filtrage (Janvier 2025)
+    START_DATE_FILTER = "2025-01-01"
+
+    # Récolte interrompue par le bouton d'arrêt : on montre ce qui avait été reçu
+    if st.session_state.pop('harvest_stopped', False) and 'partial_results' in st.session_state:
+        show_partial_results(st.session_state.pop('partial_results'), START_DATE_FILTER)
+    
     if st.button("Lancer l'analyse des revues sélectionnées", disabled=(not final_list_for_analysis)):
-        
+        # Mesures de l'analyse seule (requêtes HAL et étapes), affichées dans le panneau de diagnostics
+        metrics = use_metrics(Metrics())
+
+        with st.spinner("Résolution des revues en identifiants HAL..."):
+            df_journal_index = resolve_journals(final_list_for_analysis)
+        nb_by_id = int((df_journal_index['Identifiants HAL'] != '').sum())
+        with st.expander(f"Identifiants HAL des revues ({nb_by_id}/{len(df_journal_index)} interrogée(s) par identifiant)"):
+            st.dataframe(df_journal_index, use_container_width=True)
+
+        on_docs, render = live_results_view(START_DATE_FILTER) if progressive else (None, None)
         with st.spinner("Interrogation de l'API HAL..."):
             # Passage de la liste finale à la fonction de recherche
-            docs = get_hal_publications_global(final_list_for_analysis)
+            docs, completeness = get_hal_publications_global(final_list_for_analysis, on_docs=on_docs)
+        if render is not None:
+            render()
+            st.session_state.pop('partial_results', None)
+
+        # Revues dont tous les résultats n'ont pas pu être récupérés
+        incomplete = {j: c for j, c in completeness.items() if c[0] < c[1]}
+        if incomplete:
+            st.warning(f"{len(incomplete)} revue(s) n'ont pas été récupérée(s) en totalité.")
+        with st.expander("Complétude de la récupération par revue"):
+            st.dataframe(
+                pd.DataFrame(
+                    [{'Revue': j, 'Récupérés': f, 'numFound': n} for j, (f, n) in completeness.items()]
+                ),
+                use_container_width=True,
+            )
 
         if not docs:
             st.success(f"🎉 Aucune publication trouvée sur TOUT HAL pour les {len(final_list_for_analysis)} revues sélectionnées.")
+            show_diagnostics(metrics)
             return
 
         st.success(f"✅ **{len(docs)}** dépôt(s) trouvé(s) pour les revues sélectionnées.")
+
+        if use_snapshot:
+            try:
+                nb_rows = write_snapshot(docs, SNAPSHOT_DIR)
+                st.info(f"Instantané Parquet de {nb_rows} dépôt(s) enregistré dans '{SNAPSHOT_DIR}'.")
+            except FileExistsError as e:
+                # Les analyses se font alors sur le corpus en mémoire
+                st.error(str(e))
+                use_snapshot = False
+
+        # Les analyses partagent un corpus en colonnes ; les dictionnaires bruts ne sont plus nécessaires
+        corpus = Corpus.from_docs(docs)
+        st.caption(f"Corpus en mémoire : {corpus.nbytes / 1e6:.1f} Mo en colonnes.")
+        del docs
+        cache_stats = get_derived_cache().stats()
+        st.caption(
+            f"Empreinte du corpus : {corpus.fingerprint()} — cache des analyses : {cache_stats['entries']} résultat(s), "
+            f"{cache_stats['nbytes'] / 1e6:.1f} Mo, {cache_stats['hits']} réutilisation(s)."
+        )
         st.markdown("---")
         
         # --- 3. Analyse des Contributeurs (Détection de Bot) ---
         st.header("👤 Analyse des contributeurs (détection de bots)")
         
-        df_contributors = get_contributors_analysis(docs)
-        df_sorted_contributors = df_contributors.sort_values(by='Nb Contributions', ascending=False)
+        if use_contributor_facets:
+            df_contributors = get_contributors_analysis_from_facets(final_list_for_analysis)
+            df_sorted_contributors = df_contributors.sort_values(by='Nb Contributions', ascending=False)
+        elif use_snapshot:
+            df_contributors = get_contributors_analysis_from_snapshot(final_list_for_analysis)
+            df_sorted_contributors = df_contributors.sort_values(by='Nb Contributions', ascending=False)
+        else:
+            # Déjà trié (et mis en cache) par get_contributors_analysis
+            df_sorted_contributors = get_contributors_analysis(corpus)
         
         st.subheader("Top des Contributeurs par Nombre de Dépôts")
         st.info("Un nombre très élevé de contributions par un même ID/Nom est un indicateur potentiel d'automatisation (bot).")
@@ -303,23 +760,89 @@ def app():
             mime='text/csv',
         )
 
+        # Rafales : dizaines de dépôts à quelques minutes d'intervalle, signature d'un dépôt automatisé
+        st.subheader("Rafales de dépôts par contributeur")
+        df_bursts = get_burst_analysis(
+            corpus,
+            window=int(burst_window_minutes) * 60,
+            min_deposits=int(burst_min_deposits),
+            max_median_gap=int(burst_max_median_gap) or None,
+        )
+        df_flagged = flagged_bursts(df_bursts)
+        st.info(
+            f"**{len(df_flagged)}** contributeur(s) avec au moins {int(burst_min_deposits)} dépôts "
+            f"en {int(burst_window_minutes)} minute(s), calculé sur les dates de soumission à la seconde."
+        )
+        with st.expander("Voir tous les contributeurs avec leurs statistiques de rafales" if not df_flagged.empty
+                         else "Aucune rafale détectée : voir les statistiques de tous les contributeurs"):
+            st.dataframe(df_bursts, use_container_width=True)
+        if not df_flagged.empty:
+            st.dataframe(df_flagged, use_container_width=True)
+
+        st.download_button(
+            label="Télécharger les statistiques de rafales (CSV)",
+            data=df_bursts.to_csv(index=False).encode('utf-8'),
+            file_name='rafales_contributeurs_HAL_FILTRE.csv',
+            mime='text/csv',
+        )
+
+        # Titres gabarits : mêmes titres à quelques mots près, souvent déposés en masse dans plusieurs revues
+        st.subheader("Titres quasi identiques")
+        df_clusters = get_title_clusters(corpus)
+        df_cluster_summary = cluster_summary(df_clusters)
+        st.info(
+            f"**{len(df_cluster_summary)}** groupe(s) de titres quasi identiques regroupant **{len(df_clusters)}** dépôt(s) "
+            f"(similarité estimée par MinHash sur des fragments de caractères)."
+        )
+        if not df_clusters.empty:
+            st.dataframe(df_cluster_summary, use_container_width=True)
+            with st.expander("Voir les dépôts de chaque groupe"):
+                st.dataframe(df_clusters, use_container_width=True)
+            st.download_button(
+                label="Télécharger les groupes de titres (CSV)",
+                data=df_clusters.to_csv(index=False).encode('utf-8'),
+                file_name='titres_quasi_identiques_HAL_FILTRE.csv',
+                mime='text/csv',
+            )
+
         st.markdown("---")
 
         # --- 4. Analyse Mensuelle (Pics d'Activité) ---
         st.header("📈 Analyse Temporelle des dépôts (pics d'activité)")
         
-        # Définition de la date de début pour le filtrage (Janvier 2025)
-        START_DATE_FILTER = "2025-01-01"
-        
         st.info(f"Le graphique est filtré pour commencer à partir du **{START_DATE_FILTER}**.")
         
         # Appel de la fonction avec la date de début
-        image_bytes, df_monthly = get_monthly_analysis(docs, start_date_str=START_DATE_FILTER)
+        if use_monthly_facets:
+            monthly_by_journal = get_monthly_analysis_from_facets(
+                final_list_for_analysis, start_date_str=START_DATE_FILTER, per_journal=monthly_per_journal
+            )
+        elif use_snapshot:
+            monthly_by_journal = get_monthly_analysis_from_snapshot(final_list_for_analysis, start_date_str=START_DATE_FILTER)
+        else:
+            monthly_by_journal = get_monthly_analysis(corpus, start_date_str=START_DATE_FILTER)
         
-        if image_bytes:
+        if monthly_by_journal is not None:
+            monthly_counts = monthly_by_journal.sum(axis=1)
+            chart_title = f'Nombre de dépôts par mois (Revues Sélectionnées, Depuis {START_DATE_FILTER})'
+
             st.subheader("Nombre de Dépôts par Mois")
-            st.image(image_bytes, caption=f'Historique des dépôts par mois depuis {START_DATE_FILTER}')
+            st.vega_lite_chart(
+                get_monthly_chart(monthly_by_journal if monthly_per_journal else monthly_counts, START_DATE_FILTER),
+                use_container_width=True,
+            )
+            st.caption(f"Historique des dépôts par mois depuis {START_DATE_FILTER} (molette pour zoomer, clic sur la légende pour isoler une revue).")
 
+            # L'image PNG n'est rendue que si l'utilisateur la télécharge
+            st.download_button(
+                label="Télécharger le graphique (PNG)",
+                data=lambda: monthly_png(monthly_counts, chart_title).getvalue(),
+                file_name='depots_mensuels_douteux_HAL_FILTRE.png',
+                mime='image/png',
+                on_click='ignore',
+            )
+
+            df_monthly = monthly_counts.to_frame(name='Nb Dépôts')
             st.subheader("Données Mensuelles Brutes")
             st.dataframe(df_monthly, use_container_width=True)
 
@@ -336,37 +859,10 @@ def app():
         # --- 5. Liste des Publications (Détail) ---
         st.header("📄 Liste des publications concernées")
         
-        data_for_df = []
-        for doc in docs:
-            names = doc.get('contributorFullName_s', ['Auteurs non disponibles'])
-            
-            if isinstance(names, str):
-                names = [names]
-            elif names is None:
-                names = ['Auteurs non disponibles']
-                
-            data_for_df.append({
-                'Titre': doc.get('title_s', ['(Titre non disponible)'])[0],
-                'HAL ID': doc.get('halId_s', 'N/A'),
-                'Revues': doc.get('journal', 'N/A'),
-                'Contributeurs': ', '.join(names), 
-                'Date Soumission': doc.get('submittedDate_s', 'N/A'),
-                'Lien HAL': f"https://hal.science/{doc.get('halId_s')}" if doc.get('halId_s') else 'N/A'
-            })
-            
-        df_publications = pd.DataFrame(data_for_df)
-
-        st.dataframe(df_publications, use_container_width=True, 
-                     column_config={"Lien HAL": st.column_config.LinkColumn("Lien HAL")})
-        
-        csv_pub = df_publications.to_csv(index=False).encode('utf-8')
-        st.download_button(
-            label="Télécharger la Liste des Publications (CSV)",
-            data=csv_pub,
-            file_name=f'publications_douteuses_HAL_FILTRE.csv',
-            mime='text/csv',
-        )
+        show_publications(final_list_for_analysis)
 
+        st.markdown("---")
+        show_diagnostics(metrics)
 
 if __name__ == '__main__':
     app()
\ No newline at end of file
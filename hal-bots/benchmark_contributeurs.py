@@ -0,0 +1,102 @@
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from hal_analysis import contributor_pairs, contributors_by_columns, contributors_by_loop, contributors_from_pairs
+from hal_client import JOURNAL_LIST
+from hal_corpus import Corpus, docs_nbytes
+
+# =========================================================
+# ⏱️ BANC D'ESSAI : DÉCOMPTE DES CONTRIBUTEURS
+# =========================================================
+# Compare la version en boucles Python et la version en colonnes
+# sur des corpus synthétiques de tailles croissantes. La version en colonnes
+# est mesurée de bout en bout (depuis les documents) et sur l'agrégation seule
+# (colonnes déjà construites, comme lorsqu'elles sont partagées entre analyses).
+# L'empreinte mémoire du corpus compact (hal_corpus.Corpus) est comparée à celle des dictionnaires.
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+def synthetic_docs(nb_docs, nb_contributors=None, seed=0):
+    """
+    Génère un corpus synthétique au format des réponses HAL : quelques gros déposants (bots)
+    et une longue traîne de contributeurs occasionnels, répartis sur les revues ciblées.
+    """
+    rng = random.Random(seed)
+    nb_contributors = nb_contributors or max(100, nb_docs // 20)
+    # Distribution de Zipf approchée : les premiers IDs déposent beaucoup plus que les suivants
+    weights = [1 / rank for rank in range(1, nb_contributors + 1)]
+    contributor_ids = rng.choices(range(1, nb_contributors + 1), weights=weights, k=nb_docs)
+
+    docs = []
+    for i, contributor_id in enumerate(contributor_ids):
+        docs.append({
+            'halId_s': f'hal-{i:08d}',
+            'journal': JOURNAL_LIST[rng.randrange(len(JOURNAL_LIST))],
+            'contributorId_i': [contributor_id],
+            'contributorFullName_s': [f'Contributeur {contributor_id}'],
+        })
+    return docs
+
+
+def time_call(func, docs, repeat):
+    """Meilleur temps (en secondes) sur `repeat` exécutions."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(docs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(sizes=DEFAULT_SIZES, repeat=3):
+    """Mesure les deux implémentations pour chaque taille de corpus et affiche le tableau comparatif."""
+    rows = []
+    for nb_docs in sizes:
+        print(f"Génération d'un corpus de {nb_docs} documents...")
+        docs = synthetic_docs(nb_docs)
+
+        loop_time, loop_df = time_call(contributors_by_loop, docs, repeat)
+        columns_time, columns_df = time_call(contributors_by_columns, docs, repeat)
+        pairs = contributor_pairs(docs)
+        aggregate_time, _ = time_call(contributors_from_pairs, pairs, repeat)
+        corpus = Corpus.from_docs(docs)
+        corpus_time, corpus_df = time_call(Corpus.contributors, corpus, repeat)
+
+        # Les deux versions doivent produire exactement le même tableau
+        pd.testing.assert_frame_equal(
+            loop_df.reset_index(drop=True), columns_df.reset_index(drop=True), check_dtype=False
+        )
+        pd.testing.assert_frame_equal(
+            loop_df.reset_index(drop=True), corpus_df.reset_index(drop=True), check_dtype=False
+        )
+
+        rows.append({
+            'Documents': nb_docs,
+            'Contributeurs': len(loop_df),
+            'Boucles (s)': round(loop_time, 3),
+            'Colonnes (s)': round(columns_time, 3),
+            'Agrégation seule (s)': round(aggregate_time, 3),
+            'Corpus (s)': round(corpus_time, 3),
+            'Accélération': round(loop_time / columns_time, 1) if columns_time else None,
+            'Accélération (agrégation)': round(loop_time / aggregate_time, 1) if aggregate_time else None,
+            'Mémoire dicts (Mo)': round(docs_nbytes(docs) / 1e6, 1),
+            'Mémoire corpus (Mo)': round(corpus.nbytes / 1e6, 1),
+        })
+
+    print()
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc d'essai du décompte des contributeurs (boucles vs colonnes).")
+    parser.add_argument('--tailles', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Tailles des corpus synthétiques (nombre de documents).")
+    parser.add_argument('--repetitions', type=int, default=3,
+                        help="Nombre d'exécutions par mesure (le meilleur temps est retenu).")
+    args = parser.parse_args()
+    main(sizes=args.tailles, repeat=args.repetitions)
@@ -0,0 +1,231 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from hal_mock import DEFAULT_LATENCY, MOCK_COLLECTIONS, MockCorpus, MockHalServer
+
+# =========================================================
+# ⏱️ BANC D'ESSAI DE BOUT EN BOUT (SERVEUR HAL SIMULÉ)
+# =========================================================
+# Chaque charge (fonctions de l'application ou script en lot) est exécutée dans un processus
+# séparé, dirigé vers le serveur HAL simulé (hal_mock) par HAL_API_URL, avec une base locale
+# neuve : la mesure couvre la récolte complète. Pour chaque taille de corpus sont relevés la
+# durée, le débit en documents par seconde, les requêtes servies (nombre, octets, percentiles de
+# durée) et la mémoire résidente maximale du processus. Les résultats sont ajoutés à un fichier
+# JSON lines et comparés à la mesure précédente de la même charge.
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+# Débit autorisé aux clients pendant les mesures (requêtes/s) : le limiteur ne doit pas masquer le code mesuré
+DEFAULT_BENCHMARK_RATE = 1000.0
+
+RESULTS_FILENAME = 'benchmark_hal.jsonl'
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Charges mesurées : commande lancée dans un dossier temporaire (None : étapes de l'application, voir run_app_stages)
+WORKLOADS = {
+    'app': None,
+    'detect-bot-facettes': ['detect-bot.py', '--facettes'],
+    'detect-bot-documents': ['detect-bot.py', '--rafales', '--titres'],
+    'parmois-facettes': ['depotssauvagesparmois.py', '--facettes'],
+    'parmois-documents': ['depotssauvagesparmois.py'],
+    'collection': ['depotssauvagesparcollection.py', '--collection', MOCK_COLLECTIONS[0], '--resume'],
+    'collections': ['depotssauvagesparcollection.py', '--collection', *MOCK_COLLECTIONS],
+}
+
+
+def run_app_stages(output_path):
+    """
+    Exécuté dans le processus mesuré : récolte avec get_hal_publications_global, puis analyses des
+    contributeurs et des dépôts mensuels sur le corpus en colonnes. Écrit la durée de chaque étape
+    et le nombre de documents dans output_path (JSON).
+    """
+    import app
+    from hal_client import JOURNAL_LIST
+    from hal_corpus import Corpus
+
+    timings = {}
+    start = time.perf_counter()
+    docs, _ = app.get_hal_publications_global(JOURNAL_LIST)
+    timings['get_hal_publications_global'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    corpus = Corpus.from_docs(docs)
+    app.get_contributors_analysis(corpus)
+    timings['get_contributors_analysis'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    app.get_monthly_analysis(corpus, '2018-01-01')
+    timings['get_monthly_analysis'] = time.perf_counter() - start
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({'documents': len(docs), 'timings': timings}, f)
+
+
+def peak_rss_mb(rusage):
+    """Mémoire résidente maximale d'un processus terminé, en Mo (ru_maxrss : Ko sous Linux, octets sous macOS)."""
+    return round(rusage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_measured(command, env, workdir):
+    """
+    Lance une commande et attend sa fin. Renvoie (code de retour, durée en secondes, RSS maximale en Mo ou None).
+    La sortie est écrite dans workdir/sortie.log.
+    """
+    with open(os.path.join(workdir, 'sortie.log'), 'w', encoding='utf-8') as log:
+        start = time.perf_counter()
+        process = subprocess.Popen(command, cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+        if hasattr(os, 'wait4'):
+            _, status, rusage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            rss = peak_rss_mb(rusage)
+        else:
+            process.wait()
+            rss = None
+        return process.returncode, time.perf_counter() - start, rss
+
+
+def log_tail(workdir, lines=15):
+    """Dernières lignes de la sortie d'une charge (pour diagnostiquer un échec)."""
+    with open(os.path.join(workdir, 'sortie.log'), encoding='utf-8', errors='replace') as f:
+        return ''.join(f.readlines()[-lines:])
+
+
+def measure_workload(name, server, nb_docs, rate):
+    """
+    Mesure une charge contre le serveur simulé, dans un dossier temporaire avec une base locale neuve.
+    Renvoie une ligne de résultats par étape mesurée.
+    """
+    server.reset_stats()
+    with tempfile.TemporaryDirectory(prefix='benchmark_hal_') as workdir:
+        env = dict(os.environ, HAL_API_URL=server.url, HAL_STORE_PATH=os.path.join(workdir, 'hal_corpus.sqlite'),
+                   HAL_REQUESTS_PER_SECOND=str(rate), PYTHONPATH=HERE)
+        output_path = os.path.join(workdir, 'etapes.json')
+        if WORKLOADS[name] is None:
+            command = [sys.executable, os.path.join(HERE, 'benchmark_hal.py'), '--etapes-app', output_path]
+        else:
+            command = [sys.executable, os.path.join(HERE, WORKLOADS[name][0]), *WORKLOADS[name][1:]]
+        returncode, duration, rss = run_measured(command, env, workdir)
+        status = 'ok' if returncode == 0 else f'échec ({returncode})'
+        if returncode != 0:
+            print(log_tail(workdir))
+        stages = {name: duration}
+        if WORKLOADS[name] is None and returncode == 0:
+            with open(output_path, encoding='utf-8') as f:
+                stages = {f'app:{stage}': seconds for stage, seconds in json.load(f)['timings'].items()}
+
+    stats = server.stats()
+    rows = []
+    for i, (stage, seconds) in enumerate(stages.items()):
+        # Les requêtes sont toutes attribuées à la première étape (la récolte)
+        served = stats if i == 0 else {'requests': 0, 'bytes': 0, 'p50': None, 'p95': None, 'p99': None}
+        rows.append({
+            'Charge': stage,
+            'Documents': nb_docs,
+            'Durée (s)': round(seconds, 3),
+            'Débit (docs/s)': round(nb_docs / seconds) if seconds else None,
+            'Requêtes': served['requests'],
+            'Octets': served['bytes'],
+            'Latence p50 (ms)': served['p50'],
+            'Latence p95 (ms)': served['p95'],
+            'Latence p99 (ms)': served['p99'],
+            'RSS max (Mo)': rss,
+            'Statut': status,
+        })
+    return rows
+
+
+def git_revision():
+    """Révision courante du dépôt (vide hors d'un dépôt git)."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def load_previous(results_path):
+    """Mesures enregistrées lors des exécutions précédentes (tableau vide si aucune)."""
+    if not os.path.exists(results_path):
+        return pd.DataFrame()
+    with open(results_path, encoding='utf-8') as f:
+        return pd.DataFrame([json.loads(line) for line in f if line.strip()])
+
+
+def compare_with_previous(results, previous):
+    """Ajoute l'écart de durée (%) avec la dernière mesure de la même charge, taille et latence."""
+    if previous.empty:
+        results['Écart (%)'] = None
+        return results
+    key = ['Charge', 'Documents', 'Latence (ms)']
+    last = previous.drop_duplicates(key, keep='last').set_index(key)['Durée (s)']
+    before = pd.Series([last.get(tuple(row)) for row in results[key].itertuples(index=False)], index=results.index,
+                       dtype=float)
+    results['Écart (%)'] = ((results['Durée (s)'] / before - 1) * 100).round(1)
+    return results
+
+
+def main(sizes=DEFAULT_SIZES, workloads=None, latency=DEFAULT_LATENCY, rate=DEFAULT_BENCHMARK_RATE,
+         results_path=RESULTS_FILENAME, corpus_path=None):
+    """
+    Mesure chaque charge pour chaque taille de corpus synthétique (ou une fois sur un corpus enregistré,
+    fichier JSON de documents HAL), affiche le tableau et l'ajoute à results_path.
+    """
+    workloads = workloads or list(WORKLOADS)
+    if corpus_path:
+        with open(corpus_path, encoding='utf-8') as f:
+            corpora = [MockCorpus.from_docs(json.load(f))]
+    else:
+        corpora = (MockCorpus.synthetic(nb_docs) for nb_docs in sizes)
+
+    run_at = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    revision = git_revision()
+    rows = []
+    for corpus in corpora:
+        print(f"Corpus de {len(corpus)} documents, latence simulée de {latency * 1000:.0f} ms...")
+        with MockHalServer(corpus, latency=latency) as server:
+            for name in workloads:
+                print(f"  {name}...")
+                for row in measure_workload(name, server, len(corpus), rate):
+                    rows.append({'Date': run_at, 'Révision': revision, 'Latence (ms)': round(latency * 1000), **row})
+
+    results = compare_with_previous(pd.DataFrame(rows), load_previous(results_path))
+    print()
+    print(results.drop(columns=['Date', 'Révision']).to_string(index=False))
+
+    with open(results_path, 'a', encoding='utf-8') as f:
+        for row in results.drop(columns=['Écart (%)']).to_dict(orient='records'):
+            f.write(json.dumps(row, ensure_ascii=False) + '\n')
+    print(f"\nRésultats ajoutés à '{results_path}'.")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc d'essai hors ligne contre un serveur HAL simulé.")
+    parser.add_argument('--tailles', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Tailles des corpus synthétiques (nombre de documents, jusqu'à 1000000).")
+    parser.add_argument('--charges', nargs='+', choices=list(WORKLOADS), metavar='CHARGE',
+                        help=f"Charges mesurées parmi : {', '.join(WORKLOADS)} (toutes par défaut).")
+    parser.add_argument('--latence', type=float, default=DEFAULT_LATENCY * 1000,
+                        help="Latence simulée ajoutée à chaque requête (ms).")
+    parser.add_argument('--debit', type=float, default=DEFAULT_BENCHMARK_RATE,
+                        help="Débit maximal autorisé aux clients pendant la mesure (requêtes/s).")
+    parser.add_argument('--resultats', default=RESULTS_FILENAME,
+                        help="Fichier JSON lines auquel les mesures sont ajoutées.")
+    parser.add_argument('--corpus', metavar='FICHIER',
+                        help="Servir un corpus enregistré (liste JSON de documents HAL) au lieu des corpus synthétiques.")
+    parser.add_argument('--etapes-app', metavar='FICHIER', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.etapes_app:
+        run_app_stages(args.etapes_app)
+    else:
+        main(sizes=args.tailles, workloads=args.charges, latency=args.latence / 1000, rate=args.debit,
+             results_path=args.resultats, corpus_path=args.corpus)
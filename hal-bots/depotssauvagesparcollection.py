@@ -1,159 +1,110 @@
-# =========================================================
-# 📝 ÉTAPE 1 : INSTALLATION DES BIBLIOTHÈQUES
-# =========================================================
-# Cette ligne installe la bibliothèque 'requests' nécessaire.
-# Elle est exécutée au début, une seule fois.
-%pip install requests
+import argparse
+import requests
+from hal_batch import DEFAULT_AUDIT_DIR, DEFAULT_BATCH_WORKERS, REPORT_FILENAME, run_collection_audit
+from hal_client import API_ROOT, JOURNAL_LIST, TokenBucket, iter_journal_pages, plan_journal_filters
+from hal_journals import use_journal_index
+from hal_metrics import Metrics, configure_json_log, log_summary, use_metrics
+from hal_pipeline import TitleCollector
+from hal_snapshot import write_snapshot
+from hal_store import connect, load_docs, mark_harvested, plan_refresh, save_docs, utc_now
 
 # =========================================================
-# 📝 ÉTAPE 2 : CONFIGURATION (À MODIFIER PAR VOS SOINS)
+# 📝 CONFIGURATION PAR DÉFAUT
 # =========================================================
-# ➡️ Entrez le nom de votre collection HAL
-
-hal_collection = "MIP"
-
-# ➡️ Entrez la liste des revues que vous souhaitez interroger
-#    Chaque titre de revue doit être entre guillemets et séparé par une virgule.
-journal_list = [
-    "Advances in Research on Teaching",
-    "Archives of Current Research International",
-    "Asian Basic and Applied Research Journal",
-    "Asian Food Science Journal",
-    "Asian Journal of Advanced Research and Reports",
-    "Asian Journal of Advances in Agricultural Research",
-    "Asian Journal of Advances in Research",
-    "Asian Journal of Agricultural and Horticultural Research",
-    "Asian Journal of Agricultural Extension, Economics and Sociology",
-    "Asian Journal of Arts, Humanities and Social Studies",
-    "Asian Journal of Biochemistry, Genetics and Molecular Biology",
-    "Asian Journal of Biology",
-    "Asian Journal of Cardiology Research",
-    "Asian Journal of Case Reports in Medicine and Health",
-    "Asian journal of case reports in surgery",
-    "Asian Journal of Chemical Sciences",
-    "Asian Journal of Current Research",
-    "Asian Journal of Dental Sciences",
-    "Asian Journal of Economics, Business and Accounting",
-    "Asian Journal of Economics, Finance and Management",
-    "Asian Journal of Education and Social Studies",
-    "Asian Journal of Fisheries and Aquatic Research",
-    "Asian Journal of Food Research and Nutrition",
-    "Asian Journal of Language, Literature and Culture Studies",
-    "Asian Journal of Medicine and Health",
-    "Asian Journal of Microbiology, Biotechnology and Environmental Sciences",
-    "Asian Journal of Orthopaedic Research",
-    "Asian Journal of Pediatric Research",
-    "Asian Journal of Plant and Soil Sciences",
-    "Asian Journal of Research and Reports in Endocrinology",
-    "Asian Journal of Research and Reviews in Physics",
-    "Asian Journal of Research in Agriculture and Forestry",
-    "Asian Journal of Research in Biochemistry",
-    "Asian Journal of Research in Botany",
-    "Asian Journal of Research in Computer Science",
-    "Asian Journal of Research in Crop Science",
-    "Asian Journal of Research in Dermatological Science",
-    "Asian Journal of Research in Infectious Diseases",
-    "Asian Journal of Research in Medicine and Medical Science",
-    "Asian Journal of Research in Nephrology",
-    "Asian Journal of Research in Nursing and Health",
-    "Asian Journal of Research in Surgery",
-    "Asian Journal of Research in Zoology",
-    "Asian Journal of Sociological Research",
-    "Asian Journal of Soil Science and Plant Nutrition",
-    "Asian Research Journal of Agriculture",
-    "Asian Research Journal of Arts & Social Sciences",
-    "Asian Research Journal of Mathematics",
-    "Cardiology and Angiology: An International Journal",
-    "Chemical Science International Journal",
-    "Current Journal of Applied Science and Technology",
-    "European Journal of Nutrition and Food Safety",
-    "International Journal of Advances in Nephrology Research",
-    "International Journal of Biochemistry Research & Review",
-    "International Journal of Environment and Climate Change",
-    "International Journal of Hematology-Oncology and Stem Cell Research",
-    "International Journal of Medical and Pharmaceutical Case Reports",
-    "International Journal of Pathogen Research",
-    "International Journal of Plant & Soil Science",
-    "international journal of research and reports in dentistry",
-    "International Journal of Research and Reports in Hematology",
-    "International Neuropsychiatric Disease Journal",
-    "International Research Journal of Gastroenterology and Hepatology",
-    "International Research Journal of Oncology",
-    "International Research Journal of Pure and Applied Chemistry",
-    "Journal of Advances in Biology & Biotechnology",
-    "Journal of Advances in Food Science & Technology",
-    "Journal of Advances in Mathematics and Computer Science ",
-    "Journal of Advances in Medicine and Medical Research",
-    "Journal of Advances in Microbiology",
-    "Journal of Agriculture and Ecology Research International",
-    "Journal of Applied Chemical Science International",
-    "Journal of Applied Life Sciences International",
-    "Journal of Biochemistry International",
-    "Journal of Biology and Nature",
-    "Journal of Case Reports in Medical Science",
-    "Journal of Complementary and Alternative Medical Research",
-    "Journal of Economics and Trade",
-    "Journal of Economics, Management and Trade",
-    "Journal of Education, Society and Behavioural Science",
-    "Journal of Engineering Research and Reports",
-    "Journal of Experimental Agriculture International",
-    "Journal of Geography, Environment and Earth Science International",
-    "Journal of Global Ecology and Environment",
-    "Journal of Materials Science Research and Reviews",
-    "Journal of Pharmaceutical Research International",
-    "Journal of Scientific Research and Reports",
-    "Ophthalmology Research: An International Journal",
-    "Physical Science International Journal",
-    "Plant Cell Biotechnology and Molecular Biology",
-    "South Asian Journal of Research in Microbiology",
-    "South Asian Journal of Social Studies and Economics",
-    "UTTAR PRADESH JOURNAL OF ZOOLOGY"
-]
+
+# Collection HAL interrogée par défaut (modifiable avec --collection)
+DEFAULT_COLLECTION = "MIP"
+
+# Champs HAL récupérés pour chaque publication
+COLLECTION_FIELDS = 'halId_s,title_s,contributorFullName_s,submittedDate_s'
 
 # =========================================================
-# ⚙️ ÉTAPE 3 : EXÉCUTION DU SCRIPT (NE PAS MODIFIER)
+# ⚙️ RECHERCHE DES PUBLICATIONS D'UNE COLLECTION
 # =========================================================
-# Le code des fonctions est placé ici, pour qu'il soit défini avant d'être appelé.
-import requests
-import time
 
-def get_hal_publications(collection, journals):
+def collection_url(collection):
+    """Point d'entrée de l'instance de collection de l'API de recherche HAL."""
+    return f"{API_ROOT}/search/{collection}"
+
+def plan_collection_scans(jobs):
+    """
+    Fusionne les tâches de plan_refresh en au plus deux parcours de la collection :
+    les revues à synchroniser depuis le plus ancien de leurs points de reprise, puis les revues
+    à récolter en entier. Renvoie une liste de couples (revues, since).
+    """
+    incremental = [title for chunk, since in jobs if since for title in chunk]
+    full = [title for chunk, since in jobs if not since for title in chunk]
+    scans = []
+    if incremental:
+        scans.append((incremental, min(since for _, since in jobs if since)))
+    if full:
+        scans.append((full, None))
+    return scans
+
+def get_hal_publications(collection, journals, single_query=True):
     """
     Interroge l'API HAL pour trouver les publications d'une collection
     spécifique pour une liste de revues, en utilisant le point d'entrée
     de l'instance de collection pour une meilleure fiabilité.
+    Par défaut (single_query), la collection est parcourue en une requête paginée *:* dont les revues
+    forment un filtre fq (découpé seulement s'il devient trop long) ; sinon les revues sont
+    regroupées en requêtes OR. Les documents sont rattachés à leur revue grâce à journalId_i et journalTitle_s.
+    Les revues déjà récoltées pour cette collection sont relues depuis la base locale,
+    et celles dont la récolte a expiré ne sont interrogées que depuis leur point de reprise.
+    Renvoie {revue: [documents]}.
     """
-    base_url = f"https://api.archives-ouvertes.fr/search/{collection}"
+    base_url = collection_url(collection)
+    fields = COLLECTION_FIELDS
     results = {}
 
     print(f"Lancement de la recherche de publications dans la collection '{collection}'...")
 
-    for journal_title in journals:
-        print(f"\nRecherche pour la revue : '{journal_title}'...")
+    conn = connect()
+    limiter = TokenBucket()
+    # Les revues résolues en identifiants HAL sont interrogées par un filtre exact sur journalId_i
+    journal_ids = use_journal_index(conn, journals, limiter=limiter)
+    print(f"{sum(1 for ids in journal_ids.values() if ids)}/{len(journal_ids)} revue(s) interrogée(s) par identifiant HAL.")
+
+    stored, jobs = plan_refresh(conn, journals, fields, scope=collection)
+    for doc in load_docs(conn, list(stored), scope=collection):
+        results.setdefault(doc['journal'], []).append(doc)
+    if stored:
+        print(f"{len(stored)} revue(s) relue(s) depuis la base locale.")
+
+    if single_query:
+        jobs = [(chunk, since) for titles, since in plan_collection_scans(jobs) for chunk in plan_journal_filters(titles)]
+
+    watermark = utc_now()
 
-        query = f'journalTitle_s:("{journal_title}")'
-        params = {
-            'q': query,
-            'rows': 100,
-            'fl': 'halId_s,title_s,contributorFullName_s,submittedDate_s'
-        }
+    for i, (chunk, since) in enumerate(jobs):
+        mode = f"mise à jour depuis {since}" if since else "récolte complète"
+        print(f"\nRecherche pour un groupe de {len(chunk)} revue(s) ({i+1}/{len(jobs)}, {mode})...")
 
         try:
-            response = requests.get(base_url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            docs = data.get('response', {}).get('docs', [])
-
-            if docs:
-                results[journal_title] = docs
-                print(f"  -> ✅ {len(docs)} publication(s) trouvée(s).")
-            else:
-                print(f"  -> ❌ Aucune publication trouvée pour cette revue dans la collection.")
+            for docs, num_found in iter_journal_pages(chunk, fields, base_url=base_url, limiter=limiter, since=since,
+                                                      as_filter=single_query):
+                save_docs(conn, docs, scope=collection)
+                if not since:
+                    for doc in docs:
+                        results.setdefault(doc['journal'], []).append(doc)
         except requests.exceptions.RequestException as e:
-            print(f"Erreur lors de la requête pour '{journal_title}': {e}")
-
-        time.sleep(0.5)
+            print(f"Erreur lors de la requête pour le groupe ({', '.join(chunk)}): {e}")
+        else:
+            # Le delta est fusionné dans la base : on relit les revues mises à jour en entier
+            if since:
+                for doc in load_docs(conn, chunk, scope=collection):
+                    results.setdefault(doc['journal'], []).append(doc)
+            for journal_title in chunk:
+                mark_harvested(conn, journal_title, fields, len(results.get(journal_title, [])), scope=collection,
+                               watermark=watermark)
+
+        for journal_title in chunk:
+            if journal_title in results:
+                print(f"  -> ✅ '{journal_title}' : {len(results[journal_title])} publication(s) trouvée(s).")
+            else:
+                print(f"  -> ❌ Aucune publication trouvée pour '{journal_title}' dans la collection.")
 
+    conn.close()
     return results
 
 def display_results(publications):
@@ -184,8 +135,105 @@ def display_results(publications):
             print(f"     Lien HAL : {uri}")
             print("-" * 70)
 
-# Exécution du script principal
-extracted_publications = get_hal_publications(hal_collection, journal_list)
-display_results(extracted_publications)
-
-print("\nFin de l'exécution.")
\ No newline at end of file
+def save_title_clusters(publications, output_filename):
+    """
+    Cherche les groupes de titres quasi identiques parmi les publications trouvées (voir hal_duplicates)
+    et les écrit dans un CSV. Renvoie le tableau des groupes.
+    """
+    title_collector = TitleCollector()
+    for docs in publications.values():
+        title_collector.update(docs)
+    clusters = title_collector.clusters()
+    clusters.to_csv(output_filename, index=False, encoding='utf-8')
+    return clusters
+
+def read_journal_file(path):
+    """Lit une liste de revues dans un fichier texte (un titre par ligne, lignes vides ignorées)."""
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+def read_collection_file(path):
+    """Lit une liste de codes de collections dans un fichier texte (un code par ligne, lignes vides ignorées)."""
+    return read_journal_file(path)
+
+def main_batch(collections, journals=None, workers=DEFAULT_BATCH_WORKERS, output_dir=DEFAULT_AUDIT_DIR):
+    """
+    Audite plusieurs collections en parallèle (voir hal_batch.run_collection_audit) : les collections
+    qui se recoupent partagent les documents récoltés. Écrit un dossier par collection et un rapport consolidé.
+    """
+    journals = journals or JOURNAL_LIST
+    print(f"Audit de {len(collections)} collection(s) avec {workers} processus...")
+    report = run_collection_audit(collections, journals, workers=workers, output_dir=output_dir)
+    print(report.to_string(index=False))
+    print(f"\nRapport consolidé écrit dans '{output_dir}/{REPORT_FILENAME}', résultats détaillés dans '{output_dir}/<collection>/'.")
+    return report
+
+def main(collection=DEFAULT_COLLECTION, journals=None, single_query=True, snapshot_dir=None, titles=True, details=True):
+    """
+    Script principal : publications d'une collection HAL dans une liste de revues
+    (par défaut la liste partagée hal_client.JOURNAL_LIST). Avec snapshot_dir, écrit aussi un instantané
+    Parquet ; avec titles, les groupes de titres quasi identiques dans titres_quasi_identiques_<collection>.csv.
+    Renvoie {revue: [documents]}.
+    """
+    journals = journals or JOURNAL_LIST
+    extracted_publications = get_hal_publications(collection, journals, single_query=single_query)
+    if details:
+        display_results(extracted_publications)
+    print(f"\n{sum(len(docs) for docs in extracted_publications.values())} publication(s) trouvée(s) "
+          f"dans {len(extracted_publications)} revue(s).")
+
+    if snapshot_dir:
+        try:
+            nb_rows = write_snapshot([doc for docs in extracted_publications.values() for doc in docs], snapshot_dir)
+            print(f"\nInstantané Parquet de {nb_rows} publication(s) écrit dans '{snapshot_dir}'.")
+        except FileExistsError as e:
+            print(f"\nInstantané non écrit : {e}")
+
+    if titles:
+        titles_filename = f"titres_quasi_identiques_{collection}.csv"
+        clusters = save_title_clusters(extracted_publications, titles_filename)
+        print(f"\n{clusters['Groupe'].nunique()} groupe(s) de titres quasi identiques ({len(clusters)} publication(s)) "
+              f"écrit(s) dans '{titles_filename}'.")
+
+    print("\nFin de l'exécution.")
+    return extracted_publications
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publications d'une collection HAL dans une liste de revues.")
+    parser.add_argument('--collection', nargs='+', default=[DEFAULT_COLLECTION],
+                        help=f"Code(s) des collections HAL interrogées (par défaut {DEFAULT_COLLECTION}) ; "
+                             "plusieurs codes lancent un audit en parallèle.")
+    parser.add_argument('--collections', metavar='FICHIER',
+                        help="Fichier texte des collections à auditer en parallèle (un code par ligne).")
+    parser.add_argument('--processus', type=int, default=DEFAULT_BATCH_WORKERS,
+                        help="Nombre de processus de l'audit de plusieurs collections.")
+    parser.add_argument('--dossier', default=DEFAULT_AUDIT_DIR,
+                        help="Dossier des résultats de l'audit de plusieurs collections.")
+    parser.add_argument('--revues', metavar='FICHIER',
+                        help="Fichier texte des revues à interroger (un titre par ligne) au lieu de la liste partagée.")
+    parser.add_argument('--requetes-groupees', action='store_true',
+                        help="Interroger les revues par requêtes OR groupées plutôt qu'en un parcours filtré de la collection.")
+    parser.add_argument('--snapshot', metavar='DOSSIER',
+                        help="Écrire aussi les publications trouvées dans un instantané Parquet.")
+    parser.add_argument('--sans-titres', action='store_true',
+                        help="Ne pas chercher les groupes de titres quasi identiques.")
+    parser.add_argument('--resume', action='store_true',
+                        help="N'afficher que le nombre de publications par revue, sans le détail de chaque publication.")
+    parser.add_argument('--log-json', nargs='?', const='-', metavar='FICHIER',
+                        help="Écrire chaque mesure (requêtes HAL, étapes) et le bilan en JSON, une par ligne, "
+                             "dans FICHIER (par défaut sur la sortie d'erreur).")
+    args = parser.parse_args()
+    if args.log_json:
+        configure_json_log(args.log_json)
+        use_metrics(Metrics())
+    journals = read_journal_file(args.revues) if args.revues else None
+    collections = read_collection_file(args.collections) if args.collections else args.collection
+    try:
+        if len(collections) > 1:
+            main_batch(collections, journals=journals, workers=args.processus, output_dir=args.dossier)
+        else:
+            main(collection=collections[0], journals=journals, single_query=not args.requetes_groupees,
+                 snapshot_dir=args.snapshot, titles=not args.sans_titres, details=not args.resume)
+    finally:
+        if args.log_json:
+            log_summary()
@@ -1,173 +1,182 @@
+import argparse
 import requests
 import pandas as pd
-from collections import defaultdict
-import time
-import matplotlib.pyplot as plt
+from hal_charts import monthly_png, save_monthly_chart_html
+from hal_client import JOURNAL_LIST, TokenBucket, get_monthly_counts
+from hal_discovery import DEFAULT_DISCOVERED_JOURNALS, DEFAULT_DISCOVERY_DAYS, discover_journals
+from hal_journals import resolve_journals
+from hal_metrics import Metrics, configure_json_log, log_summary, use_metrics
+from hal_pipeline import MonthlyCounter, iter_harvest_pages, run_pipeline
+from hal_snapshot import SnapshotWriter, snapshot_monthly_counts
+from hal_store import connect
 
-def get_deposit_dates_from_hal(journal_title):
+# Champs HAL nécessaires au décompte mensuel (halId_s sert de clé dans la base locale)
+DATE_FIELDS = 'halId_s,submittedDate_s'
+
+# Décompte mensuel (écrit en fin de récolte, et en cours de route avec --flush)
+COUNTS_FILENAME = 'depots_par_mois.csv'
+
+def save_monthly_counts(monthly_counts, output_filename=COUNTS_FILENAME):
+    """Écrit le nombre de dépôts par mois dans un CSV (une ligne par mois)."""
+    monthly_counts.rename_axis('year_month').to_frame(name='count').to_csv(output_filename, encoding='utf-8')
+
+def get_monthly_counts_from_documents(journals, incremental=True, snapshot_dir=None, flush_every=None,
+                                      output_filename=COUNTS_FILENAME):
     """
-    Récupère les dates de soumission pour une revue donnée de l'API HAL.
+    Télécharge la date de soumission de chaque document et compte les dépôts par mois, en flux :
+    chaque page de documents met à jour le décompte mensuel puis est abandonnée.
+    Les revues récoltées récemment sont relues depuis la base locale ; les autres y sont enregistrées.
+    Avec incremental, une revue déjà récoltée n'est interrogée que depuis son point de reprise.
+    Avec snapshot_dir, les documents comptés sont aussi écrits dans un instantané Parquet ;
+    avec flush_every, le décompte partiel est réécrit dans output_filename toutes les flush_every pages.
     """
-    base_url = "https://api.archives-ouvertes.fr/search"
-    params = {
-        'q': f'journalTitle_s:"{journal_title}"',
-        'rows': 10000,
-        'fl': 'submittedDate_s'
-    }
-    
+    counter = MonthlyCounter()
+    consumers = [counter.update]
+    snapshot = SnapshotWriter(snapshot_dir) if snapshot_dir else None
+    if snapshot:
+        consumers.append(snapshot.write)
+
+    # Débit limité par un seau de jetons plutôt qu'une pause fixe après chaque requête
+    conn = connect()
+    pages = iter_harvest_pages(conn, journals, DATE_FIELDS, incremental=incremental, limiter=TokenBucket())
+
+    def flush():
+        save_monthly_counts(counter.to_series(), output_filename)
+        print(f"  (décompte partiel de {len(counter)} dépôt(s) écrit dans '{output_filename}')")
+
+    try:
+        nb_docs = run_pipeline(pages, consumers, flush_every=flush_every, flush=flush)
+    except BaseException:
+        # Instantané incomplet abandonné : le précédent reste en place
+        if snapshot:
+            snapshot.discard()
+        raise
+    if snapshot:
+        snapshot.close()
+
+    conn.close()
+    print(f"{nb_docs} document(s) traité(s), {len(counter)} date(s) de dépôt comptée(s).")
+    if snapshot:
+        print(f"Instantané Parquet de {snapshot.rows} document(s) écrit dans '{snapshot_dir}'.")
+    return counter.to_series()
+
+def get_monthly_counts_from_facets(journals, per_journal=False):
+    """
+    Demande directement à HAL le nombre de dépôts par mois (facet.range, rows=0).
+    Renvoie la série toutes revues confondues et, avec per_journal, le tableau mois x revue.
+    """
+    print("Comptage des dépôts par mois côté serveur (facettes HAL)...")
+    limiter = TokenBucket()
+
     try:
-        response = requests.get(base_url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        # Retourne une liste de dates de soumission
-        return [doc.get('submittedDate_s') for doc in data.get('response', {}).get('docs', [])]
+        if per_journal:
+            counts_by_journal = get_monthly_counts(journals, per_journal=True, limiter=limiter)
+            df_journals = pd.DataFrame(counts_by_journal).fillna(0).astype(int).sort_index()
+            df_journals.index = pd.PeriodIndex(df_journals.index, freq='M')
+            return df_journals.sum(axis=1), df_journals
+
+        counts = get_monthly_counts(journals, limiter=limiter)
     except requests.exceptions.RequestException as e:
-        print(f"Erreur lors de la requête pour '{journal_title}': {e}")
-        return []
+        print(f"Erreur lors du comptage mensuel des dépôts : {e}")
+        return pd.Series(dtype=int), None
+
+    monthly_counts = pd.Series(list(counts.values()), index=pd.PeriodIndex(list(counts.keys()), freq='M'), dtype=int)
+    return monthly_counts, None
 
-def main():
+def get_monthly_counts_from_snapshot(journals, snapshot_dir, per_journal=False):
+    """
+    Compte les dépôts par mois en relisant un instantané Parquet : seules les colonnes de partition
+    sont lues, sans interroger HAL. Renvoie la série toutes revues confondues et, avec per_journal,
+    le tableau mois x revue.
+    """
+    print(f"Lecture de l'instantané Parquet '{snapshot_dir}'...")
+    if per_journal:
+        df_journals = snapshot_monthly_counts(snapshot_dir, journals=journals, per_journal=True)
+        return df_journals.sum(axis=1), df_journals
+    return snapshot_monthly_counts(snapshot_dir, journals=journals), None
+
+def main(use_facets=False, per_journal=False, incremental=True, snapshot_dir=None, from_snapshot=None, flush_every=None,
+         png=False, discovery_days=None, nb_journals=DEFAULT_DISCOVERED_JOURNALS):
     """
     Script principal pour analyser et visualiser les dépôts par mois.
+    Avec discovery_days, les revues analysées sont les nb_journals revues suspectes découvertes
+    sur cette période (0 : tout HAL) au lieu de la liste fixe.
     """
-    # Votre liste de revues
-    journals = [
-        "Advances in Research on Teaching",
-        "Archives of Current Research International",
-        "Asian Basic and Applied Research Journal",
-        "Asian Food Science Journal",
-        "Asian Journal of Advanced Research and Reports",
-        "Asian Journal of Advances in Agricultural Research",
-        "Asian Journal of Advances in Research",
-        "Asian Journal of Agricultural and Horticultural Research",
-        "Asian Journal of Agricultural Extension, Economics and Sociology",
-        "Asian Journal of Arts, Humanities and Social Studies",
-        "Asian Journal of Biochemistry, Genetics and Molecular Biology",
-        "Asian Journal of Biology",
-        "Asian Journal of Cardiology Research",
-        "Asian Journal of Case Reports in Medicine and Health",
-        "Asian journal of case reports in surgery",
-        "Asian Journal of Chemical Sciences",
-        "Asian Journal of Current Research",
-        "Asian Journal of Dental Sciences",
-        "Asian Journal of Economics, Business and Accounting",
-        "Asian Journal of Economics, Finance and Management",
-        "Asian Journal of Education and Social Studies",
-        "Asian Journal of Fisheries and Aquatic Research",
-        "Asian Journal of Food Research and Nutrition",
-        "Asian Journal of Language, Literature and Culture Studies",
-        "Asian Journal of Medicine and Health",
-        "Asian Journal of Microbiology, Biotechnology and Environmental Sciences",
-        "Asian Journal of Orthopaedic Research",
-        "Asian Journal of Pediatric Research",
-        "Asian Journal of Plant and Soil Sciences",
-        "Asian Journal of Research and Reports in Endocrinology",
-        "Asian Journal of Research and Reviews in Physics",
-        "Asian Journal of Research in Agriculture and Forestry",
-        "Asian Journal of Research in Biochemistry",
-        "Asian Journal of Research in Botany",
-        "Asian Journal of Research in Computer Science",
-        "Asian Journal of Research in Crop Science",
-        "Asian Journal of Research in Dermatological Science",
-        "Asian Journal of Research in Infectious Diseases",
-        "Asian Journal of Research in Medicine and Medical Science",
-        "Asian Journal of Research in Nephrology",
-        "Asian Journal of Research in Nursing and Health",
-        "Asian Journal of Research in Surgery",
-        "Asian Journal of Research in Zoology",
-        "Asian Journal of Sociological Research",
-        "Asian Journal of Soil Science and Plant Nutrition",
-        "Asian Research Journal of Agriculture",
-        "Asian Research Journal of Arts & Social Sciences",
-        "Asian Research Journal of Mathematics",
-        "Cardiology and Angiology: An International Journal",
-        "Chemical Science International Journal",
-        "Current Journal of Applied Science and Technology",
-        "European Journal of Nutrition and Food Safety",
-        "International Journal of Advances in Nephrology Research",
-        "International Journal of Biochemistry Research & Review",
-        "International Journal of Environment and Climate Change",
-        "International Journal of Hematology-Oncology and Stem Cell Research",
-        "International Journal of Medical and Pharmaceutical Case Reports",
-        "International Journal of Pathogen Research",
-        "International Journal of Plant & Soil Science",
-        "international journal of research and reports in dentistry",
-        "International Journal of Research and Reports in Hematology",
-        "International Neuropsychiatric Disease Journal",
-        "International Research Journal of Gastroenterology and  Hepatology",
-        "International Research Journal of Oncology",
-        "International Research Journal of Pure and Applied Chemistry",
-        "Journal of Advances in Biology & Biotechnology",
-        "Journal of Advances in Food Science & Technology",
-        "Journal of Advances in Mathematics and Computer Science ",
-        "Journal of Advances in Medicine and Medical Research",
-        "Journal of Advances in Microbiology",
-        "Journal of Agriculture and Ecology Research International",
-        "Journal of Applied Chemical Science International",
-        "Journal of Applied Life Sciences International",
-        "Journal of Biochemistry International",
-        "Journal of Biology and Nature",
-        "Journal of Case Reports in Medical Science",
-        "Journal of Complementary and Alternative Medical Research",
-        "Journal of Economics and Trade",
-        "Journal of Economics, Management and Trade",
-        "Journal of Education, Society and Behavioural Science",
-        "Journal of Engineering Research and Reports",
-        "Journal of Experimental Agriculture International",
-        "Journal of Geography, Environment and Earth Science International",
-        "Journal of Global Ecology and Environment",
-        "Journal of Materials Science Research and Reviews",
-        "Journal of Pharmaceutical Research International",
-        "Journal of Scientific Research and Reports",
-        "Ophthalmology Research: An International Journal",
-        "Physical Science International Journal",
-        "Plant Cell Biotechnology and Molecular Biology",
-        "South Asian Journal of Research in Microbiology",
-        "South Asian Journal of Social Studies and Economics",
-        "UTTAR PRADESH JOURNAL OF ZOOLOGY"
-    ]
-
-    all_dates = []
-    
-    print("Début de l'extraction des dates de dépôt de l'API HAL...")
+    # Liste des revues ciblées, partagée avec l'application
+    journals = JOURNAL_LIST
+    if discovery_days is not None:
+        journals = discover_journals(discovery_days, nb_journals)
 
-    for i, journal in enumerate(journals):
-        print(f"  [{i+1}/{len(journals)}] Récupération des dates pour '{journal}'...")
-        dates = get_deposit_dates_from_hal(journal)
-        all_dates.extend(dates)
-        time.sleep(1) 
+    df_journals = None
+    if not from_snapshot:
+        resolve_journals(journals)
 
-    # Conversion en DataFrame et traitement des données
-    df = pd.DataFrame(all_dates, columns=['submittedDate'])
-    df.dropna(inplace=True)
-    
-    # Conversion en datetime et extraction du mois et de l'année
-    df['submittedDate'] = pd.to_datetime(df['submittedDate'])
-    df['year_month'] = df['submittedDate'].dt.to_period('M')
-    
-    # Comptage des dépôts par mois
-    monthly_counts = df['year_month'].value_counts().sort_index()
+    if from_snapshot:
+        monthly_counts, df_journals = get_monthly_counts_from_snapshot(journals, from_snapshot, per_journal=per_journal)
+    elif use_facets:
+        monthly_counts, df_journals = get_monthly_counts_from_facets(journals, per_journal=per_journal)
+    else:
+        monthly_counts = get_monthly_counts_from_documents(journals, incremental=incremental, snapshot_dir=snapshot_dir,
+                                                           flush_every=flush_every)
     
     if monthly_counts.empty:
         print("\n❌ Aucune donnée de dépôt n'a pu être extraite pour générer le graphique.")
         return
         
+    save_monthly_counts(monthly_counts, COUNTS_FILENAME)
+    print(f"\n✅ Dépôts mensuels sauvegardés dans '{COUNTS_FILENAME}'.")
+
+    if df_journals is not None:
+        output_csv = 'depots_par_mois_par_revue.csv'
+        df_journals.to_csv(output_csv, encoding='utf-8')
+        print(f"\n✅ Dépôts mensuels par revue sauvegardés dans '{output_csv}'.")
+
     print("\n✅ Données compilées. Création du graphique...")
 
-    # Visualisation des données
-    plt.figure(figsize=(15, 8))
-    monthly_counts.plot(kind='bar', color='skyblue')
-    plt.title('Nombre de dépôts par mois', fontsize=18, pad=20)
-    plt.xlabel('Mois et année', fontsize=14, labelpad=15)
-    plt.ylabel('Nombre de dépôts', fontsize=14, labelpad=15)
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    
-    # Sauvegarde du graphique en image
-    output_filename = 'depots_par_mois.png'
-    plt.savefig(output_filename)
-    print(f"\n✅ Graphique sauvegardé sous le nom '{output_filename}'.")
-    plt.show()
+    # Graphique interactif (zoom, détail par revue) dans une page HTML autonome
+    output_html = 'depots_par_mois.html'
+    save_monthly_chart_html(df_journals if df_journals is not None else monthly_counts, output_html)
+    print(f"\n✅ Graphique interactif sauvegardé sous le nom '{output_html}'.")
+
+    # Image PNG, rendue seulement sur demande
+    if png:
+        output_filename = 'depots_par_mois.png'
+        with open(output_filename, 'wb') as f:
+            f.write(monthly_png(monthly_counts).getvalue())
+        print(f"\n✅ Graphique sauvegardé sous le nom '{output_filename}'.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Analyse des dépôts HAL par mois pour une liste de revues.")
+    parser.add_argument('--facettes', action='store_true',
+                        help="Compter les dépôts mensuels côté serveur avec les facettes HAL au lieu de télécharger chaque date de dépôt.")
+    parser.add_argument('--par-revue', action='store_true',
+                        help="Avec --facettes ou --depuis-snapshot, compter aussi les dépôts mensuels de chaque revue (CSV et graphique).")
+    parser.add_argument('--complet', action='store_true',
+                        help="Sans --facettes, récolter de nouveau les revues expirées en entier plutôt que depuis leur point de reprise.")
+    parser.add_argument('--snapshot', metavar='DOSSIER',
+                        help="Sans --facettes, écrire aussi le corpus récolté dans un instantané Parquet.")
+    parser.add_argument('--depuis-snapshot', metavar='DOSSIER',
+                        help="Compter les dépôts mensuels depuis un instantané Parquet existant, sans interroger HAL.")
+    parser.add_argument('--flush', type=int, metavar='PAGES',
+                        help=f"Sans --facettes, réécrire le décompte partiel dans '{COUNTS_FILENAME}' toutes les PAGES pages.")
+    parser.add_argument('--png', action='store_true',
+                        help="Écrire aussi le graphique en image PNG (depots_par_mois.png).")
+    parser.add_argument('--decouverte', type=int, nargs='?', const=DEFAULT_DISCOVERY_DAYS, metavar='JOURS',
+                        help="Analyser les revues suspectes découvertes par facettes HAL sur les JOURS derniers jours "
+                             f"(par défaut {DEFAULT_DISCOVERY_DAYS}, 0 = tout HAL) au lieu de la liste fixe.")
+    parser.add_argument('--nb-revues', type=int, default=DEFAULT_DISCOVERED_JOURNALS,
+                        help="Avec --decouverte, nombre de revues les mieux classées à analyser.")
+    parser.add_argument('--log-json', nargs='?', const='-', metavar='FICHIER',
+                        help="Écrire chaque mesure (requêtes HAL, étapes) et le bilan en JSON, une par ligne, "
+                             "dans FICHIER (par défaut sur la sortie d'erreur).")
+    args = parser.parse_args()
+    if args.log_json:
+        configure_json_log(args.log_json)
+        use_metrics(Metrics())
+    try:
+        main(use_facets=args.facettes, per_journal=args.par_revue, incremental=not args.complet,
+             snapshot_dir=args.snapshot, from_snapshot=args.depuis_snapshot, flush_every=args.flush, png=args.png,
+             discovery_days=args.decouverte, nb_journals=args.nb_revues)
+    finally:
+        if args.log_json:
+            log_summary()
@@ -1,186 +1,254 @@
+import argparse
 import requests
 import pandas as pd
-from collections import defaultdict
-import time
+from hal_client import JOURNAL_LIST, TokenBucket, get_contributor_counts
+from hal_analysis import contributors_from_pairs
+from hal_bursts import DEFAULT_BURST_MIN_DEPOSITS, DEFAULT_BURST_WINDOW, detect_bursts, flagged_bursts
+from hal_discovery import DEFAULT_DISCOVERED_JOURNALS, DEFAULT_DISCOVERY_DAYS, discover_journals
+from hal_duplicates import near_duplicate_clusters
+from hal_journals import resolve_journals
+from hal_metrics import Metrics, configure_json_log, log_summary, use_metrics
+from hal_pipeline import (ContributorCounter, DepositTimesCollector, TitleCollector, iter_all_hal_pages, iter_harvest_pages,
+                          run_pipeline, top_contributors)
+from hal_snapshot import SnapshotWriter, snapshot_contributor_pairs, snapshot_deposit_times, snapshot_titles
+from hal_store import connect
+
+# Champs HAL nécessaires au décompte des contributeurs (halId_s sert de clé dans la base locale,
+# submittedDate_s au partitionnement mensuel de l'instantané Parquet)
+CONTRIBUTOR_FIELDS = 'halId_s,contributorFullName_s,contributorId_i,submittedDate_s'
+
+OUTPUT_FILENAME = 'contributeurs_hal.csv'
+BURSTS_FILENAME = 'rafales_hal.csv'
+TITLES_FILENAME = 'titres_quasi_identiques_hal.csv'
+
+def save_contributors(all_contributors, output_filename=OUTPUT_FILENAME, top=None):
+    """
+    Écrit le classement des contributeurs dans un CSV, du plus gros déposant au plus petit
+    (les top premiers seulement si top est donné). Renvoie le nombre de lignes écrites.
+    """
+    data_list = []
+    for contributor_id, details in top_contributors(all_contributors, top):
+        data_list.append({
+            'contributor_id': contributor_id,
+            'full_name': details.get('name', 'Unknown Contributor'), # Provide a default if name is somehow missing
+            'total_contributions': details['count'],
+            'journals_contributed_to': ', '.join(sorted(details['journals']))
+        })
+
+    df = pd.DataFrame(data_list, columns=['contributor_id', 'full_name', 'total_contributions', 'journals_contributed_to'])
+    df.to_csv(output_filename, index=False, encoding='utf-8')
+    return len(df)
 
-def get_contributors_from_hal(journal_title):
+def save_bursts(contributor_ids, times, all_contributors, output_filename=BURSTS_FILENAME,
+                window=DEFAULT_BURST_WINDOW, min_deposits=DEFAULT_BURST_MIN_DEPOSITS, max_median_gap=None):
+    """
+    Détecte les rafales de dépôts (voir hal_bursts.detect_bursts) et écrit les statistiques de
+    tous les contributeurs dans un CSV, les plus denses en premier. Renvoie le nombre de contributeurs signalés.
+    """
+    bursts = detect_bursts(contributor_ids, times, window=window, min_deposits=min_deposits,
+                           max_median_gap=max_median_gap)
+    bursts.insert(1, 'Nom Complet', [all_contributors.get(i, {}).get('name', 'N/A') for i in bursts['ID HAL Contributeur']])
+    bursts.to_csv(output_filename, index=False, encoding='utf-8')
+    return len(flagged_bursts(bursts))
+
+def get_contributors_from_documents(journals, incremental=True, snapshot_dir=None, flush_every=None,
+                                    output_filename=OUTPUT_FILENAME, top=None, times_collector=None, title_collector=None):
     """
-    Récupère la liste des contributeurs et leurs IDs pour une revue donnée de l'API HAL.
+    Télécharge les contributeurs de chaque document et compte les dépôts par contributeur, en flux :
+    chaque page de documents met à jour le décompte puis est abandonnée.
+    Les revues récoltées récemment sont relues depuis la base locale ; les autres y sont enregistrées.
+    Avec incremental, une revue déjà récoltée n'est interrogée que depuis son point de reprise.
+    Sans liste de revues (journals=None), tout HAL est parcouru sans passer par la base locale.
+    Avec snapshot_dir, les documents comptés sont aussi écrits dans un instantané Parquet ;
+    avec flush_every, le classement partiel est réécrit dans output_filename toutes les flush_every pages.
+    Avec times_collector (DepositTimesCollector), les dates de dépôt par contributeur sont aussi collectées ;
+    avec title_collector (TitleCollector), les titres sont aussi demandés à HAL et collectés.
     """
-    base_url = "https://api.archives-ouvertes.fr/search"
-    params = {
-        'q': f'journalTitle_s:"{journal_title}"',
-        'rows': 10000,
-        'fl': 'contributorFullName_s,contributorId_i'
+    counter = ContributorCounter()
+    consumers = [counter.update]
+    if times_collector is not None:
+        consumers.append(times_collector.update)
+    fields = CONTRIBUTOR_FIELDS
+    if title_collector is not None:
+        consumers.append(title_collector.update)
+        fields = f'{CONTRIBUTOR_FIELDS},title_s'
+    snapshot = SnapshotWriter(snapshot_dir) if snapshot_dir else None
+    if snapshot:
+        consumers.append(snapshot.write)
+
+    # Débit limité par un seau de jetons plutôt qu'une pause fixe après chaque requête
+    limiter = TokenBucket()
+    conn = None
+    if journals is None:
+        print("Parcours de tous les dépôts HAL...")
+        pages = iter_all_hal_pages(fields, limiter=limiter)
+    else:
+        conn = connect()
+        pages = iter_harvest_pages(conn, journals, fields, incremental=incremental, limiter=limiter)
+
+    def flush():
+        nb_rows = save_contributors(counter.contributors, output_filename, top=top)
+        print(f"  (classement partiel de {nb_rows} contributeur(s) écrit dans '{output_filename}')")
+
+    try:
+        nb_docs = run_pipeline(pages, consumers, flush_every=flush_every, flush=flush)
+    except BaseException:
+        # Instantané incomplet abandonné : le précédent reste en place
+        if snapshot:
+            snapshot.discard()
+        raise
+    if snapshot:
+        snapshot.close()
+
+    if conn is not None:
+        conn.close()
+    print(f"{nb_docs} document(s) traité(s), {len(counter)} contributeur(s) distinct(s).")
+    if snapshot:
+        print(f"Instantané Parquet de {snapshot.rows} document(s) écrit dans '{snapshot_dir}'.")
+    return counter.contributors
+
+def get_contributors_from_snapshot(journals, snapshot_dir):
+    """
+    Compte les dépôts par contributeur en relisant un instantané Parquet (colonnes des contributeurs
+    et de la revue uniquement), sans interroger HAL.
+    """
+    print(f"Lecture de l'instantané Parquet '{snapshot_dir}'...")
+    df = contributors_from_pairs(snapshot_contributor_pairs(snapshot_dir, journals=journals))
+    return {
+        row['ID HAL Contributeur']: {
+            'count': row['Nb Contributions'],
+            'name': row['Nom Complet'],
+            'journals': set(row['Revues Contribuées'].split(', ')),
+        }
+        for row in df.to_dict('records')
     }
 
+def get_contributors_from_facets(journals, limit=-1, mincount=1):
+    """
+    Demande directement à HAL le nombre de dépôts par contributeur (facettes pivot, rows=0),
+    avec les revues de chaque contributeur. Sans liste de revues, le classement porte sur tout HAL.
+    """
+    print("Comptage des dépôts par contributeur côté serveur (facettes HAL)...")
     try:
-        response = requests.get(base_url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        return data.get('response', {}).get('docs', [])
+        return get_contributor_counts(journals, limit=limit, mincount=mincount, with_journals=True, limiter=TokenBucket())
     except requests.exceptions.RequestException as e:
-        print(f"Erreur lors de la requête pour '{journal_title}': {e}")
-        return []
+        print(f"Erreur lors du comptage des contributeurs : {e}")
+        return {}
 
-def main():
+def main(use_facets=False, limit=-1, mincount=1, all_hal=False, incremental=True, snapshot_dir=None, from_snapshot=None,
+         flush_every=None, top=None, bursts=False, burst_window=DEFAULT_BURST_WINDOW,
+         burst_min_deposits=DEFAULT_BURST_MIN_DEPOSITS, burst_max_median_gap=None, titles=False, discovery_days=None,
+         nb_journals=DEFAULT_DISCOVERED_JOURNALS):
     """
     Script principal pour extraire et compiler les données des contributeurs.
+    Avec bursts, détecte aussi les rafales de dépôts ; avec titles, les groupes de titres quasi
+    identiques (documents ou instantané uniquement : les facettes ne renvoient ni dates ni titres).
+    Avec discovery_days, les revues analysées sont les nb_journals revues suspectes découvertes
+    sur cette période (0 : tout HAL) au lieu de la liste fixe.
     """
-    # Votre liste de revues
-    journals = [
-        "Advances in Research on Teaching",
-        "Archives of Current Research International",
-        "Asian Basic and Applied Research Journal",
-        "Asian Food Science Journal",
-        "Asian Journal of Advanced Research and Reports",
-        "Asian Journal of Advances in Agricultural Research",
-        "Asian Journal of Advances in Research",
-        "Asian Journal of Agricultural and Horticultural Research",
-        "Asian Journal of Agricultural Extension, Economics and Sociology",
-        "Asian Journal of Arts, Humanities and Social Studies",
-        "Asian Journal of Biochemistry, Genetics and Molecular Biology",
-        "Asian Journal of Biology",
-        "Asian Journal of Cardiology Research",
-        "Asian Journal of Case Reports in Medicine and Health",
-        "Asian journal of case reports in surgery",
-        "Asian Journal of Chemical Sciences",
-        "Asian Journal of Current Research",
-        "Asian Journal of Dental Sciences",
-        "Asian Journal of Economics, Business and Accounting",
-        "Asian Journal of Economics, Finance and Management",
-        "Asian Journal of Education and Social Studies",
-        "Asian Journal of Fisheries and Aquatic Research",
-        "Asian Journal of Food Research and Nutrition",
-        "Asian Journal of Language, Literature and Culture Studies",
-        "Asian Journal of Medicine and Health",
-        "Asian Journal of Microbiology, Biotechnology and Environmental Sciences",
-        "Asian Journal of Orthopaedic Research",
-        "Asian Journal of Pediatric Research",
-        "Asian Journal of Plant and Soil Sciences",
-        "Asian Journal of Research and Reports in Endocrinology",
-        "Asian Journal of Research and Reviews in Physics",
-        "Asian Journal of Research in Agriculture and Forestry",
-        "Asian Journal of Research in Biochemistry",
-        "Asian Journal of Research in Botany",
-        "Asian Journal of Research in Computer Science",
-        "Asian Journal of Research in Crop Science",
-        "Asian Journal of Research in Dermatological Science",
-        "Asian Journal of Research in Infectious Diseases",
-        "Asian Journal of Research in Medicine and Medical Science",
-        "Asian Journal of Research in Nephrology",
-        "Asian Journal of Research in Nursing and Health",
-        "Asian Journal of Research in Surgery",
-        "Asian Journal of Research in Zoology",
-        "Asian Journal of Sociological Research",
-        "Asian Journal of Soil Science and Plant Nutrition",
-        "Asian Research Journal of Agriculture",
-        "Asian Research Journal of Arts & Social Sciences",
-        "Asian Research Journal of Mathematics",
-        "Cardiology and Angiology: An International Journal",
-        "Chemical Science International Journal",
-        "Current Journal of Applied Science and Technology",
-        "European Journal of Nutrition and Food Safety",
-        "International Journal of Advances in Nephrology Research",
-        "International Journal of Biochemistry Research & Review",
-        "International Journal of Environment and Climate Change",
-        "International Journal of Hematology-Oncology and Stem Cell Research",
-        "International Journal of Medical and Pharmaceutical Case Reports",
-        "International Journal of Pathogen Research",
-        "International Journal of Plant & Soil Science",
-        "international journal of research and reports in dentistry",
-        "International Journal of Research and Reports in Hematology",
-        "International Neuropsychiatric Disease Journal",
-        "International Research Journal of Gastroenterology and  Hepatology",
-        "International Research Journal of Oncology",
-        "International Research Journal of Pure and Applied Chemistry",
-        "Journal of Advances in Biology & Biotechnology",
-        "Journal of Advances in Food Science & Technology",
-        "Journal of Advances in Mathematics and Computer Science ",
-        "Journal of Advances in Medicine and Medical Research",
-        "Journal of Advances in Microbiology",
-        "Journal of Agriculture and Ecology Research International",
-        "Journal of Applied Chemical Science International",
-        "Journal of Applied Life Sciences International",
-        "Journal of Biochemistry International",
-        "Journal of Biology and Nature",
-        "Journal of Case Reports in Medical Science",
-        "Journal of Complementary and Alternative Medical Research",
-        "Journal of Economics and Trade",
-        "Journal of Economics, Management and Trade",
-        "Journal of Education, Society and Behavioural Science",
-        "Journal of Engineering Research and Reports",
-        "Journal of Experimental Agriculture International",
-        "Journal of Geography, Environment and Earth Science International",
-        "Journal of Global Ecology and Environment",
-        "Journal of Materials Science Research and Reviews",
-        "Journal of Pharmaceutical Research International",
-        "Journal of Scientific Research and Reports",
-        "Ophthalmology Research: An International Journal",
-        "Physical Science International Journal",
-        "Plant Cell Biotechnology and Molecular Biology",
-        "South Asian Journal of Research in Microbiology",
-        "South Asian Journal of Social Studies and Economics",
-        "UTTAR PRADESH JOURNAL OF ZOOLOGY"
-    ]
-
-    all_contributors = defaultdict(lambda: {'count': 0, 'journals': set()})
-
-    print("Début de l'extraction des données de l'API HAL pour toutes les revues...")
-
-    for i, journal in enumerate(journals):
-        print(f"  [{i+1}/{len(journals)}] Traitement de la revue : '{journal}'...")
-        docs = get_contributors_from_hal(journal)
-
-        if not docs:
-            print(f"  -> Aucun résultat trouvé pour '{journal}'.")
-            continue
-
-        for doc in docs:
-            names = doc.get('contributorFullName_s')
-            ids = doc.get('contributorId_i')
-
-            # Ensure names is always a list
-            if not isinstance(names, (list, tuple)):
-                names = [names] if names is not None else []
-
-            # Ensure ids is always a list
-            if not isinstance(ids, (list, tuple)):
-                ids = [ids] if ids is not None else []
-
-            min_len = min(len(names), len(ids))
-
-            for j in range(min_len):
-                name = names[j]
-                contributor_id = ids[j]
-
-                # Ensure contributor_id is an integer before comparison
-                if isinstance(contributor_id, int) and contributor_id > 0:
-                    all_contributors[contributor_id]['count'] += 1
-                    all_contributors[contributor_id]['journals'].add(journal)
-                    all_contributors[contributor_id]['name'] = name
-
-        time.sleep(1)
+    # Liste des revues ciblées, partagée avec l'application
+    journals = JOURNAL_LIST
+    if discovery_days is not None:
+        journals = discover_journals(discovery_days, nb_journals)
+
+    if all_hal and not from_snapshot:
+        journals = None
+    if journals is not None and not from_snapshot:
+        resolve_journals(journals)
+
+    times_collector = None
+    title_collector = None
+    if from_snapshot:
+        all_contributors = get_contributors_from_snapshot(journals, from_snapshot)
+    elif use_facets:
+        all_contributors = get_contributors_from_facets(journals, limit=limit, mincount=mincount)
+        if bursts or titles:
+            print("Rafales et titres quasi identiques demandent les documents : relancer sans --facettes ou avec --depuis-snapshot.")
+            bursts = titles = False
+    else:
+        times_collector = DepositTimesCollector() if bursts else None
+        title_collector = TitleCollector() if titles else None
+        all_contributors = get_contributors_from_documents(journals, incremental=incremental, snapshot_dir=snapshot_dir,
+                                                           flush_every=flush_every, top=top,
+                                                           times_collector=times_collector,
+                                                           title_collector=title_collector)
 
     print("\n✅ Extraction terminée. Compilation et sauvegarde des données...")
 
-    data_list = []
-    for contributor_id, details in all_contributors.items():
-        data_list.append({
-            'contributor_id': contributor_id,
-            'full_name': details.get('name', 'Unknown Contributor'), # Provide a default if name is somehow missing
-            'total_contributions': details['count'],
-            'journals_contributed_to': ', '.join(sorted(details['journals']))
-        })
-
-    if data_list:
-        df = pd.DataFrame(data_list)
-        df_sorted = df.sort_values(by='total_contributions', ascending=False)
-        output_filename = 'contributeurs_hal.csv'
-        df_sorted.to_csv(output_filename, index=False, encoding='utf-8')
-        print(f"\n✅ Données compilées et sauvegardées dans '{output_filename}' avec succès!")
+    if all_contributors:
+        save_contributors(all_contributors, OUTPUT_FILENAME, top=top)
+        print(f"\n✅ Données compilées et sauvegardées dans '{OUTPUT_FILENAME}' avec succès!")
     else:
         print("\n❌ Aucune donnée de contributeur n'a pu être extraite.")
 
+    if bursts:
+        if times_collector is not None:
+            contributor_ids, times = times_collector.arrays()
+        else:
+            contributor_ids, times = snapshot_deposit_times(from_snapshot, journals=journals)
+        nb_flagged = save_bursts(contributor_ids, times, all_contributors, BURSTS_FILENAME, window=burst_window,
+                                 min_deposits=burst_min_deposits, max_median_gap=burst_max_median_gap)
+        print(f"⏱️ {nb_flagged} contributeur(s) avec au moins {burst_min_deposits} dépôts en {burst_window // 60} minute(s) ; "
+              f"statistiques de rafales écrites dans '{BURSTS_FILENAME}'.")
+
+    if titles:
+        if title_collector is not None:
+            clusters = title_collector.clusters()
+        else:
+            clusters = near_duplicate_clusters(*snapshot_titles(from_snapshot, journals=journals))
+        clusters.to_csv(TITLES_FILENAME, index=False, encoding='utf-8')
+        print(f"🪞 {clusters['Groupe'].nunique()} groupe(s) de titres quasi identiques ({len(clusters)} dépôt(s)) "
+              f"écrit(s) dans '{TITLES_FILENAME}'.")
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Classement des contributeurs HAL pour une liste de revues.")
+    parser.add_argument('--facettes', action='store_true',
+                        help="Compter les dépôts côté serveur avec les facettes HAL au lieu de télécharger chaque document.")
+    parser.add_argument('--limit', type=int, default=-1,
+                        help="Avec --facettes, nombre maximal de contributeurs renvoyés par HAL (facet.limit, -1 = tous).")
+    parser.add_argument('--mincount', type=int, default=1,
+                        help="Avec --facettes, nombre minimal de dépôts pour qu'un contributeur soit renvoyé (facet.pivot.mincount).")
+    parser.add_argument('--tout-hal', action='store_true',
+                        help="Classer les contributeurs de tout HAL plutôt que de la liste de revues "
+                             "(sans --facettes, parcours en flux de tous les dépôts).")
+    parser.add_argument('--complet', action='store_true',
+                        help="Sans --facettes, récolter de nouveau les revues expirées en entier plutôt que depuis leur point de reprise.")
+    parser.add_argument('--snapshot', metavar='DOSSIER',
+                        help="Sans --facettes, écrire aussi le corpus récolté dans un instantané Parquet.")
+    parser.add_argument('--depuis-snapshot', metavar='DOSSIER',
+                        help="Compter les contributeurs depuis un instantané Parquet existant, sans interroger HAL.")
+    parser.add_argument('--flush', type=int, metavar='PAGES',
+                        help="Sans --facettes, réécrire le classement partiel dans le CSV toutes les PAGES pages.")
+    parser.add_argument('--top', type=int,
+                        help="Ne garder que les TOP plus gros déposants dans le CSV.")
+    parser.add_argument('--rafales', action='store_true',
+                        help="Détecter aussi les rafales de dépôts par contributeur (incompatible avec --facettes).")
+    parser.add_argument('--fenetre', type=int, default=DEFAULT_BURST_WINDOW // 60, metavar='MINUTES',
+                        help="Largeur de la fenêtre glissante de détection des rafales, en minutes.")
+    parser.add_argument('--seuil-rafale', type=int, default=DEFAULT_BURST_MIN_DEPOSITS, metavar='DEPOTS',
+                        help="Nombre de dépôts dans la fenêtre à partir duquel un contributeur est signalé.")
+    parser.add_argument('--ecart-median', type=int, metavar='SECONDES',
+                        help="Exiger en plus un écart médian entre dépôts successifs d'au plus SECONDES.")
+    parser.add_argument('--titres', action='store_true',
+                        help="Chercher aussi les groupes de titres quasi identiques (incompatible avec --facettes).")
+    parser.add_argument('--decouverte', type=int, nargs='?', const=DEFAULT_DISCOVERY_DAYS, metavar='JOURS',
+                        help="Analyser les revues suspectes découvertes par facettes HAL sur les JOURS derniers jours "
+                             f"(par défaut {DEFAULT_DISCOVERY_DAYS}, 0 = tout HAL) au lieu de la liste fixe.")
+    parser.add_argument('--nb-revues', type=int, default=DEFAULT_DISCOVERED_JOURNALS,
+                        help="Avec --decouverte, nombre de revues les mieux classées à analyser.")
+    parser.add_argument('--log-json', nargs='?', const='-', metavar='FICHIER',
+                        help="Écrire chaque mesure (requêtes HAL, étapes) et le bilan en JSON, une par ligne, "
+                             "dans FICHIER (par défaut sur la sortie d'erreur).")
+    args = parser.parse_args()
+    if args.log_json:
+        configure_json_log(args.log_json)
+        use_metrics(Metrics())
+    try:
+        main(use_facets=args.facettes, limit=args.limit, mincount=args.mincount, all_hal=args.tout_hal,
+             incremental=not args.complet, snapshot_dir=args.snapshot, from_snapshot=args.depuis_snapshot,
+             flush_every=args.flush, top=args.top, bursts=args.rafales, burst_window=args.fenetre * 60,
+             burst_min_deposits=args.seuil_rafale, burst_max_median_gap=args.ecart_median, titles=args.titres,
+             discovery_days=args.decouverte, nb_journals=args.nb_revues)
+    finally:
+        if args.log_json:
+            log_summary()
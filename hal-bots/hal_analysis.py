@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+from collections import defaultdict
+
+from hal_client import as_list
+from hal_metrics import timed
+
+# =========================================================
+# 📊 AGRÉGATIONS SUR LES DOCUMENTS HAL
+# =========================================================
+
+CONTRIBUTOR_COLUMNS = ['ID HAL Contributeur', 'Nom Complet', 'Nb Contributions', 'Revues Contribuées']
+
+
+def contributors_by_loop(docs):
+    """
+    Version de référence (boucles Python) du décompte des contributeurs, conservée pour les comparaisons.
+    """
+    all_contributors = defaultdict(lambda: {'count': 0, 'journals': set(), 'name': 'N/A'})
+
+    for doc in docs:
+        names = as_list(doc.get('contributorFullName_s'))
+        ids = as_list(doc.get('contributorId_i'))
+        journal = doc.get('journal', 'N/A')
+
+        min_len = min(len(names), len(ids))
+
+        for j in range(min_len):
+            name = names[j]
+            contributor_id = ids[j]
+
+            if isinstance(contributor_id, int) and contributor_id > 0:
+                all_contributors[contributor_id]['count'] += 1
+                all_contributors[contributor_id]['journals'].add(journal)
+                all_contributors[contributor_id]['name'] = name
+
+    data_list = []
+    for contributor_id, details in all_contributors.items():
+        data_list.append({
+            'ID HAL Contributeur': contributor_id,
+            'Nom Complet': details.get('name', 'Unknown Contributor'),
+            'Nb Contributions': details['count'],
+            'Revues Contribuées': ', '.join(sorted(details['journals']))
+        })
+
+    return pd.DataFrame(data_list, columns=CONTRIBUTOR_COLUMNS)
+
+
+@timed()
+def contributor_pairs(docs):
+    """
+    Aplatit les documents en colonnes (doc, contributorId, nom, revue), une ligne par contributeur.
+    Comme la version de référence, les listes d'IDs et de noms sont appariées position par position
+    (zip tronque à la plus courte) ; seuls les identifiants entiers strictement positifs sont retenus.
+    """
+    doc_index = []
+    ids = []
+    names = []
+    journals = []
+    add_doc, add_id, add_name, add_journal = doc_index.append, ids.append, names.append, journals.append
+
+    # Une seule passe sur les documents pour construire les colonnes, sans dictionnaire par contributeur
+    for i, doc in enumerate(docs):
+        doc_ids = doc.get('contributorId_i')
+        doc_names = doc.get('contributorFullName_s')
+        if doc_ids is None or doc_names is None:
+            continue
+        doc_ids = as_list(doc_ids)
+        doc_names = as_list(doc_names)
+
+        journal = doc.get('journal', 'N/A')
+        for contributor_id, name in zip(doc_ids, doc_names):
+            add_doc(i)
+            add_id(contributor_id)
+            add_name(name)
+            add_journal(journal)
+
+    pairs = pd.DataFrame({
+        'doc': np.asarray(doc_index, dtype=np.int64),
+        'id': pd.to_numeric(pd.Series(ids, dtype=object), errors='coerce'),
+        'name': pd.Series(names, dtype=object),
+        # Catégories triées : l'ordre des codes est celui des titres
+        'journal': pd.Categorical(journals, categories=sorted(set(journals))),
+    })
+    pairs = pairs[pairs['id'] > 0]
+    return pairs.astype({'id': 'int64'})
+
+
+def contributors_by_columns(docs):
+    """
+    Décompte des contributeurs en colonnes : nombre de dépôts, dernier nom vu et liste triée
+    des revues distinctes par contributeur. Même résultat que contributors_by_loop.
+    """
+    return contributors_from_pairs(contributor_pairs(docs))
+
+
+@timed()
+def contributors_from_pairs(pairs):
+    """
+    Agrège une table produite par contributor_pairs avec des opérations sur tableaux
+    (factorisation des IDs, bincount, couples contributeur/revue uniques).
+    """
+    if pairs.empty:
+        return pd.DataFrame(columns=CONTRIBUTOR_COLUMNS)
+
+    # Codes des contributeurs dans l'ordre de première apparition
+    codes, uniques = pd.factorize(pairs['id'].to_numpy(), sort=False)
+    counts = np.bincount(codes, minlength=len(uniques))
+
+    # Dernier nom vu pour chaque contributeur
+    last_rows = pd.Series(np.arange(len(codes))).groupby(codes).max().to_numpy()
+    last_names = pairs['name'].to_numpy()[last_rows]
+
+    # Couples (contributeur, revue) distincts, triés par contributeur puis par titre de revue
+    journal_codes = pairs['journal'].cat.codes.to_numpy().astype(np.int64)
+    nb_journals = len(pairs['journal'].cat.categories)
+    keys = np.sort(pd.unique(codes.astype(np.int64) * nb_journals + journal_codes))
+    owners = keys // nb_journals
+    titles = pairs['journal'].cat.categories.to_numpy()[keys % nb_journals]
+    bounds = np.searchsorted(owners, np.arange(len(uniques) + 1))
+    journal_lists = [', '.join(titles[bounds[c]:bounds[c + 1]]) for c in range(len(uniques))]
+
+    return pd.DataFrame({
+        'ID HAL Contributeur': uniques,
+        'Nom Complet': last_names,
+        'Nb Contributions': counts,
+        'Revues Contribuées': journal_lists,
+    }, columns=CONTRIBUTOR_COLUMNS)
@@ -0,0 +1,293 @@
+import multiprocessing
+import os
+import sqlite3
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+import requests
+
+from hal_client import (BASE_URL, DEFAULT_MAX_WORKERS, DEFAULT_REQUESTS_PER_SECOND, as_list, iter_journal_pages,
+                        plan_journal_filters, register_journal_ids)
+from hal_journals import use_journal_index
+from hal_metrics import configure_json_log, json_log_path, timed
+from hal_pipeline import ContributorCounter, TitleCollector
+from hal_store import (DEFAULT_DB_PATH, connect, count_docs, load_docs, mark_harvested, plan_refresh, save_docs,
+                       save_memberships, utc_now)
+
+# =========================================================
+# 🗂️ AUDIT DE PLUSIEURS COLLECTIONS EN PARALLÈLE
+# =========================================================
+# Toutes les collections auditées sont récoltées ensemble : un parcours de tout HAL filtré sur les
+# revues et sur collCode_s renvoie chaque document une seule fois, même s'il appartient à plusieurs
+# collections, puis l'appartenance de chaque document est notée dans la base locale. Les parcours
+# puis les analyses de chaque collection sont répartis sur un pool de processus, toutes les requêtes
+# partageant un même débit maximal.
+
+# Champ HAL des codes de collection d'un document
+COLLECTION_FIELD = 'collCode_s'
+
+# Champs HAL récupérés pour l'audit (contributorId_i sert au décompte des déposants)
+AUDIT_FIELDS = 'halId_s,title_s,contributorFullName_s,contributorId_i,submittedDate_s'
+
+# Nombre maximal de codes de collection par filtre fq
+MAX_COLLECTIONS_PER_FILTER = 100
+
+# Processus de travail par défaut, dossier des résultats et nom du rapport consolidé
+DEFAULT_BATCH_WORKERS = DEFAULT_MAX_WORKERS
+DEFAULT_AUDIT_DIR = 'audit_collections'
+REPORT_FILENAME = 'rapport_collections.csv'
+
+# Nombre de déposants détaillés par collection
+TOP_CONTRIBUTORS = 20
+
+REPORT_COLUMNS = [
+    'Collection', 'Publications', 'Publications Partagées', 'Revues Touchées', 'Revue Principale', 'Contributeurs',
+    'Premier Contributeur', 'Part 1er Contributeur', 'Groupes Titres', 'Publications Groupées', 'Erreur',
+]
+
+
+class SharedTokenBucket:
+    """
+    Limiteur de débit partagé entre processus : chaque requête réserve le prochain créneau libre
+    (espacés de 1/rate secondes) dans une valeur en mémoire partagée, puis attend ce créneau.
+    Même interface que hal_client.TokenBucket (rafale d'une requête). À transmettre aux processus
+    à leur création (initializer d'un pool).
+    """
+
+    def __init__(self, rate=DEFAULT_REQUESTS_PER_SECOND, context=None):
+        context = context or multiprocessing.get_context()
+        self.rate = rate
+        # Horloge monotone, commune à tous les processus de la machine
+        self.next_slot = context.Value('d', 0.0)
+
+    def acquire(self):
+        """Bloque jusqu'au créneau réservé pour cette requête."""
+        with self.next_slot.get_lock():
+            now = time.monotonic()
+            slot = max(self.next_slot.value, now)
+            self.next_slot.value = slot + 1 / self.rate
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# État de chaque processus de travail (limiteur partagé, base locale), fixé par _init_worker
+_worker = {}
+
+
+def _init_worker(limiter, journal_ids, db_path, log_path=None):
+    """
+    Initialise un processus de travail : limiteur partagé, identifiants de revues résolus et base locale.
+    Avec log_path, ses mesures sont écrites dans le même journal JSON que le processus principal.
+    """
+    _worker['limiter'] = limiter
+    _worker['db_path'] = db_path
+    register_journal_ids(journal_ids)
+    if log_path:
+        configure_json_log(log_path)
+
+
+def collections_filter(collections):
+    """Filtre Solr des documents appartenant à l'une des collections : collCode_s:("A" OR "B" ...)."""
+    codes = ' OR '.join('"' + code.replace('"', '\\"') + '"' for code in collections)
+    return f'{COLLECTION_FIELD}:({codes})'
+
+
+def plan_collection_jobs(conn, collections, journals, fields=AUDIT_FIELDS, incremental=True):
+    """
+    Regroupe les couples (collection, revue) à récolter de toutes les collections en au plus deux
+    parcours partagés : synchronisation depuis le plus ancien point de reprise, puis récolte complète.
+    Chaque parcours est découpé en tâches (revues, collections, since) selon les limites d'un filtre.
+    Renvoie (tâches, {collection: [revues à récolter]}) ; une collection à jour n'apparaît pas.
+    """
+    stale = {}
+    groups = {}
+    for collection in collections:
+        _, jobs = plan_refresh(conn, journals, fields, scope=collection, incremental=incremental)
+        for chunk, since in jobs:
+            stale.setdefault(collection, []).extend(chunk)
+            group = groups.setdefault(since is not None, {'collections': {}, 'journals': {}, 'since': since})
+            group['collections'][collection] = None
+            group['journals'].update(dict.fromkeys(chunk))
+            if since is not None:
+                group['since'] = min(group['since'], since)
+
+    tasks = []
+    for group in groups.values():
+        codes = list(group['collections'])
+        for journal_chunk in plan_journal_filters(list(group['journals'])):
+            for start in range(0, len(codes), MAX_COLLECTIONS_PER_FILTER):
+                tasks.append((journal_chunk, codes[start:start + MAX_COLLECTIONS_PER_FILTER], group['since']))
+    return tasks, stale
+
+
+def fetch_collection_task(journals, collections, since, fields=AUDIT_FIELDS, base_url=BASE_URL):
+    """
+    Tâche d'un processus de travail : parcourt tout HAL pour un groupe de revues restreint à un groupe
+    de collections, enregistre chaque document une fois et note ses collections auditées.
+    Renvoie le nombre de documents reçus.
+    """
+    fields = ','.join(dict.fromkeys(fields.split(',') + [COLLECTION_FIELD]))
+    audited = set(collections)
+    conn = connect(_worker['db_path'])
+    fetched = 0
+    try:
+        for docs, _ in iter_journal_pages(journals, fields, base_url=base_url, limiter=_worker['limiter'], since=since,
+                                          as_filter=True, filter_query=collections_filter(collections)):
+            save_docs(conn, docs)
+            save_memberships(conn, [
+                (code, doc['halId_s'])
+                for doc in docs if doc.get('halId_s')
+                for code in as_list(doc.get(COLLECTION_FIELD)) if code in audited
+            ])
+            fetched += len(docs)
+    finally:
+        conn.close()
+    return fetched
+
+
+def shared_publication_counts(conn, collections, journals):
+    """Nombre de publications de chaque collection qui appartiennent aussi à une autre collection auditée."""
+    if not collections or not journals:
+        return {}
+    scopes = ','.join('?' * len(collections))
+    titles = ','.join('?' * len(journals))
+    query = f"""
+        SELECT m.scope, COUNT(*)
+        FROM memberships m JOIN documents d ON d.halId_s = m.halId_s
+        WHERE m.scope IN ({scopes}) AND d.journal IN ({titles}) AND m.halId_s IN (
+            SELECT halId_s FROM memberships WHERE scope IN ({scopes}) GROUP BY halId_s HAVING COUNT(*) > 1
+        )
+        GROUP BY m.scope
+    """
+    return dict(conn.execute(query, list(collections) + list(journals) + list(collections)).fetchall())
+
+
+@timed()
+def audit_collection(collection, journals, output_dir=DEFAULT_AUDIT_DIR):
+    """
+    Tâche d'un processus de travail : relit les publications d'une collection depuis la base locale
+    et écrit ses résultats dans output_dir/<collection>/ (publications, principaux déposants,
+    titres quasi identiques). Renvoie la ligne de la collection dans le rapport consolidé.
+    """
+    conn = connect(_worker['db_path'])
+    docs = load_docs(conn, journals, scope=collection)
+    conn.close()
+
+    contributors = ContributorCounter()
+    titles = TitleCollector()
+    contributors.update(docs)
+    titles.update(docs)
+    clusters = titles.clusters()
+    by_journal = Counter(doc['journal'] for doc in docs)
+    top = contributors.top(TOP_CONTRIBUTORS)
+
+    folder = os.path.join(output_dir, collection)
+    os.makedirs(folder, exist_ok=True)
+    pd.DataFrame({
+        'halId_s': [doc['halId_s'] for doc in docs],
+        'Titre': [(doc.get('title_s') or [None])[0] for doc in docs],
+        'Revue': [doc['journal'] for doc in docs],
+        'Date Soumission': [doc.get('submittedDate_s') for doc in docs],
+        'Contributeurs': [', '.join(doc.get('contributorFullName_s', [])) for doc in docs],
+    }).sort_values('Date Soumission', kind='stable').to_csv(os.path.join(folder, 'publications.csv'), index=False,
+                                                             encoding='utf-8')
+    pd.DataFrame([
+        {'ID HAL Contributeur': contributor_id, 'Nom Contributeur': details['name'], 'Nombre Dépôts': details['count'],
+         'Revues': ', '.join(sorted(details['journals']))}
+        for contributor_id, details in top
+    ], columns=['ID HAL Contributeur', 'Nom Contributeur', 'Nombre Dépôts', 'Revues']).to_csv(
+        os.path.join(folder, 'contributeurs.csv'), index=False, encoding='utf-8')
+    clusters.to_csv(os.path.join(folder, 'titres_quasi_identiques.csv'), index=False, encoding='utf-8')
+
+    return {
+        'Collection': collection,
+        'Publications': len(docs),
+        'Revues Touchées': len(by_journal),
+        'Revue Principale': by_journal.most_common(1)[0][0] if by_journal else None,
+        'Contributeurs': len(contributors),
+        'Premier Contributeur': top[0][1]['name'] if top else None,
+        'Part 1er Contributeur': round(top[0][1]['count'] / len(docs), 3) if top and docs else 0.0,
+        'Groupes Titres': clusters['Groupe'].nunique(),
+        'Publications Groupées': len(clusters),
+    }
+
+
+def run_collection_audit(collections, journals, workers=DEFAULT_BATCH_WORKERS, rate=DEFAULT_REQUESTS_PER_SECOND,
+                         output_dir=DEFAULT_AUDIT_DIR, db_path=DEFAULT_DB_PATH, incremental=True, base_url=BASE_URL):
+    """
+    Audite plusieurs collections HAL pour une liste de revues :
+      1. résout les revues en identifiants HAL, puis récolte en parallèle les couples (collection, revue)
+         expirés par parcours partagés (voir plan_collection_jobs), sous un même débit de rate requêtes/s ;
+      2. analyse chaque collection en parallèle depuis la base locale (voir audit_collection).
+    Une tâche en erreur (requête HAL ou base locale) n'interrompt que ses collections et revues, qui ne sont
+    pas marquées comme récoltées.
+    Écrit le rapport consolidé dans output_dir/REPORT_FILENAME et le renvoie (une ligne par collection).
+    """
+    collections = list(dict.fromkeys(code.strip() for code in collections if code.strip()))
+    # Processus démarrés à neuf : aucune connexion HTTP ni base SQLite héritée du processus principal
+    context = multiprocessing.get_context('spawn')
+    limiter = SharedTokenBucket(rate, context=context)
+
+    conn = connect(db_path)
+    journal_ids = use_journal_index(conn, journals, limiter=limiter)
+    tasks, stale = plan_collection_jobs(conn, collections, journals, incremental=incremental)
+    print(f"{len(collections) - len(stale)} collection(s) à jour dans la base locale, "
+          f"{len(stale)} à récolter en {len(tasks)} parcours partagé(s).")
+
+    errors = {}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(limiter, journal_ids, db_path, json_log_path())) as pool:
+        watermark = utc_now()
+        futures = {
+            pool.submit(fetch_collection_task, journal_chunk, collection_chunk, since, base_url=base_url):
+                (journal_chunk, collection_chunk)
+            for journal_chunk, collection_chunk, since in tasks
+        }
+        failed = set()
+        for i, future in enumerate(as_completed(futures), start=1):
+            journal_chunk, collection_chunk = futures[future]
+            try:
+                fetched = future.result()
+            except (requests.exceptions.RequestException, sqlite3.Error) as e:
+                print(f"  [{i}/{len(tasks)}] Erreur pour {len(collection_chunk)} collection(s) et "
+                      f"{len(journal_chunk)} revue(s) : {e}")
+                failed.update((code, journal) for code in collection_chunk for journal in journal_chunk)
+                for code in collection_chunk:
+                    errors[code] = str(e)
+                continue
+            print(f"  [{i}/{len(tasks)}] {fetched} document(s) reçu(s) pour {len(collection_chunk)} collection(s) "
+                  f"et {len(journal_chunk)} revue(s).")
+
+        for collection, stale_journals in stale.items():
+            for journal in stale_journals:
+                if (collection, journal) not in failed:
+                    mark_harvested(conn, journal, AUDIT_FIELDS, count_docs(conn, journal, scope=collection),
+                                   scope=collection, watermark=watermark)
+
+        print(f"Analyse de {len(collections)} collection(s)...")
+        futures = {pool.submit(audit_collection, collection, journals, output_dir): collection
+                   for collection in collections}
+        rows = []
+        for future in as_completed(futures):
+            collection = futures[future]
+            try:
+                row = future.result()
+            except sqlite3.Error as e:
+                print(f"  Erreur lors de l'analyse de la collection '{collection}' : {e}")
+                row = {'Collection': collection, 'Publications': 0}
+                errors[collection] = '; '.join(filter(None, [errors.get(collection), str(e)]))
+            row['Erreur'] = errors.get(collection)
+            rows.append(row)
+
+    shared = shared_publication_counts(conn, collections, journals)
+    conn.close()
+
+    report = pd.DataFrame(rows, columns=REPORT_COLUMNS)
+    report['Publications Partagées'] = report['Collection'].map(shared).fillna(0).astype(int)
+    report = report.sort_values(['Publications', 'Collection'], ascending=[False, True], kind='stable')
+    report = report.reset_index(drop=True)
+    os.makedirs(output_dir, exist_ok=True)
+    report.to_csv(os.path.join(output_dir, REPORT_FILENAME), index=False, encoding='utf-8')
+    return report
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+from hal_metrics import timed
+
+# =========================================================
+# ⏱️ DÉTECTION DES RAFALES DE DÉPÔTS
+# =========================================================
+# Un robot dépose par rafales : des dizaines de documents à quelques minutes d'intervalle.
+# Les dates de soumission (à la seconde) sont triées par contributeur, puis on calcule en
+# opérations sur tableaux les écarts entre dépôts successifs et le nombre maximal de dépôts
+# dans une fenêtre glissante. Coût : un tri, O(n log n), quel que soit le nombre de contributeurs.
+
+# Largeur de la fenêtre glissante (secondes)
+DEFAULT_BURST_WINDOW = 3600
+
+# Nombre de dépôts dans la fenêtre à partir duquel un contributeur est signalé
+DEFAULT_BURST_MIN_DEPOSITS = 20
+
+# Écart médian maximal entre deux dépôts (secondes) ; None pour ne pas l'exiger
+DEFAULT_BURST_MAX_MEDIAN_GAP = None
+
+# Écart en dessous duquel deux dépôts successifs sont jugés « rapides » (secondes)
+RAPID_GAP = 60
+
+BURST_COLUMNS = [
+    'ID HAL Contributeur', 'Nb Dépôts', 'Pic Dépôts Fenêtre', 'Début du Pic', 'Écart Médian (s)',
+    'Écart Minimal (s)', 'Part Écarts Rapides', 'Premier Dépôt', 'Dernier Dépôt', 'Rafale',
+]
+
+
+def _group_starts(sorted_ids):
+    """Indices de début de chaque groupe de valeurs égales dans un tableau trié (plus la longueur)."""
+    if len(sorted_ids) == 0:
+        return np.zeros(1, dtype=np.int64)
+    change = np.flatnonzero(sorted_ids[1:] != sorted_ids[:-1]) + 1
+    return np.concatenate(([0], change, [len(sorted_ids)])).astype(np.int64)
+
+
+def _composite_keys(groups, values, span):
+    """
+    Fond un groupe et une valeur (0 <= valeur < span) dans une clé entière unique :
+    trier les clés revient à trier par groupe puis par valeur, en un seul tri.
+    """
+    return groups.astype(np.int64) * np.int64(span) + values
+
+
+def _grouped_median(values, groups, starts, counts):
+    """Médiane de values (entiers positifs, triés par groupe) pour chaque groupe ; NaN pour les groupes vides."""
+    medians = np.full(len(counts), np.nan)
+    present = counts > 0
+    if not present.any():
+        return medians
+    span = int(values.max()) + 1
+    values = (np.sort(_composite_keys(groups, values, span)) - groups * np.int64(span)).astype(np.float64)
+    low = starts[present] + (counts[present] - 1) // 2
+    high = starts[present] + counts[present] // 2
+    medians[present] = (values[low] + values[high]) / 2
+    return medians
+
+
+@timed()
+def detect_bursts(contributor_ids, times, window=DEFAULT_BURST_WINDOW, min_deposits=DEFAULT_BURST_MIN_DEPOSITS,
+                  max_median_gap=DEFAULT_BURST_MAX_MEDIAN_GAP):
+    """
+    Statistiques de rafales par contributeur à partir de deux tableaux alignés :
+    IDs HAL et dates de dépôt (secondes depuis l'epoch, ou datetime64).
+    Un contributeur est signalé (colonne 'Rafale') quand il atteint min_deposits dépôts dans
+    une fenêtre de window secondes, et si max_median_gap est donné, quand l'écart médian
+    entre ses dépôts successifs ne le dépasse pas. Résultat trié par pic décroissant.
+    """
+    contributor_ids = np.asarray(contributor_ids, dtype=np.int64)
+    times = np.asarray(times)
+    if np.issubdtype(times.dtype, np.datetime64):
+        times = times.astype('datetime64[s]').astype(np.int64)
+    times = times.astype(np.int64)
+    if len(times) == 0:
+        return pd.DataFrame(columns=BURST_COLUMNS)
+
+    # Tri par contributeur puis par date sur une clé composite (codes denses des contributeurs,
+    # dates relatives) ; la marge window évite qu'une fenêtre déborde sur le contributeur suivant
+    uniques, codes = np.unique(contributor_ids, return_inverse=True)
+    offset = times.min()
+    span = int(times.max() - offset) + window + 1
+    keys = _composite_keys(codes, times - offset, span)
+    order = np.argsort(keys)
+    keys, times = keys[order], times[order]
+    groups = codes[order].astype(np.int64)
+    starts = _group_starts(groups)
+    nb_groups = len(starts) - 1
+    sizes = np.diff(starts)
+
+    # Écarts entre dépôts successifs d'un même contributeur (les écarts entre contributeurs sont écartés)
+    same = groups[1:] == groups[:-1]
+    gaps = np.diff(times)[same]
+    gap_groups = groups[1:][same]
+    gap_counts = sizes - 1
+    gap_starts = np.concatenate(([0], np.cumsum(gap_counts)))[:-1]
+
+    median_gap = _grouped_median(gaps, gap_groups, gap_starts, gap_counts)
+    has_gaps = gap_counts > 0
+    min_gap = np.full(nb_groups, np.nan)
+    if has_gaps.any():
+        min_gap[has_gaps] = np.minimum.reduceat(gaps, gap_starts[has_gaps])
+    rapid = np.bincount(gap_groups, weights=gaps <= RAPID_GAP, minlength=nb_groups)
+    rapid_share = np.divide(rapid, gap_counts, out=np.zeros(nb_groups), where=has_gaps)
+
+    # Pic de la fenêtre glissante et date de son premier dépôt (premier pic en cas d'égalité)
+    # (une seule recherche dichotomique pour tous les contributeurs grâce à la clé composite)
+    counts = np.searchsorted(keys, keys + window, side='right') - np.arange(len(keys))
+    peak = np.maximum.reduceat(counts, starts[:-1])
+    at_peak = np.flatnonzero(counts == peak[groups])
+    peak_rows = at_peak[_group_starts(groups[at_peak])[:-1]]
+
+    flagged = peak >= min_deposits
+    if max_median_gap is not None:
+        flagged &= has_gaps & (median_gap <= max_median_gap)
+
+    result = pd.DataFrame({
+        'ID HAL Contributeur': uniques,
+        'Nb Dépôts': sizes,
+        'Pic Dépôts Fenêtre': peak,
+        'Début du Pic': pd.to_datetime(times[peak_rows], unit='s'),
+        'Écart Médian (s)': median_gap,
+        'Écart Minimal (s)': min_gap,
+        'Part Écarts Rapides': rapid_share.round(3),
+        'Premier Dépôt': pd.to_datetime(times[starts[:-1]], unit='s'),
+        'Dernier Dépôt': pd.to_datetime(times[starts[1:] - 1], unit='s'),
+        'Rafale': flagged,
+    }, columns=BURST_COLUMNS)
+    return result.sort_values(['Pic Dépôts Fenêtre', 'Nb Dépôts'], ascending=False, kind='stable').reset_index(drop=True)
+
+
+def flagged_bursts(bursts):
+    """Ne garde que les contributeurs signalés par detect_bursts."""
+    return bursts[bursts['Rafale']].reset_index(drop=True)
@@ -0,0 +1,86 @@
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# =========================================================
+# 🧠 CACHE DES RÉSULTATS DÉRIVÉS (LRU BORNÉ)
+# =========================================================
+# Les analyses calculées sur un corpus (classement des contributeurs, dépôts mensuels...)
+# sont conservées sous une clé (analyse, empreinte du corpus, paramètres). Le cache est borné
+# en nombre d'entrées et en octets ; les entrées les moins récemment utilisées sont évincées.
+
+DEFAULT_MAX_ENTRIES = 128
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def estimate_size(value):
+    """Taille approximative (en octets) d'un résultat mis en cache."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(value, pd.DataFrame) else int(usage)
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class DerivedCache:
+    """
+    Cache LRU thread-safe, partagé par toutes les sessions d'un même processus.
+    Une valeur plus grosse que la borne en octets n'est pas conservée.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # clé -> (valeur, taille)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        """Renvoie la valeur associée à key, en la calculant avec compute() si elle est absente."""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0]
+            self.misses += 1
+
+        # Calcul hors du verrou : deux sessions peuvent calculer la même clé, la dernière l'emporte
+        value = compute()
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return value
+
+        with self.lock:
+            if key in self.entries:
+                self.nbytes -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.nbytes += size
+            while len(self.entries) > self.max_entries or self.nbytes > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.nbytes -= evicted_size
+        return value
+
+    def clear(self):
+        """Vide le cache."""
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        """Entrées, taille occupée et taux de réussite du cache."""
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'nbytes': self.nbytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
@@ -0,0 +1,87 @@
+import io
+
+import altair as alt
+import pandas as pd
+
+from hal_metrics import timed
+
+# =========================================================
+# 📈 GRAPHIQUES DES DÉPÔTS MENSUELS
+# =========================================================
+# Le graphique interactif est une spécification Vega-Lite : seule la série agrégée
+# (mois × revue) est envoyée au navigateur, qui dessine, zoome et filtre lui-même.
+# L'image PNG (matplotlib) n'est produite qu'à la demande.
+
+# Un mois × revue par ligne : quelques dizaines de milliers de lignes au plus
+alt.data_transformers.disable_max_rows()
+
+ALL_JOURNALS = 'Toutes revues'
+
+
+def monthly_long_frame(monthly):
+    """
+    Met les dépôts mensuels au format long (month 'AAAA-MM', journal, count).
+    Accepte une série indexée par mois (toutes revues réunies) ou un tableau mois × revue.
+    """
+    if isinstance(monthly, pd.Series):
+        monthly = monthly.to_frame(name=ALL_JOURNALS)
+    frame = monthly.rename_axis(index='month', columns='journal').stack().rename('count').reset_index()
+    frame = frame[frame['count'] > 0]
+    frame['month'] = frame['month'].astype(str)
+    frame['count'] = frame['count'].astype(int)
+    return frame
+
+
+@timed()
+def monthly_chart_spec(monthly, title='Nombre de dépôts par mois'):
+    """
+    Spécification Vega-Lite du diagramme en barres des dépôts mensuels, empilées par revue :
+    zoom et déplacement sur l'axe des mois, revue mise en avant par un clic sur la légende.
+    """
+    frame = monthly_long_frame(monthly)
+    highlight = alt.selection_point(fields=['journal'], bind='legend')
+
+    chart = alt.Chart(frame, title=title).mark_bar().encode(
+        x=alt.X('yearmonth(month):T', title='Mois et année'),
+        y=alt.Y('sum(count):Q', title='Nombre de dépôts'),
+        color=alt.Color('journal:N', title='Revue', legend=alt.Legend(orient='bottom', columns=2, symbolLimit=0)),
+        opacity=alt.condition(highlight, alt.value(1), alt.value(0.2)),
+        tooltip=[
+            alt.Tooltip('yearmonth(month):T', title='Mois'),
+            alt.Tooltip('journal:N', title='Revue'),
+            alt.Tooltip('sum(count):Q', title='Dépôts'),
+        ],
+    ).add_params(highlight).interactive(bind_y=False)
+    return chart.to_dict()
+
+
+@timed()
+def save_monthly_chart_html(monthly, output_filename, title='Nombre de dépôts par mois'):
+    """Écrit le graphique interactif dans une page HTML autonome."""
+    alt.Chart.from_dict(monthly_chart_spec(monthly, title)).save(output_filename)
+
+
+@timed()
+def monthly_png(monthly_counts, title='Nombre de dépôts par mois'):
+    """
+    Diagramme en barres des dépôts mensuels (toutes revues réunies) rendu en PNG.
+    matplotlib n'est importé qu'ici, et sans pyplot : la fonction peut tourner hors du fil principal.
+    """
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(15, 8))
+    ax = fig.subplots()
+    monthly_counts.plot(kind='bar', color='skyblue', ax=ax)
+    ax.set_title(title, fontsize=18, pad=20)
+    ax.set_xlabel('Mois et Année', fontsize=14, labelpad=15)
+    ax.set_ylabel('Nombre de dépôts', fontsize=14, labelpad=15)
+    ax.tick_params(axis='x', labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    fig.tight_layout()
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    buf.seek(0)
+    return buf
@@ -0,0 +1,637 @@
+import contextvars
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from hal_metrics import current_metrics, timed
+
+# =========================================================
+# 📝 REVUES CIBLÉES
+# =========================================================
+
+# Liste des revues souvent associées à des dépôts "sauvages", partagée par l'application et les scripts
+JOURNAL_LIST = [
+    "Advances in Research on Teaching",
+    "Archives of Current Research International",
+    "Asian Basic and Applied Research Journal",
+    "Asian Food Science Journal",
+    "Asian Journal of Advanced Research and Reports",
+    "Asian Journal of Advances in Agricultural Research",
+    "Asian Journal of Advances in Research",
+    "Asian Journal of Agricultural and Horticultural Research",
+    "Asian Journal of Agricultural Extension, Economics and Sociology",
+    "Asian Journal of Arts, Humanities and Social Studies",
+    "Asian Journal of Biochemistry, Genetics and Molecular Biology",
+    "Asian Journal of Biology",
+    "Asian Journal of Cardiology Research",
+    "Asian Journal of Case Reports in Medicine and Health",
+    "Asian journal of case reports in surgery",
+    "Asian Journal of Chemical Sciences",
+    "Asian Journal of Current Research",
+    "Asian Journal of Dental Sciences",
+    "Asian Journal of Economics, Business and Accounting",
+    "Asian Journal of Economics, Finance and Management",
+    "Asian Journal of Education and Social Studies",
+    "Asian Journal of Fisheries and Aquatic Research",
+    "Asian Journal of Food Research and Nutrition",
+    "Asian Journal of Language, Literature and Culture Studies",
+    "Asian Journal of Medicine and Health",
+    "Asian Journal of Microbiology, Biotechnology and Environmental Sciences",
+    "Asian Journal of Orthopaedic Research",
+    "Asian Journal of Pediatric Research",
+    "Asian Journal of Plant and Soil Sciences",
+    "Asian Journal of Research and Reports in Endocrinology",
+    "Asian Journal of Research and Reviews in Physics",
+    "Asian Journal of Research in Agriculture and Forestry",
+    "Asian Journal of Research in Biochemistry",
+    "Asian Journal of Research in Botany",
+    "Asian Journal of Research in Computer Science",
+    "Asian Journal of Research in Crop Science",
+    "Asian Journal of Research in Dermatological Science",
+    "Asian Journal of Research in Infectious Diseases",
+    "Asian Journal of Research in Medicine and Medical Science",
+    "Asian Journal of Research in Nephrology",
+    "Asian Journal of Research in Nursing and Health",
+    "Asian Journal of Research in Surgery",
+    "Asian Journal of Research in Zoology",
+    "Asian Journal of Sociological Research",
+    "Asian Journal of Soil Science and Plant Nutrition",
+    "Asian Research Journal of Agriculture",
+    "Asian Research Journal of Arts & Social Sciences",
+    "Asian Research Journal of Mathematics",
+    "Cardiology and Angiology: An International Journal",
+    "Chemical Science International Journal",
+    "Current Journal of Applied Science and Technology",
+    "European Journal of Nutrition and Food Safety",
+    "International Journal of Advances in Nephrology Research",
+    "International Journal of Biochemistry Research & Review",
+    "International Journal of Environment and Climate Change",
+    "International Journal of Hematology-Oncology and Stem Cell Research",
+    "International Journal of Medical and Pharmaceutical Case Reports",
+    "International Journal of Pathogen Research",
+    "International Journal of Plant & Soil Science",
+    "international journal of research and reports in dentistry",
+    "International Journal of Research and Reports in Hematology",
+    "International Neuropsychiatric Disease Journal",
+    "International Research Journal of Gastroenterology and Hepatology",
+    "International Research Journal of Oncology",
+    "International Research Journal of Pure and Applied Chemistry",
+    "Journal of Advances in Biology & Biotechnology",
+    "Journal of Advances in Food Science & Technology",
+    "Journal of Advances in Mathematics and Computer Science",
+    "Journal of Advances in Medicine and Medical Research",
+    "Journal of Advances in Microbiology",
+    "Journal of Agriculture and Ecology Research International",
+    "Journal of Applied Chemical Science International",
+    "Journal of Applied Life Sciences International",
+    "Journal of Biochemistry International",
+    "Journal of Biology and Nature",
+    "Journal of Case Reports in Medical Science",
+    "Journal of Complementary and Alternative Medical Research",
+    "Journal of Economics and Trade",
+    "Journal of Economics, Management and Trade",
+    "Journal of Education, Society and Behavioural Science",
+    "Journal of Engineering Research and Reports",
+    "Journal of Experimental Agriculture International",
+    "Journal of Geography, Environment and Earth Science International",
+    "Journal of Global Ecology and Environment",
+    "Journal of Materials Science Research and Reviews",
+    "Journal of Pharmaceutical Research International",
+    "Journal of Scientific Research and Reports",
+    "Ophthalmology Research: An International Journal",
+    "Physical Science International Journal",
+    "Plant Cell Biotechnology and Molecular Biology",
+    "South Asian Journal of Research in Microbiology",
+    "South Asian Journal of Social Studies and Economics",
+    "UTTAR PRADESH JOURNAL OF ZOOLOGY"
+]
+
+# =========================================================
+# 🌐 ACCÈS À L'API DE RECHERCHE HAL
+# =========================================================
+
+# Racine de l'API HAL, modifiable par variable d'environnement (serveur local du banc d'essai par exemple)
+API_ROOT = os.environ.get('HAL_API_URL', "https://api.archives-ouvertes.fr").rstrip('/')
+BASE_URL = f"{API_ROOT}/search"
+
+# Nombre de documents demandés par page (HAL accepte jusqu'à 10000)
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_TIMEOUT = 20
+
+# Limites d'une requête groupée (clauses OR Solr et longueur de l'URL encodée)
+MAX_CLAUSES_PER_QUERY = 30
+MAX_QUERY_LENGTH = 4000
+
+# Limites d'un filtre (fq) regroupant les revues d'un parcours de collection : sans calcul de score,
+# il peut porter bien plus de clauses (maxBooleanClauses de Solr : 1024), la longueur d'URL restant bornée
+MAX_CLAUSES_PER_FILTER = 500
+MAX_FILTER_LENGTH = 6000
+
+# Nouvelles tentatives en cas d'erreur réseau ou de réponse 429/5xx, avec attente exponentielle
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Politesse envers api.archives-ouvertes.fr : débit maximal (modifiable par variable d'environnement) et requêtes simultanées
+DEFAULT_REQUESTS_PER_SECOND = float(os.environ.get('HAL_REQUESTS_PER_SECOND', 2.0))
+DEFAULT_MAX_WORKERS = 4
+
+# Champ daté utilisé pour les facettes mensuelles et date de départ par défaut
+SUBMITTED_DATE_FIELD = 'submittedDate_tdate'
+DEFAULT_FACET_START = '2000-01-01'
+
+# Recouvrement appliqué au point de reprise d'une synchronisation incrémentale (date math Solr)
+WATERMARK_OVERLAP = '1DAY'
+
+
+class TokenBucket:
+    """
+    Limiteur de débit à seau de jetons, partagé entre threads.
+    Autorise en moyenne `rate` requêtes par seconde, avec des rafales d'au plus `burst` requêtes.
+    """
+
+    def __init__(self, rate=DEFAULT_REQUESTS_PER_SECOND, burst=1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Bloque jusqu'à ce qu'un jeton soit disponible, puis le consomme."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Session HTTP partagée : connexions keep-alive réutilisées (pool dimensionné pour les threads),
+    réponses compressées et nouvelles tentatives bornées avec attente exponentielle.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=MAX_RETRIES,
+                backoff_factor=RETRY_BACKOFF,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset(['GET']),
+            )
+            adapter = HTTPAdapter(pool_connections=DEFAULT_MAX_WORKERS, pool_maxsize=DEFAULT_MAX_WORKERS * 2,
+                                  max_retries=retry)
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+            _session = session
+        return _session
+
+
+def hal_get(params, base_url=BASE_URL, timeout=DEFAULT_TIMEOUT, limiter=None):
+    """
+    Point d'entrée unique des requêtes vers HAL : attend un jeton du limiteur éventuel,
+    interroge l'API avec la session partagée et renvoie la réponse JSON décodée.
+    Chaque requête est notée dans l'enregistreur courant (voir hal_metrics) : attente du limiteur,
+    durée réseau, décodage JSON, taille, QTime de Solr et nouvelles tentatives.
+    """
+    metrics = current_metrics()
+    wait = 0.0
+    if limiter is not None:
+        start = time.perf_counter()
+        limiter.acquire()
+        wait = time.perf_counter() - start
+
+    start = time.perf_counter()
+    try:
+        response = get_session().get(base_url, params=params, timeout=timeout)
+    except requests.exceptions.RequestException as e:
+        metrics.record_request(base_url, time.perf_counter() - start, wait_seconds=wait, status=type(e).__name__)
+        raise
+    elapsed = time.perf_counter() - start
+    retry_state = getattr(response.raw, 'retries', None)
+    retries = len(retry_state.history) if retry_state is not None else 0
+    if not response.ok:
+        metrics.record_request(base_url, elapsed, wait_seconds=wait, nbytes=len(response.content), retries=retries,
+                               status=response.status_code)
+        response.raise_for_status()
+
+    start = time.perf_counter()
+    data = response.json()
+    decoding = time.perf_counter() - start
+    qtime = data.get('responseHeader', {}).get('QTime') if isinstance(data, dict) else None
+    metrics.record_request(base_url, elapsed, wait_seconds=wait, json_seconds=decoding, nbytes=len(response.content),
+                           qtime=qtime, retries=retries, status=response.status_code)
+    return data
+
+
+def normalize_title(title):
+    """Normalise un titre de revue (espaces multiples, casse) pour les comparaisons."""
+    return ' '.join(title.split()).casefold()
+
+
+def as_list(value):
+    """
+    Les champs multivalués de HAL peuvent arriver sous forme de valeur simple : renvoie toujours une liste
+    ([] pour None). Une liste reçue est renvoyée telle quelle, sans copie : elle ne doit pas être modifiée.
+    """
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    if isinstance(value, tuple):
+        return list(value)
+    return [value]
+
+
+# Identifiants HAL des revues (journalId_i) résolus par hal_journals : {titre normalisé: [id, ...]}.
+# Partagés par tous les threads et sessions du processus : l'identifiant d'un titre ne change pas.
+_journal_ids = {}
+_journal_ids_lock = threading.Lock()
+
+
+def register_journal_ids(journal_ids):
+    """
+    Enregistre des identifiants de revues ({titre: [journalId_i, ...]}) : les requêtes sur ces revues
+    passent alors par un filtre exact sur journalId_i au lieu d'une recherche de phrase sur le titre.
+    """
+    with _journal_ids_lock:
+        for title, ids in journal_ids.items():
+            if ids:
+                _journal_ids[normalize_title(title)] = sorted(set(ids))
+
+
+def journal_ids_for(title):
+    """Identifiants HAL connus d'une revue (liste vide si le titre n'a pas été résolu)."""
+    return _journal_ids.get(normalize_title(title), [])
+
+
+def journals_query(journal_titles):
+    """
+    Construit une requête Solr regroupant plusieurs revues : journalId_i:(1 OR 2 ...) pour les revues
+    dont l'identifiant est connu (voir register_journal_ids), journalTitle_s:("A" OR "B" ...) pour les autres.
+    """
+    ids = sorted({journal_id for title in journal_titles for journal_id in journal_ids_for(title)})
+    titles = [title for title in journal_titles if not journal_ids_for(title)]
+    clauses = []
+    if ids:
+        clauses.append(f"journalId_i:({' OR '.join(map(str, ids))})")
+    if titles:
+        phrases = ' OR '.join('"' + title.replace('"', '\\"') + '"' for title in titles)
+        clauses.append(f'journalTitle_s:({phrases})')
+    return ' OR '.join(clauses)
+
+
+def plan_journal_queries(journals, max_clauses=MAX_CLAUSES_PER_QUERY, max_length=MAX_QUERY_LENGTH):
+    """
+    Découpe une liste de revues en groupes interrogeables en une seule requête.
+    Chaque groupe respecte le nombre maximal de clauses OR et la longueur maximale de la requête encodée.
+    Les doublons (après normalisation) ne sont interrogés qu'une fois.
+    """
+    chunks = []
+    current = []
+    seen = set()
+
+    for title in journals:
+        key = normalize_title(title)
+        if not key or key in seen:
+            continue
+        seen.add(key)
+
+        candidate = current + [title]
+        too_long = len(quote(journals_query(candidate))) > max_length
+        if current and (len(candidate) > max_clauses or too_long):
+            chunks.append(current)
+            candidate = [title]
+        current = candidate
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def attribute_journal(doc, journal_titles):
+    """
+    Retrouve, parmi les revues demandées, celle à laquelle appartient un document
+    à partir de son identifiant de revue (journalId_i) s'il est connu, sinon du champ journalTitle_s renvoyé par HAL.
+    """
+    journal_id = as_list(doc.get('journalId_i'))
+    journal_id = journal_id[0] if journal_id else None
+    if journal_id is not None:
+        for title in journal_titles:
+            if journal_id in journal_ids_for(title):
+                return title
+
+    returned = as_list(doc.get('journalTitle_s'))
+    returned = returned[0] if returned else None
+    if not returned:
+        return 'N/A'
+
+    key = normalize_title(returned)
+    for title in journal_titles:
+        if normalize_title(title) == key:
+            return title
+    return returned
+
+
+def since_filter(since):
+    """
+    Filtre Solr des documents déposés ou modifiés depuis un point de reprise (date ISO UTC),
+    avec un recouvrement de WATERMARK_OVERLAP pour ne rien manquer.
+    """
+    start = f'{since}-{WATERMARK_OVERLAP}'
+    return f'{SUBMITTED_DATE_FIELD}:[{start} TO NOW] OR modifiedDate_tdate:[{start} TO NOW]'
+
+
+def iter_hal_pages(query, fields, page_size=DEFAULT_PAGE_SIZE, base_url=BASE_URL, timeout=DEFAULT_TIMEOUT, limiter=None,
+                   filter_query=None):
+    """
+    Parcourt tous les résultats d'une requête HAL avec la pagination profonde (cursorMark).
+    Génère un tuple (docs, num_found) par page, ce qui évite de garder une réponse géante en mémoire.
+    Le parcours s'arrête dès que numFound documents ont été lus ou que le curseur n'avance plus.
+    Si un limiteur (TokenBucket) est fourni, chaque requête attend son jeton.
+    Un filtre (fq, ou une liste de filtres) optionnel restreint les résultats sans modifier la requête principale.
+    """
+    cursor = '*'
+    fetched = 0
+
+    while True:
+        params = {
+            'q': query,
+            'fl': fields,
+            'rows': page_size,
+            # cursorMark exige un tri stable sur la clé unique
+            'sort': 'docid asc',
+            'cursorMark': cursor,
+        }
+        if filter_query:
+            params['fq'] = filter_query
+        data = hal_get(params, base_url=base_url, timeout=timeout, limiter=limiter)
+
+        docs = data.get('response', {}).get('docs', [])
+        num_found = data.get('response', {}).get('numFound', 0)
+        fetched += len(docs)
+
+        yield docs, num_found
+
+        next_cursor = data.get('nextCursorMark')
+        if not docs or fetched >= num_found or not next_cursor or next_cursor == cursor:
+            break
+        cursor = next_cursor
+
+
+def plan_journal_filters(journals):
+    """Découpe une liste de revues en filtres fq (voir plan_journal_queries), avec les limites d'un filtre."""
+    return plan_journal_queries(journals, max_clauses=MAX_CLAUSES_PER_FILTER, max_length=MAX_FILTER_LENGTH)
+
+
+def iter_journal_pages(journal_titles, fields, page_size=DEFAULT_PAGE_SIZE, base_url=BASE_URL, timeout=DEFAULT_TIMEOUT, limiter=None,
+                       since=None, as_filter=False, filter_query=None):
+    """
+    Interroge HAL pour un groupe de revues en une seule requête OR (voir plan_journal_queries).
+    Génère un tuple (docs, num_found) par page ; chaque document reçoit la clé 'journal'
+    correspondant au titre demandé.
+    Avec since (date ISO UTC), seuls les documents déposés ou modifiés depuis ce point de reprise sont renvoyés.
+    Avec as_filter, les revues forment un filtre fq sur une requête *:* (groupe découpé par plan_journal_filters) :
+    Solr ne calcule pas de score et met le filtre en cache.
+    Un filtre (fq, ou une liste de filtres) supplémentaire peut restreindre encore les résultats.
+    """
+    # journalTitle_s et journalId_i servent à rattacher chaque document à sa revue
+    fields = ','.join(dict.fromkeys(fields.split(',') + ['journalTitle_s', 'journalId_i']))
+
+    filters = [since_filter(since)] if since else []
+    if filter_query:
+        filters += [filter_query] if isinstance(filter_query, str) else list(filter_query)
+    if as_filter:
+        query = '*:*'
+        filters.append(journals_query(journal_titles))
+    else:
+        query = journals_query(journal_titles)
+    pages = iter_hal_pages(query, fields, page_size=page_size, base_url=base_url, timeout=timeout,
+                           limiter=limiter, filter_query=filters or None)
+    for docs, num_found in pages:
+        for doc in docs:
+            doc['journal'] = attribute_journal(doc, journal_titles)
+        yield docs, num_found
+
+
+@timed()
+def get_journal_counts(journals, base_url=BASE_URL, timeout=DEFAULT_TIMEOUT, limiter=None):
+    """
+    Compte les dépôts de chaque revue (numFound par revue) avec des facettes sur journalId_i
+    (revues dont l'identifiant est connu) et journalTitle_s (les autres), sans télécharger
+    de document (rows=0), une requête par groupe de revues.
+    """
+    counts = {}
+    for chunk in plan_journal_queries(journals):
+        params = {
+            'q': journals_query(chunk),
+            'rows': 0,
+            'facet': 'true',
+            'facet.field': ['journalId_i', 'journalTitle_s'],
+            'facet.limit': -1,
+            'facet.mincount': 1,
+            'wt': 'json',
+        }
+        data = hal_get(params, base_url=base_url, timeout=timeout, limiter=limiter)
+        facet_fields = data.get('facet_counts', {}).get('facet_fields', {})
+        by_title = [title for title in chunk if not journal_ids_for(title)]
+
+        # Solr renvoie les facettes sous forme de liste plate [valeur, compte, valeur, compte, ...]
+        values = facet_fields.get('journalId_i', [])
+        for value, count in zip(values[::2], values[1::2]):
+            journal = attribute_journal({'journalId_i': int(value)}, chunk)
+            if journal in chunk and journal not in by_title:
+                counts[journal] = counts.get(journal, 0) + count
+
+        # Les documents trouvés par identifiant ont aussi un titre : seuls les titres cherchés comme tels comptent
+        values = facet_fields.get('journalTitle_s', [])
+        for value, count in zip(values[::2], values[1::2]):
+            if by_title:
+                journal = attribute_journal({'journalTitle_s': value}, by_title)
+                if journal in by_title or not any(journal_ids_for(title) for title in chunk):
+                    counts[journal] = counts.get(journal, 0) + count
+    return counts
+
+
+def stream_journal_chunks(jobs, fields, page_size=DEFAULT_PAGE_SIZE, base_url=BASE_URL, timeout=DEFAULT_TIMEOUT,
+                          max_workers=DEFAULT_MAX_WORKERS, limiter=None):
+    """
+    Récupère plusieurs groupes de revues en parallèle (pool de threads borné), toutes les requêtes
+    passant par le même limiteur de débit. Chaque tâche est un couple (groupe, since), since valant
+    None pour une récolte complète ou un point de reprise pour une synchronisation incrémentale.
+    Génère un tuple (groupe, docs, num_found, erreur, terminé) pour chaque page reçue, dès son arrivée,
+    puis un dernier tuple sans documents avec terminé=True quand le groupe est fini (ou en erreur).
+    Si le générateur est fermé avant la fin, les groupes en attente sont annulés et les groupes
+    en cours s'arrêtent à la page suivante.
+    """
+    if limiter is None:
+        limiter = TokenBucket()
+
+    events = queue.Queue()
+    stop = threading.Event()
+
+    def fetch(chunk, since):
+        num_found = 0
+        try:
+            for docs, num_found in iter_journal_pages(chunk, fields, page_size=page_size, base_url=base_url,
+                                                      timeout=timeout, limiter=limiter, since=since):
+                if stop.is_set():
+                    return
+                events.put((chunk, docs, num_found, None, False))
+        except Exception as e:
+            events.put((chunk, [], 0, e, True))
+            return
+        events.put((chunk, [], num_found, None, True))
+
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        # Chaque thread reçoit une copie du contexte : ses requêtes vont dans l'enregistreur de l'appelant
+        for chunk, since in jobs:
+            pool.submit(contextvars.copy_context().run, fetch, chunk, since)
+        remaining = len(jobs)
+        while remaining:
+            chunk, docs, num_found, error, done = events.get()
+            if error is not None and not isinstance(error, requests.exceptions.RequestException):
+                raise error
+            if done:
+                remaining -= 1
+            yield chunk, docs, num_found, error, done
+    finally:
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def fetch_journal_chunks(jobs, fields, page_size=DEFAULT_PAGE_SIZE, base_url=BASE_URL, timeout=DEFAULT_TIMEOUT,
+                         max_workers=DEFAULT_MAX_WORKERS, limiter=None):
+    """
+    Variante de stream_journal_chunks qui regroupe les pages de chaque groupe de revues.
+    Génère un tuple (groupe, docs, num_found, erreur) dès qu'un groupe est terminé, donc dans le désordre.
+    """
+    pending = {}
+    for chunk, docs, num_found, error, done in stream_journal_chunks(jobs, fields, page_size=page_size,
+                                                                     base_url=base_url, timeout=timeout,
+                                                                     max_workers=max_workers, limiter=limiter):
+        chunk_docs = pending.setdefault(tuple(chunk), [])
+        chunk_docs.extend(docs)
+        if done:
+            del pending[tuple(chunk)]
+            yield chunk, ([] if error else chunk_docs), num_found, error
+
+
+def _monthly_facet_request(query, start_date, base_url, timeout, limiter):
+    """Exécute une requête rows=0 avec facet.range mensuel et renvoie {'AAAA-MM': nombre}."""
+    params = {
+        'q': query,
+        'rows': 0,
+        'facet': 'true',
+        'facet.range': SUBMITTED_DATE_FIELD,
+        'facet.range.start': f'{start_date}T00:00:00Z',
+        'facet.range.end': 'NOW/MONTH+1MONTH',
+        'facet.range.gap': '+1MONTH',
+        'facet.mincount': 1,
+        'wt': 'json',
+    }
+    data = hal_get(params, base_url=base_url, timeout=timeout, limiter=limiter)
+
+    ranges = data.get('facet_counts', {}).get('facet_ranges', {}).get(SUBMITTED_DATE_FIELD, {})
+    values = ranges.get('counts', [])
+    # Les bornes sont renvoyées au format '2025-01-01T00:00:00Z' : on ne garde que l'année et le mois
+    return {value[:7]: count for value, count in zip(values[::2], values[1::2]) if count}
+
+
+@timed()
+def get_monthly_counts(journals, start_date=DEFAULT_FACET_START, per_journal=False, base_url=BASE_URL,
+                       timeout=DEFAULT_TIMEOUT, limiter=None):
+    """
+    Compte les dépôts par mois côté serveur (facet.range sur la date de soumission, rows=0).
+    Sans per_journal, renvoie {'AAAA-MM': nombre} pour toutes les revues réunies (une requête par groupe OR).
+    Avec per_journal, renvoie {revue: {'AAAA-MM': nombre}} (une petite requête par revue).
+    """
+    if per_journal:
+        counts = {}
+        for chunk in plan_journal_queries(journals):
+            for journal in chunk:
+                counts[journal] = _monthly_facet_request(journals_query([journal]), start_date, base_url, timeout, limiter)
+        return counts
+
+    counts = {}
+    for chunk in plan_journal_queries(journals):
+        for month, count in _monthly_facet_request(journals_query(chunk), start_date, base_url, timeout, limiter).items():
+            counts[month] = counts.get(month, 0) + count
+    return dict(sorted(counts.items()))
+
+
+def _contributor_pivot_request(query, pivots, limit, mincount, base_url, timeout, limiter):
+    """Exécute une requête rows=0 avec des facettes pivot et renvoie la liste des pivots par champ."""
+    params = {
+        'q': query,
+        'rows': 0,
+        'facet': 'true',
+        'facet.pivot': pivots,
+        'facet.limit': limit,
+        'facet.pivot.mincount': mincount,
+        'wt': 'json',
+    }
+    data = hal_get(params, base_url=base_url, timeout=timeout, limiter=limiter)
+    return data.get('facet_counts', {}).get('facet_pivot', {})
+
+
+@timed()
+def get_contributor_counts(journals=None, limit=-1, mincount=1, with_journals=False, base_url=BASE_URL,
+                           timeout=DEFAULT_TIMEOUT, limiter=None):
+    """
+    Classement des contributeurs calculé par HAL (facette pivot sur contributorId_i, rows=0),
+    sans télécharger les documents. Sans liste de revues, le classement porte sur tout HAL.
+    Renvoie {contributorId: {'count': n, 'name': nom, 'journals': set()}} ; avec with_journals,
+    un second pivot par revue remplit 'journals'.
+    Avec une limite positive, le classement est tronqué par groupe de revues avant fusion.
+    """
+    name_pivot = 'contributorId_i,contributorFullName_s'
+    journal_pivot = 'contributorId_i,journalTitle_s'
+    pivots = [name_pivot, journal_pivot] if with_journals else [name_pivot]
+
+    chunks = plan_journal_queries(journals) if journals else [None]
+    contributors = {}
+
+    for chunk in chunks:
+        query = journals_query(chunk) if chunk else '*:*'
+        facet_pivot = _contributor_pivot_request(query, pivots, limit, mincount, base_url, timeout, limiter)
+
+        for entry in facet_pivot.get(name_pivot, []):
+            contributor_id = entry.get('value')
+            if not isinstance(contributor_id, int) or contributor_id <= 0:
+                continue
+            details = contributors.setdefault(contributor_id, {'count': 0, 'name': 'N/A', 'journals': set()})
+            details['count'] += entry.get('count', 0)
+            names = entry.get('pivot', [])
+            if names:
+                details['name'] = names[0].get('value', details['name'])
+
+        for entry in facet_pivot.get(journal_pivot, []):
+            details = contributors.get(entry.get('value'))
+            if details is None:
+                continue
+            for sub in entry.get('pivot', []):
+                journal = sub.get('value')
+                details['journals'].add(attribute_journal({'journalTitle_s': journal}, chunk) if chunk else journal)
+
+    return contributors
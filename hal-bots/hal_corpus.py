@@ -0,0 +1,226 @@
+import hashlib
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from hal_analysis import contributors_from_pairs
+from hal_client import as_list
+from hal_duplicates import near_duplicate_clusters
+from hal_metrics import timed
+
+# =========================================================
+# 🧱 CORPUS COMPACT EN COLONNES
+# =========================================================
+# Les documents HAL sont rangés une fois pour toutes en colonnes partagées par toutes les analyses :
+# revues et contributeurs codés en entiers, dates en secondes (datetime64), champs multivalués
+# en tableaux de décalages (offsets), chaînes dans des tableaux Arrow contigus.
+
+def _intern(value, codes, values):
+    """Renvoie le code entier d'une valeur, en l'ajoutant au dictionnaire si elle est nouvelle."""
+    code = codes.get(value)
+    if code is None:
+        code = codes[value] = len(values)
+        values.append(value)
+    return code
+
+
+class Corpus:
+    """
+    Corpus de documents HAL en colonnes. La ligne i correspond au i-ème document ;
+    les contributeurs du document i occupent les positions offsets[i]:offsets[i + 1]
+    des tableaux de codes (IDs et noms sont rangés séparément, comme dans les réponses HAL).
+    """
+
+    def __init__(self, hal_ids, titles, journal_codes, journals, submitted,
+                 id_offsets, id_codes, contributor_ids, name_offsets, name_codes, names):
+        self.hal_ids = hal_ids                  # pa.StringArray
+        self.titles = titles                    # pa.StringArray (premier titre)
+        self.journal_codes = journal_codes      # int32, indices dans journals
+        self.journals = journals                # titres de revues triés
+        self.submitted = submitted              # datetime64[s], NaT si absente
+        self.id_offsets = id_offsets            # int64, len(corpus) + 1
+        self.id_codes = id_codes                # int32, indices dans contributor_ids (-1 : ID invalide)
+        self.contributor_ids = contributor_ids  # int64, IDs HAL distincts
+        self.name_offsets = name_offsets        # int64, len(corpus) + 1
+        self.name_codes = name_codes            # int32, indices dans names
+        self.names = names                      # pa.StringArray, noms distincts
+        self._fingerprint = None
+
+    @classmethod
+    @timed()
+    def from_docs(cls, docs):
+        """Construit le corpus en une seule passe sur des documents HAL (avec la clé 'journal')."""
+        hal_ids, titles, dates, journal_codes = [], [], [], []
+        journal_index, journals = {}, []
+        id_offsets, id_codes, id_index, contributor_ids = [0], [], {}, []
+        name_offsets, name_codes, name_index, names = [0], [], {}, []
+
+        for doc in docs:
+            hal_ids.append(doc.get('halId_s'))
+            doc_titles = as_list(doc.get('title_s'))
+            titles.append(doc_titles[0] if doc_titles else None)
+            dates.append(doc.get('submittedDate_s'))
+            journal_codes.append(_intern(doc.get('journal', 'N/A'), journal_index, journals))
+
+            for contributor_id in as_list(doc.get('contributorId_i')):
+                if isinstance(contributor_id, int) and contributor_id > 0:
+                    id_codes.append(_intern(contributor_id, id_index, contributor_ids))
+                else:
+                    id_codes.append(-1)
+            id_offsets.append(len(id_codes))
+
+            for name in as_list(doc.get('contributorFullName_s')):
+                name_codes.append(_intern(name, name_index, names))
+            name_offsets.append(len(name_codes))
+
+        # Revues rangées par ordre alphabétique : l'ordre des codes est celui des titres
+        order = np.argsort(np.array(journals, dtype=object)) if journals else np.array([], dtype=np.int64)
+        remap = np.empty(len(journals), dtype=np.int32)
+        remap[order] = np.arange(len(journals), dtype=np.int32)
+
+        return cls(
+            hal_ids=pa.array(hal_ids, type=pa.string()),
+            titles=pa.array(titles, type=pa.string()),
+            journal_codes=remap[np.asarray(journal_codes, dtype=np.int64)] if journal_codes else np.empty(0, np.int32),
+            journals=[journals[i] for i in order],
+            submitted=pd.to_datetime(pd.Series(dates, dtype=object), errors='coerce', format='ISO8601')
+                        .to_numpy('datetime64[s]'),
+            id_offsets=np.asarray(id_offsets, dtype=np.int64),
+            id_codes=np.asarray(id_codes, dtype=np.int32),
+            contributor_ids=np.asarray(contributor_ids, dtype=np.int64),
+            name_offsets=np.asarray(name_offsets, dtype=np.int64),
+            name_codes=np.asarray(name_codes, dtype=np.int32),
+            names=pa.array(names, type=pa.string()),
+        )
+
+    def __len__(self):
+        return len(self.journal_codes)
+
+    def memory_usage(self):
+        """Taille en octets de chaque colonne du corpus."""
+        usage = {
+            name: getattr(self, name).nbytes
+            for name in ('hal_ids', 'titles', 'journal_codes', 'submitted', 'id_offsets', 'id_codes',
+                         'contributor_ids', 'name_offsets', 'name_codes', 'names')
+        }
+        usage['journals'] = sum(sys.getsizeof(j) for j in self.journals)
+        return usage
+
+    def fingerprint(self):
+        """
+        Empreinte du contenu du corpus (BLAKE2b de toutes les colonnes), calculée une seule fois :
+        deux corpus identiques ont la même empreinte, quel que soit le moment de leur récolte.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(repr((len(self), len(self.id_codes), len(self.name_codes), len(self.names))).encode())
+            for array in (self.hal_ids, self.titles, self.names):
+                for buffer in array.buffers():
+                    if buffer is not None:
+                        digest.update(memoryview(buffer))
+            for array in (self.journal_codes, self.submitted.view(np.int64), self.id_offsets, self.id_codes,
+                          self.contributor_ids, self.name_offsets, self.name_codes):
+                digest.update(np.ascontiguousarray(array).data)
+            digest.update('\x1f'.join(self.journals).encode('utf-8'))
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    @property
+    def nbytes(self):
+        """Empreinte mémoire totale du corpus, en octets."""
+        return sum(self.memory_usage().values())
+
+    def contributor_pairs(self):
+        """
+        Table (doc, id, name, journal) attendue par hal_analysis.contributors_from_pairs :
+        IDs et noms appariés position par position (tronqués à la plus courte des deux listes),
+        seuls les IDs valides étant retenus.
+        """
+        nb_ids = np.diff(self.id_offsets)
+        nb_names = np.diff(self.name_offsets)
+        nb_pairs = np.minimum(nb_ids, nb_names)
+
+        doc = np.repeat(np.arange(len(self), dtype=np.int64), nb_pairs)
+        starts = np.cumsum(nb_pairs) - nb_pairs
+        position = np.arange(len(doc), dtype=np.int64) - np.repeat(starts, nb_pairs)
+
+        id_codes = self.id_codes[self.id_offsets[doc] + position]
+        name_codes = self.name_codes[self.name_offsets[doc] + position]
+        valid = id_codes >= 0
+        doc, id_codes, name_codes = doc[valid], id_codes[valid], name_codes[valid]
+
+        names = self.names.to_numpy(zero_copy_only=False)
+        return pd.DataFrame({
+            'doc': doc,
+            'id': self.contributor_ids[id_codes],
+            'name': names[name_codes] if len(names) else np.empty(0, dtype=object),
+            'journal': pd.Categorical.from_codes(self.journal_codes[doc], categories=self.journals),
+        })
+
+    @timed()
+    def contributors(self):
+        """Décompte des contributeurs (mêmes colonnes que hal_analysis.contributors_by_columns)."""
+        return contributors_from_pairs(self.contributor_pairs())
+
+    @timed()
+    def deposit_times(self):
+        """
+        Tableaux alignés (ID HAL, date de dépôt en secondes) : une ligne par contributeur valide
+        d'un document daté, pour hal_bursts.detect_bursts.
+        """
+        doc = np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.id_offsets))
+        valid = (self.id_codes >= 0) & ~np.isnat(self.submitted[doc])
+        return self.contributor_ids[self.id_codes[valid]], self.submitted[doc[valid]].astype(np.int64)
+
+    @timed()
+    def near_duplicate_titles(self, **kwargs):
+        """Groupes de titres quasi identiques du corpus (voir hal_duplicates.near_duplicate_clusters)."""
+        return near_duplicate_clusters(
+            self.hal_ids.to_pylist(),
+            self.titles.to_pylist(),
+            np.asarray(self.journals, dtype=object)[self.journal_codes] if len(self) else [],
+            pd.Series(self.submitted),
+            **kwargs,
+        )
+
+    def _dated(self, start_date=None):
+        """Masque des documents datés, postérieurs à start_date si elle est donnée."""
+        mask = ~np.isnat(self.submitted)
+        if start_date is not None:
+            mask &= self.submitted >= np.datetime64(pd.to_datetime(start_date), 's')
+        return mask
+
+    @timed()
+    def monthly_counts(self, start_date=None):
+        """Nombre de dépôts par mois (série indexée par période), à partir de start_date si elle est donnée."""
+        dates = self.submitted[self._dated(start_date)]
+        months = pd.PeriodIndex(dates.astype('datetime64[M]'), freq='M')
+        return months.value_counts().sort_index()
+
+    @timed()
+    def monthly_counts_by_journal(self, start_date=None):
+        """Tableau mois × revue du nombre de dépôts, à partir de start_date si elle est donnée."""
+        mask = self._dated(start_date)
+        frame = pd.DataFrame({
+            'month': pd.PeriodIndex(self.submitted[mask].astype('datetime64[M]'), freq='M'),
+            'journal': np.asarray(self.journals, dtype=object)[self.journal_codes[mask]] if mask.any() else [],
+        })
+        return frame.value_counts().unstack(fill_value=0).sort_index()
+
+
+def docs_nbytes(docs):
+    """
+    Estimation de la mémoire occupée par une liste de documents HAL en dictionnaires Python
+    (liste, dictionnaires, valeurs et éléments des listes ; les clés, partagées, ne sont pas comptées).
+    Sert de point de comparaison pour Corpus.nbytes.
+    """
+    total = sys.getsizeof(docs)
+    for doc in docs:
+        total += sys.getsizeof(doc)
+        for value in doc.values():
+            total += sys.getsizeof(value)
+            if isinstance(value, (list, tuple)):
+                total += sum(sys.getsizeof(item) for item in value)
+    return total
@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+import requests
+
+from hal_client import BASE_URL, DEFAULT_TIMEOUT, JOURNAL_LIST, SUBMITTED_DATE_FIELD, TokenBucket, hal_get
+from hal_metrics import timed
+
+# =========================================================
+# 🧭 DÉCOUVERTE AUTOMATIQUE DES REVUES SUSPECTES
+# =========================================================
+# Plutôt qu'une liste de revues tenue à la main, HAL renvoie lui-même (rows=0, facettes)
+# les revues les plus déposées sur une période, avec leur éditeur et leurs principaux
+# contributeurs. Les revues sont classées par vitesse de dépôt et par concentration des
+# dépôts sur quelques comptes : deux requêtes, quel que soit le nombre de revues couvertes.
+
+# Période observée (jours), nombre de revues renvoyées et seuil de dépôts sur la période
+DEFAULT_DISCOVERY_DAYS = 90
+DEFAULT_DISCOVERY_TOP = 200
+DEFAULT_DISCOVERY_MIN_DEPOSITS = 20
+
+# Contributeurs détaillés par revue pour mesurer la concentration
+DEFAULT_DISCOVERY_CONTRIBUTORS = 5
+
+# Nombre de revues demandées pour la période précédente (les revues absentes y comptent 0 dépôt)
+BASELINE_FACTOR = 5
+
+# Classement écrit par les scripts (--decouverte) et nombre de revues découvertes retenues par défaut
+DISCOVERY_FILENAME = 'revues_suspectes.csv'
+DEFAULT_DISCOVERED_JOURNALS = 50
+
+DISCOVERY_COLUMNS = [
+    'Revue', 'Éditeur', 'Dépôts Période', 'Dépôts/Jour', 'Dépôts Période Précédente', 'Croissance',
+    'Part 1er Contributeur', 'Concentration (HHI)', 'Score',
+]
+
+
+def _window_filter(days, offset=0):
+    """Filtre Solr des dépôts des days jours précédant NOW - offset jours (bornes arrondies au jour)."""
+    end = f'NOW/DAY-{offset}DAYS' if offset else 'NOW'
+    return f'{SUBMITTED_DATE_FIELD}:[NOW/DAY-{days + offset}DAYS TO {end}]'
+
+
+def _facet_values(values):
+    """Convertit une facette Solr à plat [valeur, compte, ...] en dictionnaire {valeur: compte}."""
+    return dict(zip(values[::2], values[1::2]))
+
+
+@timed()
+def discover_suspect_journals(days=DEFAULT_DISCOVERY_DAYS, top=DEFAULT_DISCOVERY_TOP,
+                              min_deposits=DEFAULT_DISCOVERY_MIN_DEPOSITS,
+                              contributors=DEFAULT_DISCOVERY_CONTRIBUTORS, base_url=BASE_URL,
+                              timeout=DEFAULT_TIMEOUT, limiter=None):
+    """
+    Classe les revues de tout HAL les plus déposées sur les days derniers jours (tout HAL sans limite
+    de date si days vaut None), sans télécharger de document :
+      - une requête rows=0 avec des facettes pivot revue → éditeur et revue → contributeurs ;
+      - une requête rows=0 sur la période précédente de même durée, pour la croissance.
+    Vitesse : dépôts par jour sur la période. Concentration : part du premier contributeur et indice
+    de Herfindahl (somme des carrés des parts) calculé sur les contributors premiers contributeurs.
+    Score = dépôts par jour × part du premier contributeur. Renvoie un tableau trié par score décroissant.
+    """
+    params = {
+        'q': '*:*',
+        'rows': 0,
+        'facet': 'true',
+        'facet.pivot': ['journalTitle_s,journalPublisher_s', 'journalTitle_s,contributorId_i'],
+        'facet.pivot.mincount': 1,
+        'f.journalTitle_s.facet.limit': top,
+        'f.journalPublisher_s.facet.limit': 1,
+        'f.contributorId_i.facet.limit': contributors,
+        'wt': 'json',
+    }
+    if days:
+        params['fq'] = _window_filter(days)
+    data = hal_get(params, base_url=base_url, timeout=timeout, limiter=limiter)
+    pivots = data.get('facet_counts', {}).get('facet_pivot', {})
+
+    publishers = {
+        entry.get('value'): (entry.get('pivot') or [{}])[0].get('value', 'N/A')
+        for entry in pivots.get('journalTitle_s,journalPublisher_s', [])
+    }
+    rows = []
+    for entry in pivots.get('journalTitle_s,contributorId_i', []):
+        journal, count = entry.get('value'), entry.get('count', 0)
+        if not journal or count < min_deposits:
+            continue
+        shares = np.array([sub.get('count', 0) for sub in entry.get('pivot', [])], dtype=np.float64) / count
+        rows.append({
+            'Revue': journal,
+            'Éditeur': publishers.get(journal, 'N/A'),
+            'Dépôts Période': count,
+            'Part 1er Contributeur': round(float(shares.max()), 3) if len(shares) else 0.0,
+            'Concentration (HHI)': round(float((shares ** 2).sum()), 3),
+        })
+    frame = pd.DataFrame(rows, columns=['Revue', 'Éditeur', 'Dépôts Période', 'Part 1er Contributeur',
+                                        'Concentration (HHI)'])
+    if frame.empty:
+        return pd.DataFrame(columns=DISCOVERY_COLUMNS)
+
+    if days:
+        baseline_params = {
+            'q': '*:*',
+            'rows': 0,
+            'fq': _window_filter(days, offset=days),
+            'facet': 'true',
+            'facet.field': 'journalTitle_s',
+            'facet.limit': top * BASELINE_FACTOR,
+            'facet.mincount': 1,
+            'wt': 'json',
+        }
+        baseline_data = hal_get(baseline_params, base_url=base_url, timeout=timeout, limiter=limiter)
+        baseline = _facet_values(baseline_data.get('facet_counts', {}).get('facet_fields', {}).get('journalTitle_s', []))
+        frame['Dépôts/Jour'] = (frame['Dépôts Période'] / days).round(2)
+        frame['Dépôts Période Précédente'] = frame['Revue'].map(baseline).fillna(0).astype(int)
+        frame['Croissance'] = (frame['Dépôts Période'] / frame['Dépôts Période Précédente'].clip(lower=1)).round(2)
+    else:
+        frame['Dépôts/Jour'] = np.nan
+        frame['Dépôts Période Précédente'] = 0
+        frame['Croissance'] = np.nan
+
+    velocity = frame['Dépôts/Jour'] if days else frame['Dépôts Période']
+    frame['Score'] = (velocity * frame['Part 1er Contributeur']).round(3)
+    return frame.sort_values('Score', ascending=False, kind='stable').reset_index(drop=True)[DISCOVERY_COLUMNS]
+
+
+def suspect_journal_titles(discovered, n=None):
+    """Titres des n revues les mieux classées par discover_suspect_journals (toutes si n vaut None)."""
+    return discovered['Revue'].head(n).tolist() if n is not None else discovered['Revue'].tolist()
+
+
+def discover_journals(days, nb_journals=DEFAULT_DISCOVERED_JOURNALS, output_filename=DISCOVERY_FILENAME):
+    """
+    Pour les scripts : remplace la liste fixe par les revues suspectes découvertes par facettes HAL,
+    dont le classement est écrit dans output_filename. Renvoie les nb_journals premiers titres
+    (la liste fixe JOURNAL_LIST si HAL ne répond pas ou si aucune revue n'est retenue).
+    """
+    print("Découverte des revues suspectes par facettes HAL...")
+    try:
+        discovered = discover_suspect_journals(days=days or None, limiter=TokenBucket())
+    except requests.exceptions.RequestException as e:
+        print(f"Erreur lors de la découverte des revues : {e} ; utilisation de la liste fixe.")
+        return JOURNAL_LIST
+    discovered.to_csv(output_filename, index=False, encoding='utf-8')
+    titles = suspect_journal_titles(discovered, nb_journals)
+    print(f"{len(discovered)} revue(s) classée(s) dans '{output_filename}', {len(titles)} retenue(s) pour l'analyse.")
+    if not titles:
+        # Une liste vide ferait parcourir tout HAL (journals vide) ou ne rien analyser selon le script
+        print("Aucune revue suspecte découverte sur cette période ; utilisation de la liste fixe.")
+        return JOURNAL_LIST
+    return titles
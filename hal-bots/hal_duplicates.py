@@ -0,0 +1,195 @@
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from hal_metrics import timed
+
+# =========================================================
+# 🪞 TITRES QUASI IDENTIQUES (MINHASH + LSH)
+# =========================================================
+# Les dépôts sauvages en masse réutilisent souvent des titres gabarits. Comparer tous les titres
+# deux à deux est quadratique : chaque titre est découpé en fragments de caractères (shingles),
+# résumé par une signature MinHash, puis rangé dans des seaux par bandes de signature (LSH).
+# Seuls les titres partageant un seau sont comparés : le coût reste à peu près linéaire.
+
+# Longueur des fragments de caractères
+DEFAULT_SHINGLE_SIZE = 5
+
+# Nombre de fonctions de hachage de la signature, et découpage en bandes × lignes
+# (16 bandes de 8 lignes : deux titres de similarité ~0.7 ont une chance sur deux de partager un seau)
+DEFAULT_NUM_PERM = 128
+DEFAULT_BANDS = 16
+
+# Similarité de Jaccard estimée minimale pour rapprocher deux titres
+DEFAULT_SIMILARITY = 0.7
+
+# Nombre maximal de fragments hachés ensemble (borne la mémoire du calcul des signatures)
+SIGNATURE_BATCH_SHINGLES = 20_000
+
+# Permutations par hachage multiplicatif (a * x + b) >> 32 sur 64 bits, a impair : aucun modulo,
+# le débordement des entiers non signés numpy fait office de réduction modulo 2**64
+_SEED = 42
+_EMPTY = np.iinfo(np.uint32).max
+
+CLUSTER_COLUMNS = ['Groupe', 'Taille Groupe', 'halId_s', 'Titre', 'Revue', 'Date Soumission']
+
+
+def normalize_title(title):
+    """Titre en minuscules, sans accents ni ponctuation, espaces réduits."""
+    text = unicodedata.normalize('NFKD', title or '').encode('ascii', 'ignore').decode('ascii').casefold()
+    return ' '.join(re.sub(r'[^0-9a-z]+', ' ', text).split())
+
+
+def title_shingles(texts, size=DEFAULT_SHINGLE_SIZE):
+    """
+    Fragments de size caractères (size <= 8) de titres déjà normalisés, calculés en tableaux :
+    chaque fragment est la valeur entière de ses octets. Un titre plus court que size forme un seul
+    fragment (complété par des espaces), un titre vide aucun.
+    Renvoie (valeurs uint64, nombre de fragments par titre).
+    """
+    encoded = [text.encode('ascii').ljust(size) if text else b'' for text in texts]
+    lengths = np.fromiter((len(text) for text in encoded), dtype=np.int64, count=len(encoded))
+    counts = np.maximum(lengths - size + 1, 0)
+    if not counts.any():
+        return np.empty(0, dtype=np.uint64), counts
+
+    buffer = np.frombuffer(b''.join(encoded), dtype=np.uint8).astype(np.uint64)
+    title_starts = np.cumsum(lengths) - lengths
+    gram_starts = np.cumsum(counts) - counts
+    positions = np.repeat(title_starts, counts) + np.arange(counts.sum()) - np.repeat(gram_starts, counts)
+    values = np.zeros(len(positions), dtype=np.uint64)
+    for k in range(size):
+        values |= buffer[positions + k] << np.uint64(8 * k)
+    return values, counts
+
+
+def minhash_signatures(titles, num_perm=DEFAULT_NUM_PERM, shingle_size=DEFAULT_SHINGLE_SIZE):
+    """
+    Matrice (nb titres × num_perm) des signatures MinHash (uint32). Les titres sont traités par lots
+    d'au plus SIGNATURE_BATCH_SHINGLES fragments : un lot forme une matrice (permutations × fragments)
+    réduite par titre avec np.minimum.reduceat. Les titres vides gardent la valeur maximale partout
+    (ils ne sont rapprochés de rien).
+    """
+    rng = np.random.default_rng(_SEED)
+    a = rng.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64, endpoint=True) | np.uint64(1)
+    b = rng.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64, endpoint=True)
+
+    # Les titres identiques après normalisation (fréquents dans les dépôts en masse) ne sont hachés qu'une fois
+    texts, inverse = np.unique(np.array([normalize_title(title) for title in titles], dtype=object), return_inverse=True)
+    signatures = np.full((len(texts), num_perm), _EMPTY, dtype=np.uint32)
+    values, counts = title_shingles(texts, shingle_size)
+    gram_ends = np.cumsum(counts)
+
+    first = 0
+    while first < len(texts):
+        # Lot de titres consécutifs totalisant au plus SIGNATURE_BATCH_SHINGLES fragments (au moins un titre)
+        base = gram_ends[first - 1] if first else 0
+        last = max(int(np.searchsorted(gram_ends, base + SIGNATURE_BATCH_SHINGLES, side='right')), first + 1)
+        rows = np.arange(first, last)[counts[first:last] > 0]
+        if len(rows):
+            grams = values[base:gram_ends[last - 1]]
+            with np.errstate(over='ignore'):
+                permuted = a[:, None] * grams[None, :]
+                permuted += b[:, None]
+            permuted >>= np.uint64(32)
+            starts = gram_ends[rows] - counts[rows] - base
+            signatures[rows] = np.minimum.reduceat(permuted, starts, axis=1).T
+        first = last
+    return signatures[inverse.ravel()]
+
+
+def _connected_components(nb_nodes, sources, targets):
+    """Étiquette de composante (plus petit indice) de chaque nœud, par propagation des minima sur les arêtes."""
+    labels = np.arange(nb_nodes, dtype=np.int64)
+    if len(sources) == 0:
+        return labels
+    while True:
+        edge_min = np.minimum(labels[sources], labels[targets])
+        updated = labels.copy()
+        np.minimum.at(updated, sources, edge_min)
+        np.minimum.at(updated, targets, edge_min)
+        # Saut de pointeurs : chaque nœud adopte l'étiquette de son étiquette
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def near_duplicate_labels(signatures, bands=DEFAULT_BANDS, similarity=DEFAULT_SIMILARITY):
+    """
+    Regroupe les titres dont les signatures partagent au moins une bande (index LSH) et dont la
+    similarité de Jaccard estimée (part de valeurs égales) atteint similarity.
+    Dans chaque seau, chaque titre n'est comparé qu'au premier : le nombre de comparaisons est
+    linéaire. Renvoie un numéro de groupe par titre (-1 pour un titre sans quasi-doublon).
+    """
+    nb_titles, num_perm = signatures.shape
+    rows = num_perm // bands
+    present = np.flatnonzero(signatures[:, 0] != _EMPTY)
+    sources, targets = [], []
+
+    for band in range(bands):
+        # Clé de seau : les lignes de la bande vues comme une seule valeur binaire
+        block = np.ascontiguousarray(signatures[present, band * rows:(band + 1) * rows])
+        keys = block.view(np.dtype((np.void, block.dtype.itemsize * rows))).ravel()
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        heads = present[first[inverse]]
+        members = present
+        candidate = heads != members
+        if not candidate.any():
+            continue
+        heads, members = heads[candidate], members[candidate]
+        estimated = (signatures[heads] == signatures[members]).mean(axis=1)
+        similar = estimated >= similarity
+        sources.append(heads[similar])
+        targets.append(members[similar])
+
+    sources = np.concatenate(sources) if sources else np.empty(0, dtype=np.int64)
+    targets = np.concatenate(targets) if targets else np.empty(0, dtype=np.int64)
+    components = _connected_components(nb_titles, sources, targets)
+
+    # Numérotation des groupes d'au moins deux titres, les plus gros en premier
+    roots, inverse, sizes = np.unique(components, return_inverse=True, return_counts=True)
+    order = np.argsort(-sizes, kind='stable')
+    group_of_root = np.full(len(roots), -1, dtype=np.int64)
+    multi = order[sizes[order] > 1]
+    group_of_root[multi] = np.arange(len(multi))
+    return group_of_root[inverse]
+
+
+@timed()
+def near_duplicate_clusters(hal_ids, titles, journals, submitted, bands=DEFAULT_BANDS, similarity=DEFAULT_SIMILARITY,
+                            num_perm=DEFAULT_NUM_PERM, shingle_size=DEFAULT_SHINGLE_SIZE):
+    """
+    Groupes de titres quasi identiques à partir de colonnes alignées (identifiant, titre, revue, date).
+    Une ligne par dépôt appartenant à un groupe, les plus gros groupes en premier.
+    """
+    titles = list(titles)
+    if not titles:
+        return pd.DataFrame(columns=CLUSTER_COLUMNS)
+    labels = near_duplicate_labels(minhash_signatures(titles, num_perm, shingle_size), bands=bands, similarity=similarity)
+    frame = pd.DataFrame({
+        'Groupe': labels,
+        'halId_s': list(hal_ids),
+        'Titre': titles,
+        'Revue': list(journals),
+        'Date Soumission': list(submitted),
+    })
+    frame = frame[frame['Groupe'] >= 0]
+    frame.insert(1, 'Taille Groupe', frame['Groupe'].map(frame['Groupe'].value_counts()))
+    return frame.sort_values(['Groupe', 'Date Soumission'], kind='stable').reset_index(drop=True)[CLUSTER_COLUMNS]
+
+
+def cluster_summary(clusters):
+    """Un groupe par ligne : taille, titre exemple, revues et période de dépôt."""
+    if clusters.empty:
+        return pd.DataFrame(columns=['Groupe', 'Taille Groupe', 'Titre Exemple', 'Revues', 'Premier Dépôt', 'Dernier Dépôt'])
+    grouped = clusters.groupby('Groupe', sort=True)
+    return pd.DataFrame({
+        'Taille Groupe': grouped.size(),
+        'Titre Exemple': grouped['Titre'].first(),
+        'Revues': grouped['Revue'].agg(lambda journals: ', '.join(sorted(set(journals)))),
+        'Premier Dépôt': grouped['Date Soumission'].min(),
+        'Dernier Dépôt': grouped['Date Soumission'].max(),
+    }).reset_index()
@@ -0,0 +1,152 @@
+import difflib
+
+import pandas as pd
+import requests
+
+from hal_client import (API_ROOT, DEFAULT_TIMEOUT, TokenBucket, as_list, iter_hal_pages, normalize_title,
+                        plan_journal_queries, register_journal_ids)
+from hal_duplicates import normalize_title as loose_title
+from hal_metrics import timed
+from hal_store import JOURNAL_IDS_MAX_AGE, connect, load_journal_ids, save_journal_ids
+
+# =========================================================
+# 🪪 INDEX DES IDENTIFIANTS DE REVUES (RÉFÉRENTIEL HAL)
+# =========================================================
+# Les titres de revues saisis à la main comportent des variantes (casse, espaces, ponctuation,
+# doublons). Chaque titre est résolu une fois en identifiants HAL (journalId_i) grâce au
+# référentiel des revues, puis la résolution est conservée dans la base locale : les récoltes
+# interrogent ensuite un filtre exact sur un entier au lieu d'une phrase sur le titre.
+
+REF_JOURNAL_URL = f"{API_ROOT}/ref/journal/"
+
+# Champ texte du référentiel interrogé par phrase, et champs renvoyés
+REF_TITLE_FIELD = 'title_t'
+REF_FIELDS = 'docid,title_s,valid_s'
+
+# Similarité minimale (difflib, sur les titres sans accents ni ponctuation) d'une correspondance approchée
+FUZZY_CUTOFF = 0.92
+
+INDEX_COLUMNS = ['Revue', 'Identifiants HAL', 'Titres HAL', 'Méthode']
+
+
+def ref_query(journal_titles):
+    """Requête du référentiel regroupant plusieurs titres : title_t:("A" OR "B" ...)."""
+    phrases = ' OR '.join('"' + ' '.join(title.split()).replace('"', '\\"') + '"' for title in journal_titles)
+    return f'{REF_TITLE_FIELD}:({phrases})'
+
+
+def match_journal_records(journal_titles, records, cutoff=FUZZY_CUTOFF, other_titles=()):
+    """
+    Rapproche chaque titre demandé des notices du référentiel (docid, title_s) :
+    titre identique ('exact'), identique après normalisation de la casse, des espaces, des accents
+    et de la ponctuation ('normalisé'), ou à défaut la seule notice au-delà de cutoff ('approché').
+    Une correspondance approchée ne peut pas prendre une notice qui correspond à un autre titre demandé
+    (ici ou dans other_titles) ; si plusieurs notices dépassent cutoff, le titre reste non résolu
+    et sera interrogé par son titre.
+    Un titre peut correspondre à plusieurs notices (revue enregistrée plusieurs fois dans HAL).
+    Renvoie {titre: [(journal_id, titre HAL, méthode), ...]}.
+    """
+    by_loose = {}
+    for record in records:
+        hal_title = as_list(record.get('title_s'))
+        hal_title = hal_title[0] if hal_title else None
+        if isinstance(record.get('docid'), int) and hal_title:
+            by_loose.setdefault(loose_title(hal_title), []).append((record['docid'], hal_title))
+
+    # Notices réservées aux titres demandés qui leur correspondent après normalisation
+    requested = {loose_title(title) for title in [*journal_titles, *other_titles]}
+    unclaimed = [key for key in by_loose if key not in requested]
+
+    matches = {}
+    for title in journal_titles:
+        key = loose_title(title)
+        method = 'normalisé'
+        candidates = by_loose.get(key, [])
+        if not candidates:
+            close = difflib.get_close_matches(key, unclaimed, n=2, cutoff=cutoff)
+            candidates = by_loose[close[0]] if len(close) == 1 else []
+            method = 'approché'
+        matches[title] = sorted(
+            (journal_id, hal_title, 'exact' if hal_title == title else method)
+            for journal_id, hal_title in candidates
+        )
+    return matches
+
+
+@timed()
+def resolve_journal_ids(conn, journals, max_age=JOURNAL_IDS_MAX_AGE, base_url=REF_JOURNAL_URL,
+                        timeout=DEFAULT_TIMEOUT, limiter=None):
+    """
+    Résout des titres de revues en identifiants HAL. Les titres sont dédoublonnés après normalisation ;
+    ceux déjà résolus depuis moins de max_age secondes sont lus dans la base locale, les autres sont
+    cherchés dans le référentiel par groupes de titres, puis enregistrés (même introuvables).
+    Renvoie {titre: [journalId_i, ...]}, liste vide pour un titre non résolu.
+    """
+    keys = {}
+    for title in journals:
+        if normalize_title(title):
+            keys.setdefault(normalize_title(title), title)
+    resolved = load_journal_ids(conn, keys, max_age=max_age)
+    missing = [title for key, title in keys.items() if key not in resolved]
+
+    for chunk in plan_journal_queries(missing):
+        try:
+            records = [
+                record
+                for docs, _ in iter_hal_pages(ref_query(chunk), REF_FIELDS, base_url=base_url, timeout=timeout,
+                                              limiter=limiter)
+                for record in docs
+            ]
+        except requests.exceptions.RequestException as e:
+            # Non enregistrés : ces titres seront cherchés de nouveau la prochaine fois
+            print(f"Erreur lors de la résolution des revues ({', '.join(chunk)}): {e}")
+            continue
+        for title, matches in match_journal_records(chunk, records, other_titles=journals).items():
+            save_journal_ids(conn, normalize_title(title), matches)
+            resolved[normalize_title(title)] = matches
+
+    return {
+        title: [journal_id for journal_id, _, _ in resolved.get(normalize_title(title), [])]
+        for title in journals
+    }
+
+
+def use_journal_index(conn, journals, **kwargs):
+    """
+    Résout les titres (voir resolve_journal_ids) et enregistre les identifiants trouvés auprès de
+    hal_client : les requêtes suivantes sur ces revues filtrent sur journalId_i.
+    Renvoie {titre: [journalId_i, ...]}.
+    """
+    journal_ids = resolve_journal_ids(conn, journals, **kwargs)
+    register_journal_ids(journal_ids)
+    return journal_ids
+
+
+def resolve_journals(journals, limiter=None):
+    """
+    Pour les scripts : résout les titres de revues en identifiants HAL (index conservé dans la base
+    locale) et affiche le bilan ; les requêtes suivantes filtrent sur journalId_i plutôt que sur le titre.
+    Renvoie {titre: [journalId_i, ...]}.
+    """
+    conn = connect()
+    journal_ids = use_journal_index(conn, journals, limiter=limiter or TokenBucket())
+    conn.close()
+    print(f"{sum(1 for ids in journal_ids.values() if ids)}/{len(journal_ids)} revue(s) interrogée(s) par identifiant HAL.")
+    return journal_ids
+
+
+def journal_index_frame(conn, journals):
+    """Tableau de la résolution de chaque revue (identifiants, titres HAL et méthode), lu dans la base locale."""
+    keys = {normalize_title(title): title for title in journals if normalize_title(title)}
+    resolved = load_journal_ids(conn, keys, max_age=None)
+    rows = []
+    for key, title in keys.items():
+        matches = resolved.get(key)
+        rows.append({
+            'Revue': title,
+            'Identifiants HAL': ', '.join(str(journal_id) for journal_id, _, _ in matches or []),
+            'Titres HAL': ' | '.join(sorted({hal_title for _, hal_title, _ in matches or []})),
+            'Méthode': ', '.join(sorted({method for _, _, method in matches})) if matches
+                       else ('introuvable' if matches is not None else 'non résolue'),
+        })
+    return pd.DataFrame(rows, columns=INDEX_COLUMNS)
@@ -0,0 +1,196 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd
+
+# =========================================================
+# 🩺 INSTRUMENTATION (REQUÊTES HAL ET ÉTAPES D'ANALYSE)
+# =========================================================
+# Chaque requête HAL (hal_client.hal_get) note sa durée réseau, l'attente du limiteur de débit,
+# le décodage JSON, la taille de la réponse, le QTime de Solr et les nouvelles tentatives ;
+# les fonctions d'analyse notent la durée de chaque appel (timed, stage). Les mesures vont dans
+# l'enregistreur courant, fixé par use_metrics : un par exécution de l'application, un par script
+# lancé avec --log-json. Hors use_metrics, l'enregistreur par défaut ne garde rien : un processus
+# de longue durée (serveur Streamlit, processus de travail) n'accumule pas de mesures.
+# Avec configure_json_log, chaque mesure est aussi écrite en JSON, une par ligne.
+
+REQUEST_COLUMNS = [
+    'Début (s)', 'URL', 'Durée Réseau (s)', 'Attente Débit (s)', 'Décodage JSON (s)', 'Octets', 'QTime (ms)',
+    'Nouvelles Tentatives', 'Statut',
+]
+STAGE_COLUMNS = ['Étape', 'Appels', 'Durée Totale (s)', 'Durée Moyenne (s)', 'Durée Max (s)']
+
+# Journal JSON des mesures (inactif tant que configure_json_log n'a pas été appelé)
+logger = logging.getLogger('hal_metrics')
+_json_log_path = None
+
+
+class Metrics:
+    """Mesures d'une exécution (requêtes et étapes), alimentées depuis plusieurs threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.requests = []
+        self.stages = []
+
+    def record_request(self, url, seconds, wait_seconds=0.0, json_seconds=0.0, nbytes=0, qtime=None, retries=None,
+                       status=None):
+        """Note une requête HAL : durée réseau, attente du limiteur, décodage JSON, taille, QTime, nouvelles tentatives."""
+        event = {
+            'event': 'request', 'offset': round(time.perf_counter() - self.started, 4), 'url': url,
+            'seconds': round(seconds, 4), 'wait_seconds': round(wait_seconds, 4), 'json_seconds': round(json_seconds, 4),
+            'bytes': nbytes, 'qtime_ms': qtime, 'retries': retries, 'status': status,
+        }
+        self._keep(self.requests, event)
+        _log(event)
+
+    def record_stage(self, name, seconds):
+        """Note la durée d'un appel d'une étape d'analyse."""
+        event = {'event': 'stage', 'offset': round(time.perf_counter() - self.started, 4), 'stage': name,
+                 'seconds': round(seconds, 4)}
+        self._keep(self.stages, event)
+        _log(event)
+
+    def _keep(self, events, event):
+        with self.lock:
+            events.append(event)
+
+    def request_frame(self):
+        """Tableau des requêtes notées, dans l'ordre d'arrivée."""
+        with self.lock:
+            requests = list(self.requests)
+        return pd.DataFrame([
+            [r['offset'], r['url'], r['seconds'], r['wait_seconds'], r['json_seconds'], r['bytes'], r['qtime_ms'],
+             r['retries'], r['status']]
+            for r in requests
+        ], columns=REQUEST_COLUMNS)
+
+    def stage_frame(self):
+        """Durées des étapes agrégées par nom (les étapes imbriquées comptent aussi dans leur étape parente)."""
+        with self.lock:
+            stages = list(self.stages)
+        if not stages:
+            return pd.DataFrame(columns=STAGE_COLUMNS)
+        frame = pd.DataFrame(stages)
+        grouped = frame.groupby('stage', sort=False)['seconds']
+        return pd.DataFrame({
+            'Étape': grouped.sum().index,
+            'Appels': grouped.size().values,
+            'Durée Totale (s)': grouped.sum().round(3).values,
+            'Durée Moyenne (s)': grouped.mean().round(3).values,
+            'Durée Max (s)': grouped.max().round(3).values,
+        }).sort_values('Durée Totale (s)', ascending=False, kind='stable').reset_index(drop=True)
+
+    def summary(self):
+        """Totaux des requêtes (durées cumulées sur tous les threads) et durée écoulée depuis la création."""
+        with self.lock:
+            requests = list(self.requests)
+        return {
+            'elapsed_seconds': round(time.perf_counter() - self.started, 3),
+            'requests': len(requests),
+            'errors': sum(1 for r in requests if r['status'] != 200),
+            'bytes': sum(r['bytes'] for r in requests),
+            'http_seconds': round(sum(r['seconds'] for r in requests), 3),
+            'wait_seconds': round(sum(r['wait_seconds'] for r in requests), 3),
+            'json_seconds': round(sum(r['json_seconds'] for r in requests), 3),
+            'qtime_seconds': round(sum(r['qtime_ms'] or 0 for r in requests) / 1000, 3),
+            'retries': sum(r['retries'] or 0 for r in requests),
+        }
+
+    def to_json_lines(self):
+        """Toutes les mesures (requêtes puis étapes), une ligne JSON par mesure."""
+        with self.lock:
+            events = self.requests + self.stages
+        return '\n'.join(json.dumps(event, ensure_ascii=False) for event in events) + '\n'
+
+
+class NullMetrics(Metrics):
+    """
+    Enregistreur par défaut, hors use_metrics : aucune mesure n'est gardée en mémoire
+    (le journal JSON, s'il est configuré, les reçoit toujours). Tableaux et bilan restent vides.
+    """
+
+    def _keep(self, events, event):
+        pass
+
+
+_current = contextvars.ContextVar('hal_metrics', default=NullMetrics())
+
+
+def current_metrics():
+    """Enregistreur courant : celui fixé par use_metrics dans ce contexte, sinon NullMetrics (rien n'est gardé)."""
+    return _current.get()
+
+
+def use_metrics(metrics):
+    """
+    Fait de metrics l'enregistreur courant du contexte (thread d'une session Streamlit par exemple).
+    Les threads de travail doivent être lancés avec une copie du contexte (contextvars.copy_context).
+    """
+    _current.set(metrics)
+    return metrics
+
+
+@contextmanager
+def stage(name):
+    """Mesure la durée d'un bloc comme une étape nommée."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        current_metrics().record_stage(name, time.perf_counter() - start)
+
+
+def timed(name=None):
+    """Décorateur : chaque appel de la fonction est noté comme une étape (nom par défaut : module.fonction)."""
+    def decorate(func):
+        label = name or f'{func.__module__}.{func.__qualname__}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def configure_json_log(path='-'):
+    """Écrit désormais chaque mesure en JSON, une par ligne, dans path ('-' : sortie d'erreur)."""
+    global _json_log_path
+    handler = logging.StreamHandler(sys.stderr) if path == '-' else logging.FileHandler(path, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    _json_log_path = path
+
+
+def json_log_path():
+    """Destination du journal JSON configuré (None s'il est inactif), à transmettre aux processus de travail."""
+    return _json_log_path
+
+
+def _log(event):
+    if logger.isEnabledFor(logging.INFO):
+        timestamp = datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+        logger.info(json.dumps({'ts': timestamp, 'pid': os.getpid(), **event}, ensure_ascii=False))
+
+
+def log_summary(metrics=None):
+    """Écrit dans le journal JSON le bilan des mesures : totaux des requêtes et durée de chaque étape."""
+    metrics = metrics or current_metrics()
+    stages = metrics.stage_frame()
+    _log({
+        'event': 'summary', **metrics.summary(),
+        'stages': {row['Étape']: {'calls': int(row['Appels']), 'seconds': float(row['Durée Totale (s)'])}
+                   for _, row in stages.iterrows()},
+    })
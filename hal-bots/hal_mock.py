@@ -0,0 +1,450 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from hal_client import JOURNAL_LIST, normalize_title
+
+# =========================================================
+# 🧪 SERVEUR HAL SIMULÉ (BANC D'ESSAI HORS LIGNE)
+# =========================================================
+# Remplaçant local de /search et /ref/journal pour mesurer les performances sans interroger
+# api.archives-ouvertes.fr : un corpus synthétique (ou enregistré) est tenu en colonnes numpy,
+# chaque requête est filtrée par masques (revues, collections, dates) puis servie au format
+# Solr (numFound, cursorMark, facettes field / range / pivot) après une latence configurable.
+# Les clients y sont dirigés par la variable d'environnement HAL_API_URL (voir hal_client).
+
+# Latence simulée ajoutée à chaque requête (secondes)
+DEFAULT_LATENCY = 0.02
+
+# Collections attribuées aux documents synthétiques (une ou deux par document)
+MOCK_COLLECTIONS = ['MIP', 'UT3', 'CNRS', 'INSERM', 'INRAE']
+
+# Identifiant HAL de la revue JOURNAL_LIST[i] dans le corpus synthétique
+FIRST_JOURNAL_ID = 1000
+
+# Période de dépôt du corpus synthétique
+CORPUS_START = '2018-01-01'
+CORPUS_END = '2025-12-31'
+
+# Nombre de sélections (requête + filtres) gardées en mémoire : les pages d'un même parcours ne refiltrent pas le corpus
+SELECTION_CACHE_SIZE = 32
+
+# Clause Solr champ:valeur, la valeur étant un groupe (...), un intervalle [...], une phrase ou un terme
+_CLAUSE = re.compile(r'(\w+):(\((?:[^()"]|"(?:[^"\\]|\\.)*")*\)|\[[^\]]*\]|"(?:[^"\\]|\\.)*"|[^\s()]+)')
+_TERM = re.compile(r'"((?:[^"\\]|\\.)*)"|([^\s()]+)')
+_DATE_MATH = re.compile(r'^(NOW|\d{4}-\d{2}-\d{2}(?:T[\d:.]+Z?)?)(?:/DAY)?(?:([+-])(\d+)DAYS?)?$')
+
+
+def _terms(value):
+    """Valeurs d'une clause : termes d'un groupe (A OR B ...) ou valeur seule, guillemets retirés."""
+    if value.startswith('('):
+        value = value[1:-1]
+    terms = []
+    for phrase, word in _TERM.findall(value):
+        if word == 'OR':
+            continue
+        terms.append(re.sub(r'\\(.)', r'\1', phrase) if phrase else word)
+    return terms
+
+
+def _parse_date(text, now):
+    """Date Solr simplifiée : date ISO ou NOW, arrondi /DAY et décalage en jours (±ND AYS)."""
+    match = _DATE_MATH.match(text.strip())
+    if not match:
+        return None
+    base, sign, days = match.groups()
+    date = now if base == 'NOW' else np.datetime64(base.rstrip('Z')[:19], 's')
+    if '/DAY' in text:
+        date = date.astype('datetime64[D]').astype('datetime64[s]')
+    if days:
+        shift = np.timedelta64(int(days), 'D')
+        date = date - shift if sign == '-' else date + shift
+    return date
+
+
+class MockCorpus:
+    """
+    Corpus servi par le serveur simulé, en colonnes alignées (un contributeur par document,
+    une ou deux collections). Les documents au format HAL ne sont construits que pour les pages demandées.
+    """
+
+    def __init__(self, hal_ids, titles, journals, journal_codes, contributor_ids, names, submitted,
+                 collections, collection_codes, second_collection_codes):
+        self.hal_ids = hal_ids
+        self.titles = titles
+        self.journals = journals
+        self.journal_codes = journal_codes
+        self.contributor_ids = contributor_ids
+        self.names = names
+        self.submitted = submitted
+        self.collections = collections
+        self.collection_codes = collection_codes
+        self.second_collection_codes = second_collection_codes
+
+    @classmethod
+    def synthetic(cls, nb_docs, nb_contributors=None, journals=JOURNAL_LIST, seed=0):
+        """
+        Corpus synthétique : quelques gros déposants et une longue traîne (loi de Zipf approchée),
+        des titres gabarits réutilisés, des dates de dépôt croissantes avec le numéro de document.
+        """
+        rng = np.random.default_rng(seed)
+        nb_contributors = nb_contributors or max(100, nb_docs // 20)
+        weights = 1 / np.arange(1, nb_contributors + 1)
+        contributor_ids = rng.choice(nb_contributors, size=nb_docs, p=weights / weights.sum()) + 1
+        start, end = np.datetime64(CORPUS_START, 's'), np.datetime64(CORPUS_END, 's')
+        submitted = np.sort(start + rng.integers(0, int((end - start).astype(np.int64)), nb_docs).astype('timedelta64[s]'))
+        templates = rng.integers(0, max(1, nb_docs // 5), nb_docs)
+        second = np.where(rng.random(nb_docs) < 0.3, rng.integers(0, len(MOCK_COLLECTIONS), nb_docs), -1)
+        return cls(
+            hal_ids=np.array([f'hal-{i:08d}' for i in range(nb_docs)], dtype=object),
+            titles=np.array([f'Assessment of factor {t} among study participants: case {i % 4}'
+                             for i, t in enumerate(templates.tolist())], dtype=object),
+            journals=list(journals),
+            journal_codes=rng.integers(0, len(journals), nb_docs),
+            contributor_ids=contributor_ids.astype(np.int64),
+            names=None,
+            submitted=submitted,
+            collections=list(MOCK_COLLECTIONS),
+            collection_codes=rng.integers(0, len(MOCK_COLLECTIONS), nb_docs),
+            second_collection_codes=second,
+        )
+
+    @classmethod
+    def from_docs(cls, docs):
+        """
+        Corpus enregistré à partir de documents HAL (par exemple une récolte sauvegardée en JSON) :
+        seuls le premier contributeur et les deux premières collections de chaque document sont gardés.
+        """
+        def first(value, default=None):
+            if isinstance(value, (list, tuple)):
+                return value[0] if value else default
+            return default if value is None else value
+
+        journals, journal_index = [], {}
+        collections, collection_index = [], {}
+
+        def code(value, values, index):
+            if value not in index:
+                index[value] = len(values)
+                values.append(value)
+            return index[value]
+
+        journal_codes, contributors, names, firsts, seconds = [], [], [], [], []
+        for doc in docs:
+            journal_codes.append(code(first(doc.get('journalTitle_s'), doc.get('journal', 'N/A')), journals, journal_index))
+            contributors.append(first(doc.get('contributorId_i'), 0))
+            names.append(first(doc.get('contributorFullName_s'), 'N/A'))
+            codes = doc.get('collCode_s') or []
+            codes = codes if isinstance(codes, (list, tuple)) else [codes]
+            firsts.append(code(codes[0], collections, collection_index) if codes else -1)
+            seconds.append(code(codes[1], collections, collection_index) if len(codes) > 1 else -1)
+
+        submitted = pd.to_datetime(pd.Series([doc.get('submittedDate_s') for doc in docs], dtype=object),
+                                   errors='coerce', format='ISO8601').to_numpy('datetime64[s]')
+        return cls(
+            hal_ids=np.array([doc.get('halId_s') for doc in docs], dtype=object),
+            titles=np.array([first(doc.get('title_s'), '') for doc in docs], dtype=object),
+            journals=journals,
+            journal_codes=np.asarray(journal_codes, dtype=np.int64),
+            contributor_ids=np.asarray(contributors, dtype=np.int64),
+            names=np.array(names, dtype=object),
+            submitted=submitted,
+            collections=collections,
+            collection_codes=np.asarray(firsts, dtype=np.int64),
+            second_collection_codes=np.asarray(seconds, dtype=np.int64),
+        )
+
+    def __len__(self):
+        return len(self.hal_ids)
+
+    def journal_id(self, code):
+        """Identifiant HAL (journalId_i) d'une revue du corpus."""
+        return FIRST_JOURNAL_ID + code
+
+    def _column(self, field, positions):
+        """Valeurs d'un champ HAL (une par document) pour les positions demandées."""
+        if field == 'journalTitle_s':
+            return np.asarray(self.journals, dtype=object)[self.journal_codes[positions]]
+        if field == 'journalId_i':
+            return FIRST_JOURNAL_ID + self.journal_codes[positions]
+        if field == 'journalPublisher_s':
+            return np.array([f'Éditeur {code % 7}' for code in self.journal_codes[positions].tolist()], dtype=object)
+        if field == 'contributorId_i':
+            return self.contributor_ids[positions]
+        if field == 'contributorFullName_s':
+            if self.names is None:
+                return np.array([f'Contributeur {cid}' for cid in self.contributor_ids[positions].tolist()], dtype=object)
+            return self.names[positions]
+        if field == 'collCode_s':
+            return np.asarray(self.collections, dtype=object)[self.collection_codes[positions]]
+        return None
+
+    def select(self, queries, collection=None, now=None):
+        """
+        Positions des documents qui vérifient toutes les requêtes (q et chaque fq). Dans une requête,
+        les clauses reconnues (journalId_i, journalTitle_s, collCode_s, dates) sont réunies par OU ;
+        une requête sans clause reconnue (*:*) ne filtre rien. collection restreint à une collection.
+        """
+        now = now if now is not None else np.datetime64('now', 's')
+        mask = np.ones(len(self), dtype=bool)
+        if collection:
+            mask &= self._collection_mask([collection])
+        for query in queries:
+            clauses = [self._clause_mask(field, value, now) for field, value in _CLAUSE.findall(query or '')]
+            clauses = [clause for clause in clauses if clause is not None]
+            if clauses:
+                mask &= np.logical_or.reduce(clauses)
+        return np.flatnonzero(mask)
+
+    def _collection_mask(self, codes):
+        wanted = np.flatnonzero(np.isin(np.asarray(self.collections, dtype=object), codes))
+        return np.isin(self.collection_codes, wanted) | np.isin(self.second_collection_codes, wanted)
+
+    def _clause_mask(self, field, value, now):
+        if field == 'journalId_i':
+            codes = [int(term) - FIRST_JOURNAL_ID for term in _terms(value) if term.lstrip('-').isdigit()]
+            return np.isin(self.journal_codes, codes)
+        if field == 'journalTitle_s':
+            titles = set(_terms(value))
+            return np.isin(self.journal_codes, [code for code, title in enumerate(self.journals) if title in titles])
+        if field == 'collCode_s':
+            return self._collection_mask(_terms(value))
+        if field in ('submittedDate_tdate', 'modifiedDate_tdate') and value.startswith('['):
+            low, _, high = value[1:-1].partition(' TO ')
+            mask = np.ones(len(self), dtype=bool)
+            low, high = _parse_date(low, now) if low != '*' else None, _parse_date(high, now) if high != '*' else None
+            if low is not None:
+                mask &= self.submitted >= low
+            if high is not None:
+                mask &= self.submitted <= high
+            return mask
+        return None
+
+    def docs(self, positions, fields):
+        """Documents au format des réponses HAL (champs multivalués en listes) pour les positions demandées."""
+        columns = {}
+        for field in fields:
+            if field == 'halId_s':
+                columns[field] = self.hal_ids[positions].tolist()
+            elif field == 'docid':
+                columns[field] = (positions + 1).tolist()
+            elif field == 'title_s':
+                columns[field] = [[title] for title in self.titles[positions].tolist()]
+            elif field == 'submittedDate_s':
+                dates = np.datetime_as_string(self.submitted[positions], unit='s')
+                columns[field] = [date.replace('T', ' ') for date in dates.tolist()]
+            elif field in ('journalTitle_s', 'journalId_i'):
+                columns[field] = self._column(field, positions).tolist()
+            elif field in ('contributorId_i', 'contributorFullName_s'):
+                columns[field] = [[value] for value in self._column(field, positions).tolist()]
+            elif field == 'collCode_s':
+                names = np.asarray(self.collections, dtype=object)
+                columns[field] = [
+                    ([names[first]] if first >= 0 else []) + ([names[second]] if second >= 0 and second != first else [])
+                    for first, second in zip(self.collection_codes[positions].tolist(),
+                                             self.second_collection_codes[positions].tolist())
+                ]
+        names = list(columns)
+        return [dict(zip(names, values)) for values in zip(*columns.values())] if names else [{} for _ in positions]
+
+    def facets(self, positions, params):
+        """facet_counts Solr (facet.field, facet.range mensuel, facet.pivot à deux niveaux) des documents sélectionnés."""
+        def param(name, default=None):
+            return params.get(name, [default])[0]
+
+        default_limit = int(param('facet.limit', 100))
+
+        def limit_of(field):
+            return int(param(f'f.{field}.facet.limit', default_limit))
+
+        def truncate(counts, field, mincount):
+            counts = counts[counts >= max(mincount, 1)]
+            limit = limit_of(field)
+            return counts.head(limit) if limit >= 0 else counts
+
+        facet_counts = {'facet_fields': {}, 'facet_ranges': {}, 'facet_pivot': {}}
+        mincount = int(param('facet.mincount', 0))
+        for field in params.get('facet.field', []):
+            values = self._column(field, positions)
+            if values is None:
+                continue
+            counts = truncate(pd.Series(values).value_counts(sort=True), field, mincount)
+            # Solr renvoie les valeurs des facettes de champ sous forme de chaînes
+            facet_counts['facet_fields'][field] = [item for value, count in counts.items() for item in (str(value), int(count))]
+
+        range_field = param('facet.range')
+        if range_field:
+            start = _parse_date(param('facet.range.start', CORPUS_START).rstrip('Z'), np.datetime64('now', 's'))
+            dates = self.submitted[positions]
+            months, counts = np.unique(dates[dates >= start].astype('datetime64[M]'), return_counts=True)
+            kept = counts >= max(mincount, 1)
+            facet_counts['facet_ranges'][range_field] = {
+                'counts': [item for month, count in zip(np.datetime_as_string(months[kept]).tolist(), counts[kept].tolist())
+                           for item in (f'{month}-01T00:00:00Z', count)],
+                'gap': '+1MONTH',
+            }
+
+        pivot_mincount = int(param('facet.pivot.mincount', 1))
+        for pivot in params.get('facet.pivot', []):
+            outer, inner = pivot.split(',')[:2]
+            frame = pd.DataFrame({'outer': self._column(outer, positions), 'inner': self._column(inner, positions)})
+            outer_counts = truncate(frame['outer'].value_counts(sort=True), outer, pivot_mincount)
+            pairs = frame[frame['outer'].isin(outer_counts.index)].groupby(['outer', 'inner']).size()
+            pairs = pairs[pairs >= max(pivot_mincount, 1)].rename('count').reset_index()
+            pairs['rank'] = pairs['outer'].map(pd.Series(np.arange(len(outer_counts)), index=outer_counts.index))
+            pairs = pairs.sort_values(['rank', 'count'], ascending=[True, False], kind='stable')
+            if limit_of(inner) >= 0:
+                pairs = pairs[pairs.groupby('outer').cumcount() < limit_of(inner)]
+            subs = {}
+            for value, sub, count in zip(pairs['outer'].tolist(), pairs['inner'].tolist(), pairs['count'].tolist()):
+                subs.setdefault(value, []).append({'field': inner, 'value': sub, 'count': count})
+            entries = [
+                {'field': outer, 'value': value, 'count': count, 'pivot': subs.get(value, [])}
+                for value, count in zip(outer_counts.index.tolist(), outer_counts.tolist())
+            ]
+            facet_counts['facet_pivot'][pivot] = entries
+        return facet_counts
+
+    def ref_records(self, query):
+        """Notices du référentiel des revues (docid, title_s) dont le titre correspond à une phrase de la requête."""
+        wanted = {normalize_title(term) for _, value in _CLAUSE.findall(query or '') for term in _terms(value)}
+        return [
+            {'docid': self.journal_id(code), 'title_s': title, 'valid_s': 'VALID'}
+            for code, title in enumerate(self.journals) if normalize_title(title) in wanted
+        ]
+
+
+class MockHalServer:
+    """
+    Serveur HTTP local (un thread par requête) répondant comme l'API HAL à partir d'un MockCorpus,
+    avec une latence simulée. Chaque requête servie est notée (durée, taille de la réponse) pour
+    les percentiles de latence du banc d'essai. Utilisable comme gestionnaire de contexte.
+    """
+
+    def __init__(self, corpus, latency=DEFAULT_LATENCY, host='127.0.0.1', port=0):
+        self.corpus = corpus
+        self.latency = latency
+        self.requests = []
+        self.lock = threading.Lock()
+        self.selections = OrderedDict()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        """Racine de l'API simulée, à placer dans HAL_API_URL."""
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_stats(self):
+        """Oublie les requêtes notées (entre deux mesures)."""
+        with self.lock:
+            self.requests = []
+
+    def stats(self):
+        """Nombre de requêtes, octets servis et percentiles (ms) de la durée de service des requêtes notées."""
+        with self.lock:
+            durations = np.array([duration for duration, _ in self.requests], dtype=np.float64) * 1000
+            nb_bytes = sum(size for _, size in self.requests)
+        if not len(durations):
+            return {'requests': 0, 'bytes': 0, 'p50': None, 'p95': None, 'p99': None}
+        p50, p95, p99 = np.percentile(durations, [50, 95, 99])
+        return {'requests': len(durations), 'bytes': nb_bytes, 'p50': round(float(p50), 1), 'p95': round(float(p95), 1),
+                'p99': round(float(p99), 1)}
+
+    def _selection(self, queries, collection):
+        """Positions sélectionnées, gardées en mémoire pour les pages suivantes du même parcours."""
+        key = (tuple(queries), collection)
+        with self.lock:
+            if key in self.selections:
+                self.selections.move_to_end(key)
+                return self.selections[key]
+        positions = self.corpus.select(queries, collection)
+        with self.lock:
+            self.selections[key] = positions
+            while len(self.selections) > SELECTION_CACHE_SIZE:
+                self.selections.popitem(last=False)
+        return positions
+
+    def search(self, params, collection=None):
+        """Réponse de /search : page de documents (cursorMark ou start) et facettes éventuelles."""
+        started = time.perf_counter()
+        positions = self._selection([params.get('q', ['*:*'])[0]] + params.get('fq', []), collection)
+        rows = int(params.get('rows', ['10'])[0])
+        cursor = params.get('cursorMark', [None])[0]
+        start = int(params.get('start', ['0'])[0]) if cursor is None else (0 if cursor == '*' else int(cursor))
+        page = positions[start:start + rows]
+        fields = [f for f in params.get('fl', ['halId_s'])[0].split(',') if f]
+        data = {
+            'responseHeader': {'status': 0, 'QTime': 0},
+            'response': {'numFound': int(len(positions)), 'start': start, 'docs': self.corpus.docs(page, fields)},
+        }
+        if cursor is not None:
+            data['nextCursorMark'] = str(start + len(page)) if len(page) else cursor
+        if params.get('facet', ['false'])[0] == 'true':
+            data['facet_counts'] = self.corpus.facets(positions, params)
+        data['responseHeader']['QTime'] = int((time.perf_counter() - started) * 1000)
+        return data
+
+    def ref_journal(self, params):
+        """Réponse de /ref/journal : notices des revues demandées, en une seule page."""
+        records = self.corpus.ref_records(params.get('q', [''])[0])
+        data = {'responseHeader': {'status': 0, 'QTime': 0}, 'response': {'numFound': len(records), 'docs': records}}
+        if 'cursorMark' in params:
+            data['nextCursorMark'] = params['cursorMark'][0]
+        return data
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                started = time.perf_counter()
+                url = urlparse(self.path)
+                params = parse_qs(url.query)
+                path = url.path.rstrip('/')
+                if path.endswith('/ref/journal'):
+                    data = server.ref_journal(params)
+                elif '/search' in path:
+                    data = server.search(params, path.split('/search', 1)[1].strip('/') or None)
+                else:
+                    self.send_error(404)
+                    return
+                body = json.dumps(data).encode('utf-8')
+                # Latence du réseau et de HAL, ajoutée au temps de calcul de la réponse
+                time.sleep(server.latency)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with server.lock:
+                    server.requests.append((time.perf_counter() - started, len(body)))
+
+        return Handler
@@ -0,0 +1,245 @@
+import heapq
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+import requests
+
+from hal_client import BASE_URL, DEFAULT_PAGE_SIZE, as_list, iter_hal_pages, iter_journal_pages
+from hal_duplicates import near_duplicate_clusters
+from hal_metrics import current_metrics
+from hal_store import ALL_HAL, count_docs, iter_docs, mark_harvested, plan_refresh, save_docs, utc_now
+
+# =========================================================
+# 🔁 CHAÎNE DE TRAITEMENT EN FLUX (RÉCOLTE → AGRÉGATS)
+# =========================================================
+# Les pages de documents sont produites une à une par des générateurs, passées à des
+# agrégateurs incrémentaux puis abandonnées : la mémoire ne dépend que de la taille des
+# agrégats, pas de celle de la récolte. Les résultats partiels peuvent être écrits sur disque
+# en cours de route.
+
+
+class ContributorCounter:
+    """Décompte incrémental des dépôts par contributeur (nombre, dernier nom vu, revues)."""
+
+    def __init__(self):
+        self.contributors = defaultdict(lambda: {'count': 0, 'journals': set(), 'name': 'N/A'})
+
+    def update(self, docs):
+        """Ajoute les contributeurs d'une page de documents au décompte."""
+        for doc in docs:
+            names = as_list(doc.get('contributorFullName_s'))
+            ids = as_list(doc.get('contributorId_i'))
+
+            journal = doc.get('journal', 'N/A')
+            for contributor_id, name in zip(ids, names):
+                if isinstance(contributor_id, int) and contributor_id > 0:
+                    details = self.contributors[contributor_id]
+                    details['count'] += 1
+                    details['journals'].add(journal)
+                    details['name'] = name
+
+    def __len__(self):
+        return len(self.contributors)
+
+    def top(self, k=None):
+        """Les k plus gros déposants du décompte (voir top_contributors)."""
+        return top_contributors(self.contributors, k)
+
+
+def top_contributors(contributors, k=None):
+    """
+    Renvoie les couples (id, détails) des k plus gros déposants d'un décompte {id: {'count': ...}},
+    du plus grand au plus petit (tas de taille k plutôt qu'un tri complet) ; tous si k vaut None.
+    """
+    items = contributors.items()
+    if k is None:
+        return sorted(items, key=lambda item: item[1]['count'], reverse=True)
+    return heapq.nlargest(k, items, key=lambda item: item[1]['count'])
+
+
+class MonthlyCounter:
+    """Décompte incrémental des dépôts par mois de soumission ('AAAA-MM')."""
+
+    def __init__(self):
+        self.months = Counter()
+
+    def update(self, docs):
+        """Ajoute les dates de soumission d'une page de documents au décompte."""
+        self.months.update(
+            doc['submittedDate_s'][:7] for doc in docs if doc.get('submittedDate_s')
+        )
+
+    def __len__(self):
+        return sum(self.months.values())
+
+    def to_series(self):
+        """Série du nombre de dépôts indexée par période mensuelle, triée par mois."""
+        if not self.months:
+            return pd.Series(dtype=int)
+        counts = pd.Series(self.months, dtype=int).sort_index()
+        counts.index = pd.PeriodIndex(counts.index, freq='M')
+        return counts
+
+
+class DepositTimesCollector:
+    """
+    Accumule les couples (ID HAL, date de dépôt en secondes) page par page dans des tableaux numpy
+    (16 octets par couple), pour la détection des rafales (hal_bursts) sur des millions de dépôts.
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.times = []
+
+    def update(self, docs):
+        """Ajoute les contributeurs datés d'une page de documents."""
+        ids, dates = [], []
+        for doc in docs:
+            submitted = doc.get('submittedDate_s')
+            doc_ids = doc.get('contributorId_i')
+            if not submitted or doc_ids is None:
+                continue
+            for contributor_id in as_list(doc_ids):
+                if isinstance(contributor_id, int) and contributor_id > 0:
+                    ids.append(contributor_id)
+                    dates.append(submitted)
+        if not ids:
+            return
+        seconds = pd.to_datetime(pd.Series(dates, dtype=object), errors='coerce', format='ISO8601').to_numpy('datetime64[s]')
+        dated = ~np.isnat(seconds)
+        self.ids.append(np.asarray(ids, dtype=np.int64)[dated])
+        self.times.append(seconds[dated].astype(np.int64))
+
+    def __len__(self):
+        return sum(len(ids) for ids in self.ids)
+
+    def arrays(self):
+        """Tableaux alignés (IDs, dates en secondes) de tous les couples collectés."""
+        if not self.ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(self.ids), np.concatenate(self.times)
+
+
+class TitleCollector:
+    """
+    Conserve identifiant, premier titre, revue et date de chaque document (et rien d'autre),
+    pour la recherche des titres quasi identiques (hal_duplicates) en fin de récolte.
+    """
+
+    def __init__(self):
+        self.hal_ids = []
+        self.titles = []
+        self.journals = []
+        self.dates = []
+
+    def update(self, docs):
+        """Ajoute les titres d'une page de documents."""
+        for doc in docs:
+            titles = as_list(doc.get('title_s'))
+            self.hal_ids.append(doc.get('halId_s'))
+            self.titles.append(titles[0] if titles else None)
+            self.journals.append(doc.get('journal', 'N/A'))
+            self.dates.append(doc.get('submittedDate_s'))
+
+    def __len__(self):
+        return len(self.titles)
+
+    def clusters(self, **kwargs):
+        """Groupes de titres quasi identiques (voir hal_duplicates.near_duplicate_clusters)."""
+        return near_duplicate_clusters(self.hal_ids, self.titles, self.journals, self.dates, **kwargs)
+
+
+def iter_harvest_pages(conn, journals, fields, incremental=True, scope=ALL_HAL, base_url=BASE_URL,
+                       page_size=DEFAULT_PAGE_SIZE, limiter=None):
+    """
+    Génère les pages de documents des revues demandées en s'appuyant sur la base locale :
+    revues récoltées récemment relues revue par revue, récolte complète page par page,
+    ou delta depuis le point de reprise fusionné dans la base puis revue relue en entier.
+    Chaque page est enregistrée dans la base avant d'être transmise ; une erreur réseau
+    n'interrompt que le groupe de revues concerné.
+    """
+    stored, jobs = plan_refresh(conn, journals, fields, scope=scope, incremental=incremental)
+    if stored:
+        print(f"Relecture de {len(stored)} revue(s) depuis la base locale...")
+        yield from iter_docs(conn, list(stored), scope=scope)
+
+    print("Début de l'extraction des données de l'API HAL...")
+    watermark = utc_now()
+
+    for i, (chunk, since) in enumerate(jobs):
+        mode = f"mise à jour depuis {since}" if since else "récolte complète"
+        print(f"  [{i+1}/{len(jobs)}] Traitement d'un groupe de {len(chunk)} revue(s) ({mode})...")
+        fetched = 0
+        num_found = 0
+        fetched_by_journal = defaultdict(int)
+        try:
+            for docs, num_found in iter_journal_pages(chunk, fields, page_size=page_size, base_url=base_url,
+                                                      limiter=limiter, since=since):
+                save_docs(conn, docs, scope=scope)
+                fetched += len(docs)
+                for doc in docs:
+                    fetched_by_journal[doc['journal']] += 1
+                if not since:
+                    yield docs
+        except requests.exceptions.RequestException as e:
+            print(f"Erreur lors de la requête pour le groupe ({', '.join(chunk)}): {e}")
+            continue
+
+        if not fetched:
+            print("  -> Aucun résultat trouvé pour ce groupe de revues.")
+        else:
+            print(f"  -> {fetched}/{num_found} document(s) récupéré(s).")
+
+        for journal in chunk:
+            total = count_docs(conn, journal, scope=scope) if since else fetched_by_journal[journal]
+            mark_harvested(conn, journal, fields, total, scope=scope, watermark=watermark)
+
+        # Le delta est fusionné dans la base : on relit les revues mises à jour en entier
+        if since:
+            yield from iter_docs(conn, chunk, scope=scope)
+
+
+def iter_all_hal_pages(fields, page_size=DEFAULT_PAGE_SIZE, base_url=BASE_URL, limiter=None):
+    """
+    Parcourt tout HAL (q=*:*) page par page ; chaque document porte sa revue dans 'journal'
+    (titre journalTitle_s, 'N/A' pour les documents hors revue). Rien n'est enregistré localement.
+    """
+    fields = ','.join(dict.fromkeys(fields.split(',') + ['journalTitle_s']))
+    fetched = 0
+    for docs, num_found in iter_hal_pages('*:*', fields, page_size=page_size, base_url=base_url, limiter=limiter):
+        for doc in docs:
+            doc['journal'] = doc.get('journalTitle_s', 'N/A')
+        fetched += len(docs)
+        print(f"  -> {fetched}/{num_found} document(s) parcouru(s).", end='\r')
+        yield docs
+    print()
+
+
+def run_pipeline(pages, consumers, flush_every=None, flush=None):
+    """
+    Fait passer chaque page de documents par les consommateurs (agrégateurs, instantané...)
+    puis l'abandonne. Tous les flush_every pages, flush() écrit les résultats partiels.
+    Le temps passé dans chaque consommateur est noté comme une étape (hors attente des pages).
+    Renvoie le nombre de documents traités.
+    """
+    nb_pages = 0
+    nb_docs = 0
+    consumer_seconds = [0.0] * len(consumers)
+    try:
+        for docs in pages:
+            for i, consume in enumerate(consumers):
+                start = time.perf_counter()
+                consume(docs)
+                consumer_seconds[i] += time.perf_counter() - start
+            nb_pages += 1
+            nb_docs += len(docs)
+            if flush is not None and flush_every and nb_pages % flush_every == 0:
+                flush()
+    finally:
+        metrics = current_metrics()
+        for consume, seconds in zip(consumers, consumer_seconds):
+            name = getattr(consume, '__qualname__', type(consume).__name__)
+            metrics.record_stage(f'hal_pipeline.run_pipeline:{name}', seconds)
+    return nb_docs
@@ -0,0 +1,289 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+from hal_client import as_list
+from hal_metrics import timed
+
+# =========================================================
+# 🗂️ INSTANTANÉS PARQUET DU CORPUS RÉCOLTÉ
+# =========================================================
+# Un instantané est un jeu de fichiers Parquet partitionné par revue et par mois de dépôt
+# (dossiers journal=.../month=AAAA-MM). Il se relit par projection de colonnes et en
+# mémoire projetée, sans analyser de JSON ni de CSV.
+
+DEFAULT_SNAPSHOT_DIR = 'snapshots'
+
+# Mois attribué aux documents sans date de soumission
+UNKNOWN_MONTH = 'inconnu'
+
+# Fichier témoin déposé dans le dossier d'un instantané : seul un tel dossier peut être remplacé
+SNAPSHOT_MARKER = '.instantane_hal'
+
+# Tentatives de mise en place d'un instantané quand une autre exécution publie le sien au même moment
+PUBLISH_ATTEMPTS = 5
+
+# Nombre maximal de partitions (revue × mois) touchées par une écriture
+MAX_PARTITIONS = 100_000
+
+SNAPSHOT_SCHEMA = pa.schema([
+    ('halId_s', pa.string()),
+    ('title_s', pa.string()),
+    ('submittedDate_s', pa.string()),
+    ('contributorId_i', pa.list_(pa.int64())),
+    ('contributorFullName_s', pa.list_(pa.string())),
+    ('journal', pa.string()),
+    ('month', pa.string()),
+])
+
+PARTITIONING = ds.partitioning(
+    pa.schema([('journal', pa.string()), ('month', pa.string())]), flavor='hive'
+)
+
+
+def docs_to_table(docs):
+    """Convertit des documents HAL (avec la clé 'journal') en table Arrow au schéma de l'instantané."""
+    rows = []
+    for doc in docs:
+        titles = as_list(doc.get('title_s'))
+        submitted = doc.get('submittedDate_s')
+        ids = doc.get('contributorId_i')
+        names = doc.get('contributorFullName_s')
+        rows.append({
+            'halId_s': doc.get('halId_s'),
+            'title_s': titles[0] if titles else None,
+            'submittedDate_s': submitted,
+            # Champ absent : null. Les IDs non entiers sont mis à null pour garder l'appariement position
+            # par position avec les noms
+            'contributorId_i': [i if isinstance(i, int) else None for i in as_list(ids)] if ids is not None else None,
+            'contributorFullName_s': as_list(names) if names is not None else None,
+            'journal': doc.get('journal', 'N/A'),
+            'month': submitted[:7] if submitted else UNKNOWN_MONTH,
+        })
+    return pa.Table.from_pylist(rows, schema=SNAPSHOT_SCHEMA)
+
+
+def is_snapshot_dir(root):
+    """
+    Vrai si root contient un instantané : fichier témoin, ou seulement des partitions journal=...
+    (instantanés écrits avant l'ajout du témoin).
+    """
+    entries = os.listdir(root)
+    return SNAPSHOT_MARKER in entries or (bool(entries) and all(entry.startswith('journal=') for entry in entries))
+
+
+def _check_replaceable(root):
+    """Refuse de remplacer un dossier non vide qui ne contient pas d'instantané."""
+    if os.path.isdir(root) and os.listdir(root) and not is_snapshot_dir(root):
+        raise FileExistsError(
+            f"Le dossier '{root}' n'est pas vide et ne contient pas d'instantané : "
+            f"choisissez un dossier vide ou inexistant."
+        )
+
+
+class SnapshotWriter:
+    """
+    Écrit un instantané page par page : chaque appel à write() ajoute des fichiers Parquet
+    dans les partitions concernées, sans garder le corpus en mémoire.
+    L'écriture se fait dans un dossier temporaire propre à l'exécution, à côté de root ; close() le met
+    en place en remplaçant l'instantané précédent, discard() l'abandonne. Deux exécutions simultanées
+    (sessions de l'application, scripts) n'effacent donc jamais les fichiers l'une de l'autre.
+    Un dossier non vide qui ne contient pas d'instantané n'est jamais remplacé (FileExistsError).
+    S'utilise aussi comme gestionnaire de contexte (close en fin de bloc, discard en cas d'erreur).
+    """
+
+    def __init__(self, root=DEFAULT_SNAPSHOT_DIR):
+        self.root = root
+        self.parts = 0
+        self.rows = 0
+        _check_replaceable(root)
+        parent = os.path.dirname(os.path.abspath(root))
+        os.makedirs(parent, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix=f'.{os.path.basename(os.path.abspath(root))}-', dir=parent)
+        os.chmod(self.path, 0o755)  # mkdtemp crée un dossier privé ; l'instantané publié reste lisible par tous
+        with open(os.path.join(self.path, SNAPSHOT_MARKER), 'w', encoding='utf-8'):
+            pass
+
+    def write(self, docs):
+        """Ajoute une page de documents à l'instantané."""
+        if not docs:
+            return
+        table = docs_to_table(docs)
+        ds.write_dataset(
+            table,
+            self.path,
+            format='parquet',
+            partitioning=PARTITIONING,
+            basename_template=f'part-{self.parts:06d}-{{i}}.parquet',
+            existing_data_behavior='overwrite_or_ignore',
+            max_partitions=MAX_PARTITIONS,
+        )
+        self.parts += 1
+        self.rows += table.num_rows
+
+    def close(self):
+        """Met l'instantané écrit en place dans root, à la place du précédent."""
+        for _ in range(PUBLISH_ATTEMPTS):
+            _check_replaceable(self.root)
+            previous = f'{self.path}.ancien'
+            try:
+                os.rename(self.root, previous)
+            except FileNotFoundError:
+                previous = None
+            try:
+                os.rename(self.path, self.root)
+            except OSError:
+                # Une autre exécution vient de mettre son instantané en place : on recommence
+                continue
+            finally:
+                if previous is not None:
+                    shutil.rmtree(previous, ignore_errors=True)
+            return
+        self.discard()
+        raise FileExistsError(f"Impossible de mettre l'instantané en place dans '{self.root}'.")
+
+    def discard(self):
+        """Abandonne l'instantané en cours d'écriture ; l'instantané précédent reste en place."""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+@timed()
+def write_snapshot(docs, root=DEFAULT_SNAPSHOT_DIR):
+    """Écrit en une fois l'instantané d'une liste de documents ; renvoie le nombre de lignes écrites."""
+    with SnapshotWriter(root) as writer:
+        writer.write(docs)
+    return writer.rows
+
+
+def open_snapshot(root=DEFAULT_SNAPSHOT_DIR):
+    """Ouvre un instantané en lecture, les fichiers étant projetés en mémoire (mmap)."""
+    return ds.dataset(
+        root,
+        format='parquet',
+        partitioning=PARTITIONING,
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+
+
+def _snapshot_filter(journals=None, start_month=None):
+    """Filtre sur les partitions : seuls les fichiers des revues et mois demandés sont lus."""
+    expression = None
+    if journals:
+        expression = ds.field('journal').isin(list(journals))
+    if start_month:
+        month_filter = (ds.field('month') >= start_month) & (ds.field('month') != UNKNOWN_MONTH)
+        expression = month_filter if expression is None else expression & month_filter
+    return expression
+
+
+def read_snapshot(root=DEFAULT_SNAPSHOT_DIR, columns=None, journals=None, start_month=None):
+    """
+    Relit un instantané sous forme de table Arrow, en ne lisant que les colonnes demandées
+    et les partitions (revues, mois à partir de start_month 'AAAA-MM') retenues.
+    """
+    return open_snapshot(root).to_table(columns=columns, filter=_snapshot_filter(journals, start_month))
+
+
+def read_snapshot_docs(root=DEFAULT_SNAPSHOT_DIR, journals=None):
+    """Relit un instantané au format des documents HAL (liste de dictionnaires)."""
+    table = read_snapshot(root, journals=journals)
+    docs = table.drop_columns(['month']).to_pylist()
+    for doc in docs:
+        if doc['title_s'] is not None:
+            doc['title_s'] = [doc['title_s']]
+    return docs
+
+
+def _list_positions(column):
+    """Renvoie, pour une colonne de listes, l'indice de ligne et la position de chaque valeur."""
+    column = column.combine_chunks() if isinstance(column, pa.ChunkedArray) else column
+    parents = pc.list_parent_indices(column).to_numpy()
+    offsets = column.offsets.to_numpy()
+    positions = np.arange(len(parents)) - (offsets[parents] - offsets[0])
+    return parents, positions, pc.list_flatten(column)
+
+
+@timed()
+def snapshot_contributor_pairs(root=DEFAULT_SNAPSHOT_DIR, journals=None):
+    """
+    Construit directement depuis l'instantané la table (doc, id, name, journal) attendue par
+    hal_analysis.contributors_from_pairs, sans repasser par des dictionnaires Python.
+    """
+    table = read_snapshot(root, columns=['contributorId_i', 'contributorFullName_s', 'journal'], journals=journals)
+    columns = ['doc', 'id', 'name', 'journal']
+    if table.num_rows == 0:
+        return pd.DataFrame(columns=columns)
+
+    id_docs, id_positions, ids = _list_positions(table['contributorId_i'])
+    name_docs, name_positions, names = _list_positions(table['contributorFullName_s'])
+
+    id_frame = pd.DataFrame({'doc': id_docs, 'position': id_positions, 'id': ids.to_numpy(zero_copy_only=False)})
+    name_frame = pd.DataFrame({'doc': name_docs, 'position': name_positions, 'name': names.to_pandas()})
+    # IDs et noms sont appariés position par position (tronqués à la plus courte des deux listes)
+    pairs = id_frame.merge(name_frame, on=['doc', 'position'], how='inner').sort_values(['doc', 'position'])
+
+    journal_column = table['journal'].to_pandas()
+    pairs['journal'] = pd.Categorical(
+        journal_column.to_numpy()[pairs['doc'].to_numpy()], categories=sorted(journal_column.unique())
+    )
+    pairs = pairs[pairs['id'] > 0]
+    return pairs[columns].astype({'id': 'int64'}).reset_index(drop=True)
+
+
+@timed()
+def snapshot_monthly_counts(root=DEFAULT_SNAPSHOT_DIR, journals=None, start_month=None, per_journal=False):
+    """
+    Nombre de dépôts par mois lu depuis l'instantané : seules les colonnes de partition sont lues.
+    Renvoie une série indexée par période mensuelle, ou avec per_journal un tableau mois × revue.
+    """
+    columns = ['month', 'journal'] if per_journal else ['month']
+    frame = read_snapshot(root, columns=columns, journals=journals, start_month=start_month).to_pandas()
+    frame = frame[frame['month'] != UNKNOWN_MONTH]
+    if per_journal:
+        counts = frame.value_counts().unstack(fill_value=0).sort_index()
+    else:
+        counts = frame['month'].value_counts().sort_index()
+    counts.index = pd.PeriodIndex(counts.index, freq='M')
+    return counts
+
+
+@timed()
+def snapshot_deposit_times(root=DEFAULT_SNAPSHOT_DIR, journals=None):
+    """
+    Tableaux alignés (ID HAL, date de dépôt en secondes) lus depuis l'instantané,
+    pour hal_bursts.detect_bursts : seules les colonnes des IDs et des dates sont lues.
+    """
+    table = read_snapshot(root, columns=['contributorId_i', 'submittedDate_s'], journals=journals)
+    if table.num_rows == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    id_docs, _, ids = _list_positions(table['contributorId_i'])
+    # Les IDs invalides sont nuls dans l'instantané
+    ids = pc.fill_null(ids, 0).to_numpy()
+    dates = pd.to_datetime(table['submittedDate_s'].to_pandas(), errors='coerce', format='ISO8601').to_numpy('datetime64[s]')
+    times = dates[id_docs]
+    valid = (ids > 0) & ~np.isnat(times)
+    return ids[valid], times[valid].astype(np.int64)
+
+
+@timed()
+def snapshot_titles(root=DEFAULT_SNAPSHOT_DIR, journals=None):
+    """Colonnes (identifiant, titre, revue, date) de l'instantané, pour hal_duplicates.near_duplicate_clusters."""
+    table = read_snapshot(root, columns=['halId_s', 'title_s', 'journal', 'submittedDate_s'], journals=journals)
+    return tuple(table[column].to_pylist() for column in ('halId_s', 'title_s', 'journal', 'submittedDate_s'))
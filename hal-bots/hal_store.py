@@ -0,0 +1,402 @@
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+from itertools import zip_longest
+
+from hal_client import as_list, plan_journal_queries
+
+# =========================================================
+# 💾 STOCKAGE LOCAL DU CORPUS HAL (SQLITE)
+# =========================================================
+
+# Emplacement de la base, modifiable par variable d'environnement
+DEFAULT_DB_PATH = os.environ.get('HAL_STORE_PATH', 'hal_corpus.sqlite')
+
+# Attente maximale (en secondes) d'un verrou tenu par une autre connexion (processus de l'audit en parallèle)
+BUSY_TIMEOUT = 60.0
+
+# Portée d'une récolte : '' pour tout HAL, sinon le nom de la collection interrogée
+ALL_HAL = ''
+
+# Durée de validité par défaut d'une récolte (en secondes) avant qu'une revue soit de nouveau interrogée
+DEFAULT_MAX_AGE = 24 * 3600
+
+# Durée de validité d'une résolution de titre de revue en identifiants HAL (en secondes)
+JOURNAL_IDS_MAX_AGE = 30 * 24 * 3600
+
+# Identifiant fictif noté pour un titre introuvable dans le référentiel (évite de le rechercher à chaque fois)
+UNRESOLVED_JOURNAL_ID = 0
+
+# Champs HAL que la base sait restituer
+STORED_FIELDS = {'halId_s', 'title_s', 'contributorFullName_s', 'contributorId_i', 'submittedDate_s', 'journalTitle_s'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    halId_s TEXT PRIMARY KEY,
+    journal TEXT,
+    journalTitle_s TEXT,
+    title_s TEXT,
+    submittedDate_s TEXT
+);
+CREATE TABLE IF NOT EXISTS contributors (
+    halId_s TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    contributor_id INTEGER,
+    name TEXT,
+    PRIMARY KEY (halId_s, position)
+);
+CREATE TABLE IF NOT EXISTS harvests (
+    scope TEXT NOT NULL,
+    journal TEXT NOT NULL,
+    fields TEXT NOT NULL,
+    num_found INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (scope, journal)
+);
+CREATE TABLE IF NOT EXISTS watermarks (
+    scope TEXT NOT NULL,
+    journal TEXT NOT NULL,
+    watermark TEXT NOT NULL,
+    PRIMARY KEY (scope, journal)
+);
+CREATE TABLE IF NOT EXISTS memberships (
+    scope TEXT NOT NULL,
+    halId_s TEXT NOT NULL,
+    PRIMARY KEY (scope, halId_s)
+);
+CREATE TABLE IF NOT EXISTS journal_ids (
+    title_key TEXT NOT NULL,
+    journal_id INTEGER NOT NULL,
+    hal_title TEXT,
+    method TEXT NOT NULL,
+    resolved_at REAL NOT NULL,
+    PRIMARY KEY (title_key, journal_id)
+);
+CREATE INDEX IF NOT EXISTS idx_documents_journal ON documents (journal);
+CREATE INDEX IF NOT EXISTS idx_documents_submitted ON documents (submittedDate_s);
+CREATE INDEX IF NOT EXISTS idx_contributors_id ON contributors (contributor_id);
+"""
+
+
+def connect(path=DEFAULT_DB_PATH):
+    """
+    Ouvre (et crée au besoin) la base locale du corpus. Le journal WAL laisse les lectures se poursuivre
+    pendant une écriture, et une écriture attend jusqu'à BUSY_TIMEOUT secondes le verrou d'une autre connexion.
+    """
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def utc_now():
+    """Horodatage UTC au format des dates Solr, utilisé comme point de reprise."""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def save_docs(conn, docs, scope=ALL_HAL):
+    """
+    Enregistre (ou complète) des documents HAL dans la base, indexés par halId_s.
+    Les champs absents d'un document ne remplacent pas les valeurs déjà connues.
+    """
+    doc_rows = []
+    contributor_ids = []
+    contributor_rows = []
+
+    for doc in docs:
+        hal_id = doc.get('halId_s')
+        if not hal_id:
+            continue
+        titles = as_list(doc.get('title_s'))
+        doc_rows.append((
+            hal_id,
+            doc.get('journal'),
+            doc.get('journalTitle_s'),
+            titles[0] if titles else None,
+            doc.get('submittedDate_s'),
+        ))
+        if 'contributorFullName_s' in doc or 'contributorId_i' in doc:
+            contributor_ids.append((hal_id,))
+            pairs = zip_longest(as_list(doc.get('contributorId_i')), as_list(doc.get('contributorFullName_s')))
+            contributor_rows.extend((hal_id, position, cid, name) for position, (cid, name) in enumerate(pairs))
+
+    with conn:
+        conn.executemany(
+            """
+            INSERT INTO documents (halId_s, journal, journalTitle_s, title_s, submittedDate_s)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (halId_s) DO UPDATE SET
+                journal = COALESCE(excluded.journal, journal),
+                journalTitle_s = COALESCE(excluded.journalTitle_s, journalTitle_s),
+                title_s = COALESCE(excluded.title_s, title_s),
+                submittedDate_s = COALESCE(excluded.submittedDate_s, submittedDate_s)
+            """,
+            doc_rows,
+        )
+        conn.executemany("DELETE FROM contributors WHERE halId_s = ?", contributor_ids)
+        conn.executemany("INSERT INTO contributors VALUES (?, ?, ?, ?)", contributor_rows)
+        if scope != ALL_HAL:
+            conn.executemany(
+                "INSERT OR IGNORE INTO memberships VALUES (?, ?)",
+                [(scope, row[0]) for row in doc_rows],
+            )
+
+
+def save_memberships(conn, pairs):
+    """
+    Rattache des documents déjà enregistrés à des portées : pairs est une liste de couples (portée, halId_s).
+    Un document présent dans plusieurs collections n'est ainsi enregistré qu'une fois.
+    """
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO memberships VALUES (?, ?)", pairs)
+
+
+def mark_harvested(conn, journal, fields, num_found, scope=ALL_HAL, watermark=None):
+    """
+    Note qu'une revue a été entièrement récoltée (pour une portée et des champs donnés).
+    Le point de reprise (date UTC de début de la récolte) sert aux synchronisations incrémentales.
+    """
+    requested = {f for f in fields.split(',') if f in STORED_FIELDS}
+    row = conn.execute(
+        "SELECT fields FROM harvests WHERE scope = ? AND journal = ?", (scope, journal)
+    ).fetchone()
+    # Les champs déjà récoltés lors d'un passage précédent restent disponibles
+    if row:
+        requested |= set(row[0].split(','))
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO harvests VALUES (?, ?, ?, ?, ?)",
+            (scope, journal, ','.join(sorted(requested)), num_found, time.time()),
+        )
+        if watermark is not None:
+            conn.execute(
+                "INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?)", (scope, journal, watermark)
+            )
+
+
+def get_harvests(conn, journals, fields, scope=ALL_HAL, max_age=DEFAULT_MAX_AGE):
+    """
+    Renvoie {revue: {'num_found': n, 'fetched_at': horodatage}} pour les revues déjà récoltées
+    avec tous les champs demandés depuis moins de max_age secondes (None : sans expiration).
+    Chaque revue expire indépendamment des autres.
+    """
+    requested = {f for f in fields.split(',') if f in STORED_FIELDS}
+    oldest = time.time() - max_age if max_age is not None else 0
+    harvests = {}
+    for journal in journals:
+        row = conn.execute(
+            "SELECT fields, num_found, fetched_at FROM harvests WHERE scope = ? AND journal = ?", (scope, journal)
+        ).fetchone()
+        if row and requested <= set(row[0].split(',')) and row[2] >= oldest:
+            harvests[journal] = {'num_found': row[1], 'fetched_at': row[2]}
+    return harvests
+
+
+def get_watermarks(conn, journals, fields, scope=ALL_HAL):
+    """
+    Renvoie {revue: point de reprise} pour les revues déjà récoltées avec tous les champs demandés,
+    quel que soit l'âge de la récolte.
+    """
+    harvested = get_harvests(conn, journals, fields, scope=scope, max_age=None)
+    watermarks = {}
+    for journal in harvested:
+        row = conn.execute(
+            "SELECT watermark FROM watermarks WHERE scope = ? AND journal = ?", (scope, journal)
+        ).fetchone()
+        if row:
+            watermarks[journal] = row[0]
+    return watermarks
+
+
+def save_journal_ids(conn, title_key, matches):
+    """
+    Remplace la résolution d'un titre de revue normalisé par ses correspondances
+    [(journal_id, titre HAL, méthode), ...] ; une liste vide note le titre comme introuvable.
+    """
+    now = time.time()
+    rows = [(title_key, journal_id, hal_title, method, now) for journal_id, hal_title, method in matches]
+    if not rows:
+        rows = [(title_key, UNRESOLVED_JOURNAL_ID, None, 'introuvable', now)]
+    with conn:
+        conn.execute("DELETE FROM journal_ids WHERE title_key = ?", (title_key,))
+        conn.executemany("INSERT INTO journal_ids VALUES (?, ?, ?, ?, ?)", rows)
+
+
+def load_journal_ids(conn, title_keys, max_age=JOURNAL_IDS_MAX_AGE):
+    """
+    Renvoie {titre normalisé: [(journal_id, titre HAL, méthode), ...]} pour les titres résolus depuis
+    moins de max_age secondes (None : sans expiration) ; la liste est vide pour un titre noté introuvable.
+    """
+    oldest = time.time() - max_age if max_age is not None else 0
+    resolved = {}
+    for title_key in title_keys:
+        rows = conn.execute(
+            "SELECT journal_id, hal_title, method FROM journal_ids WHERE title_key = ? AND resolved_at >= ?"
+            " ORDER BY journal_id",
+            (title_key, oldest),
+        ).fetchall()
+        if rows:
+            resolved[title_key] = [row for row in rows if row[0] != UNRESOLVED_JOURNAL_ID]
+    return resolved
+
+
+def count_docs(conn, journal, scope=ALL_HAL):
+    """Nombre de documents d'une revue présents dans la base (pour une portée donnée)."""
+    query = "SELECT COUNT(*) FROM documents WHERE journal = ?"
+    params = [journal]
+    if scope != ALL_HAL:
+        query += " AND halId_s IN (SELECT halId_s FROM memberships WHERE scope = ?)"
+        params.append(scope)
+    return conn.execute(query, params).fetchone()[0]
+
+
+def plan_refresh(conn, journals, fields, scope=ALL_HAL, max_age=DEFAULT_MAX_AGE, incremental=True):
+    """
+    Répartit les revues entre celles à relire depuis la base et celles à interroger sur HAL.
+    Renvoie (fresh, jobs) : fresh comme get_harvests, et jobs une liste de couples (groupe, since)
+    où since est le plus ancien point de reprise du groupe (synchronisation incrémentale)
+    ou None pour une récolte complète.
+    """
+    fresh = get_harvests(conn, journals, fields, scope=scope, max_age=max_age)
+    stale = [j for j in journals if j not in fresh]
+    watermarks = get_watermarks(conn, stale, fields, scope=scope) if incremental else {}
+
+    jobs = [
+        (chunk, min(watermarks[j] for j in chunk))
+        for chunk in plan_journal_queries([j for j in stale if j in watermarks])
+    ]
+    jobs += [(chunk, None) for chunk in plan_journal_queries([j for j in stale if j not in watermarks])]
+    return fresh, jobs
+
+
+def load_docs(conn, journals, scope=ALL_HAL):
+    """
+    Relit depuis la base les documents des revues demandées, au même format que les réponses HAL
+    (avec la clé 'journal').
+    """
+    if not journals:
+        return []
+
+    placeholders = ','.join('?' * len(journals))
+    query = f"""
+        SELECT d.halId_s, d.journal, d.journalTitle_s, d.title_s, d.submittedDate_s
+        FROM documents d
+        WHERE d.journal IN ({placeholders})
+    """
+    params = list(journals)
+    if scope != ALL_HAL:
+        query += " AND d.halId_s IN (SELECT halId_s FROM memberships WHERE scope = ?)"
+        params.append(scope)
+
+    docs = {}
+    for hal_id, journal, journal_title, title, submitted in conn.execute(query, params):
+        doc = {'halId_s': hal_id, 'journal': journal}
+        if journal_title is not None:
+            doc['journalTitle_s'] = journal_title
+        if title is not None:
+            doc['title_s'] = [title]
+        if submitted is not None:
+            doc['submittedDate_s'] = submitted
+        docs[hal_id] = doc
+
+    contributor_query = f"""
+        SELECT c.halId_s, c.contributor_id, c.name
+        FROM contributors c JOIN documents d ON d.halId_s = c.halId_s
+        WHERE d.journal IN ({placeholders})
+        ORDER BY c.halId_s, c.position
+    """
+    for hal_id, contributor_id, name in conn.execute(contributor_query, list(journals)):
+        doc = docs.get(hal_id)
+        if doc is None:
+            continue
+        if contributor_id is not None:
+            doc.setdefault('contributorId_i', []).append(contributor_id)
+        if name is not None:
+            doc.setdefault('contributorFullName_s', []).append(name)
+
+    return list(docs.values())
+
+
+def iter_docs(conn, journals, scope=ALL_HAL):
+    """
+    Relit les documents des revues demandées revue par revue (une liste par revue),
+    pour les traitements en flux qui ne doivent pas charger toute la base en mémoire.
+    """
+    for journal in journals:
+        docs = load_docs(conn, [journal], scope=scope)
+        if docs:
+            yield docs
+
+
+# Colonnes sur lesquelles la liste des publications peut être triée
+PUBLICATION_SORT_COLUMNS = {
+    'submittedDate_s': 'd.submittedDate_s',
+    'title_s': 'd.title_s',
+    'journal': 'd.journal',
+    'halId_s': 'd.halId_s',
+}
+
+
+def _publication_filters(journals, contributor=None, start_date=None, end_date=None, scope=ALL_HAL):
+    """
+    Clause WHERE (et ses paramètres) de la liste des publications : revues, contributeur
+    (ID HAL exact si le filtre est numérique, sinon partie du nom) et période de soumission
+    (dates 'AAAA-MM-JJ' incluses).
+    """
+    clauses = [f"d.journal IN ({','.join('?' * len(journals))})"]
+    params = list(journals)
+    if contributor:
+        if contributor.isdigit():
+            clauses.append("EXISTS (SELECT 1 FROM contributors c WHERE c.halId_s = d.halId_s AND c.contributor_id = ?)")
+            params.append(int(contributor))
+        else:
+            clauses.append("EXISTS (SELECT 1 FROM contributors c WHERE c.halId_s = d.halId_s AND c.name LIKE ?)")
+            params.append(f'%{contributor}%')
+    if start_date:
+        clauses.append("d.submittedDate_s >= ?")
+        params.append(str(start_date))
+    if end_date:
+        # Les dates HAL ('AAAA-MM-JJ HH:MM:SS') se comparent comme des chaînes : on borne au jour suivant
+        clauses.append("d.submittedDate_s < date(?, '+1 day')")
+        params.append(str(end_date))
+    if scope != ALL_HAL:
+        clauses.append("d.halId_s IN (SELECT halId_s FROM memberships WHERE scope = ?)")
+        params.append(scope)
+    return ' AND '.join(clauses), params
+
+
+def count_publications(conn, journals, contributor=None, start_date=None, end_date=None, scope=ALL_HAL):
+    """Nombre de publications des revues demandées qui passent les filtres."""
+    if not journals:
+        return 0
+    where, params = _publication_filters(journals, contributor, start_date, end_date, scope)
+    return conn.execute(f"SELECT COUNT(*) FROM documents d WHERE {where}", params).fetchone()[0]
+
+
+def query_publications(conn, journals, contributor=None, start_date=None, end_date=None, sort='submittedDate_s',
+                       descending=True, limit=50, offset=0, scope=ALL_HAL):
+    """
+    Une page de la liste des publications, filtrée et triée par la base (index sur la revue, la date
+    et l'ID des contributeurs). Renvoie des tuples (halId_s, title_s, journal, submittedDate_s, contributeurs),
+    les noms des contributeurs étant joints par des virgules dans l'ordre du dépôt.
+    Avec limit=None, toutes les publications filtrées sont renvoyées.
+    """
+    if not journals:
+        return []
+    where, params = _publication_filters(journals, contributor, start_date, end_date, scope)
+    order = PUBLICATION_SORT_COLUMNS[sort]
+    direction = 'DESC' if descending else 'ASC'
+    query = f"""
+        SELECT d.halId_s, d.title_s, d.journal, d.submittedDate_s,
+               (SELECT group_concat(name, ', ') FROM (
+                    SELECT c.name FROM contributors c WHERE c.halId_s = d.halId_s ORDER BY c.position
+               )) AS contributors
+        FROM documents d
+        WHERE {where}
+        ORDER BY {order} {direction}, d.halId_s
+    """
+    if limit is not None:
+        query += " LIMIT ? OFFSET ?"
+        params += [limit, offset]
+    return conn.execute(query, params).fetchall()
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from hal_bursts import BURST_COLUMNS, RAPID_GAP, detect_bursts
+
+# =========================================================
+# 🧪 RAFALES : COMPARAISON AVEC UN PARCOURS NAÏF
+# =========================================================
+# detect_bursts calcule tout en opérations sur tableaux (clé composite, searchsorted, reduceat) ;
+# on vérifie ses statistiques contributeur par contributeur contre une fenêtre glissante en O(n²).
+
+
+def brute_force_bursts(contributor_ids, times, window, min_deposits, max_median_gap=None):
+    """Mêmes statistiques que detect_bursts, une boucle Python par contributeur et par dépôt."""
+    rows = {}
+    for contributor_id in sorted(set(contributor_ids)):
+        deposits = sorted(t for i, t in zip(contributor_ids, times) if i == contributor_id)
+        counts = [sum(start <= t <= start + window for t in deposits) for start in deposits]
+        peak = max(counts)
+        gaps = np.diff(deposits)
+        median_gap = float(np.median(gaps)) if len(gaps) else np.nan
+        flagged = peak >= min_deposits
+        if max_median_gap is not None:
+            flagged = flagged and len(gaps) > 0 and median_gap <= max_median_gap
+        rows[contributor_id] = {
+            'Nb Dépôts': len(deposits),
+            'Pic Dépôts Fenêtre': peak,
+            'Début du Pic': pd.to_datetime(deposits[counts.index(peak)], unit='s'),
+            'Écart Médian (s)': median_gap,
+            'Écart Minimal (s)': float(gaps.min()) if len(gaps) else np.nan,
+            'Part Écarts Rapides': round(float((gaps <= RAPID_GAP).mean()), 3) if len(gaps) else 0.0,
+            'Premier Dépôt': pd.to_datetime(deposits[0], unit='s'),
+            'Dernier Dépôt': pd.to_datetime(deposits[-1], unit='s'),
+            'Rafale': flagged,
+        }
+    return rows
+
+
+def random_deposits(seed, nb_contributors=8, nb_deposits=300):
+    """Dépôts aléatoires : dates étalées sur deux jours, avec des rafales serrées et des dates en double."""
+    rng = np.random.default_rng(seed)
+    contributor_ids = rng.integers(1, nb_contributors + 1, size=nb_deposits)
+    times = 1_700_000_000 + rng.integers(0, 2 * 86_400, size=nb_deposits)
+    burst = rng.random(nb_deposits) < 0.4
+    times[burst] = 1_700_050_000 + rng.integers(0, 600, size=burst.sum())
+    return contributor_ids, times
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('window, min_deposits, max_median_gap', [(3600, 20, None), (600, 10, 120), (1, 2, 0)])
+def test_detect_bursts_matches_brute_force(seed, window, min_deposits, max_median_gap):
+    contributor_ids, times = random_deposits(seed)
+    result = detect_bursts(contributor_ids, times, window=window, min_deposits=min_deposits,
+                           max_median_gap=max_median_gap)
+    expected = brute_force_bursts(contributor_ids.tolist(), times.tolist(), window, min_deposits, max_median_gap)
+
+    assert list(result.columns) == BURST_COLUMNS
+    expected = pd.DataFrame.from_dict(expected, orient='index').rename_axis('ID HAL Contributeur').reset_index()
+    pd.testing.assert_frame_equal(
+        result.sort_values('ID HAL Contributeur').reset_index(drop=True),
+        expected[BURST_COLUMNS],
+        check_dtype=False,
+    )
+    peaks = result['Pic Dépôts Fenêtre'].tolist()
+    assert peaks == sorted(peaks, reverse=True)
+
+
+def test_detect_bursts_accepts_datetime64():
+    contributor_ids, times = random_deposits(0)
+    from_seconds = detect_bursts(contributor_ids, times)
+    from_dates = detect_bursts(contributor_ids, times.astype('datetime64[s]'))
+    pd.testing.assert_frame_equal(from_seconds, from_dates)
+
+
+def test_detect_bursts_single_deposit_and_empty():
+    single = detect_bursts([7], [1_700_000_000], min_deposits=1).iloc[0]
+    assert single['Pic Dépôts Fenêtre'] == 1 and single['Rafale']
+    assert np.isnan(single['Écart Médian (s)']) and single['Part Écarts Rapides'] == 0.0
+    assert detect_bursts([], []).empty
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from hal_duplicates import (CLUSTER_COLUMNS, SIGNATURE_BATCH_SHINGLES, cluster_summary, minhash_signatures,
+                            near_duplicate_clusters, normalize_title)
+
+# =========================================================
+# 🧪 TITRES QUASI IDENTIQUES : GROUPE CONNU
+# =========================================================
+# Un robot dépose le même article en changeant la casse, les accents, la ponctuation ou un mot ;
+# ces variantes doivent former un seul groupe, sans y entraîner les titres simplement voisins.
+
+CLUSTER_TITLES = [
+    "Deep learning for the detection of automated deposits in open archives",
+    "Deep Learning for the Detection of Automated Deposits in Open Archives.",
+    "deep learning for the détection of automated deposits in open archives",
+    "Deep learning for the detection of automated deposits in open archive",
+    "DEEP LEARNING FOR THE DETECTION OF AUTOMATED DEPOSITS IN OPEN ARCHIVES !",
+]
+
+OTHER_TITLES = [
+    "Soil moisture dynamics under Mediterranean vineyards",
+    "A survey of graph neural networks for molecular property prediction",
+    "Deep learning for the classification of galaxy morphologies",
+    "Historical archives of the French colonial administration",
+    "",
+]
+
+
+def run_clusters(titles):
+    hal_ids = [f'hal-{i:08d}' for i in range(len(titles))]
+    journals = ['Revue A' if i % 2 else 'Revue B' for i in range(len(titles))]
+    submitted = pd.Series(pd.date_range('2024-01-01', periods=len(titles), freq='min'))
+    return near_duplicate_clusters(hal_ids, titles, journals, submitted)
+
+
+def test_known_cluster_is_found():
+    titles = OTHER_TITLES[:2] + CLUSTER_TITLES + OTHER_TITLES[2:]
+    clusters = run_clusters(titles)
+
+    assert list(clusters.columns) == CLUSTER_COLUMNS
+    assert clusters['Groupe'].nunique() == 1
+    assert sorted(clusters['Titre']) == sorted(CLUSTER_TITLES)
+    assert (clusters['Taille Groupe'] == len(CLUSTER_TITLES)).all()
+
+    summary = cluster_summary(clusters)
+    assert summary.loc[0, 'Taille Groupe'] == len(CLUSTER_TITLES)
+    assert summary.loc[0, 'Revues'] == 'Revue A, Revue B'
+
+
+def test_distinct_titles_form_no_cluster():
+    assert run_clusters(OTHER_TITLES).empty
+    assert run_clusters([]).empty
+
+
+def test_normalized_duplicates_share_signature():
+    assert normalize_title(CLUSTER_TITLES[0]) == normalize_title(CLUSTER_TITLES[1]) == normalize_title(CLUSTER_TITLES[2])
+    signatures = minhash_signatures(CLUSTER_TITLES[:3] + OTHER_TITLES[-1:])
+    assert (signatures[0] == signatures[1]).all() and (signatures[0] == signatures[2]).all()
+    # Un titre vide n'a aucun fragment : signature à la valeur maximale, jamais rapprochée
+    assert (signatures[3] == np.iinfo(np.uint32).max).all()
+
+
+def test_signatures_do_not_depend_on_batches():
+    # Assez de titres distincts pour remplir plusieurs lots de fragments
+    titles = [f"{title} volume {i}" for i in range(SIGNATURE_BATCH_SHINGLES // 40) for title in CLUSTER_TITLES[:1]]
+    signatures = minhash_signatures(titles)
+    one_by_one = np.vstack([minhash_signatures([title]) for title in titles[:50]])
+    assert (signatures[:50] == one_by_one).all()